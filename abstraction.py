@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+ハンドの強さによるカードの抽象化（バケット分け）（NumPy が必要）
+
+スートの入れ替えで同じになる局面（isomorphism.py の正規インデックス）ごとに、
+ランダムな相手1人に対する期待ハンド強度（EHS）の分布を求め、k-means で N 個のバケットに分ける。
+
+    EHS     リバーまでの残りのカードと相手のハンドを無作為に配ったときの勝率（引き分けは半分）
+    EHS²    リバーでの勝率の2乗の平均（ドローのような、結果が大きくぶれるハンドで大きくなる）
+    分布    リバーまでの runouts 通りの配り方それぞれでの勝率のヒストグラム（bins 区間）
+
+リバーでは分布を作らず EHS だけで分ける。フロップ・ターンは分布（ヒストグラム）で分けるので、
+EHS が同じでもメイドハンドとドローは別のバケットになる。
+
+特徴量の計算は正規インデックスの区間ごとにプロセスに分け、区間内は evaluate_batch で
+まとめて評価する。結果はストリートごとに .npy で保存し、mmap で開くので、
+局面の分類は正規インデックスを求めて配列を1回引くだけで済む。
+
+    抽象化/
+        buckets_<ストリート>.npy   正規インデックス → バケット番号（uint16）
+        ehs_<ストリート>.npy       正規インデックス → EHS（float32）
+        ehs2_<ストリート>.npy      正規インデックス → EHS²（float32）
+        centers_<ストリート>.npy   バケットの中心
+
+ターンは 55,190,538 通り、リバーは 2,428,287,420 通りあるので、時間とディスクに注意する。
+
+生成:
+    python3 abstraction.py --streets preflop flop --buckets 169 50 --runouts 8 --opponents 16
+"""
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hand_evaluator import HandEvaluator
+from isomorphism import HOLDEM, canonical_index
+from preflop import draw_cards
+
+STREETS = ("preflop", "flop", "turn", "river")
+BOARD_SIZES = (0, 3, 4, 5)
+DEFAULT_ABSTRACTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "abstraction")
+
+CHUNK_SIZE = 2000  # 1タスクあたりの正規インデックスの数
+
+
+# ---------------------------------------------------------------------------
+# 特徴量（EHS, EHS², 分布）
+# ---------------------------------------------------------------------------
+
+def _card_arrays(street: int, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+    """正規インデックス start〜stop の代表のホールカードとボード"""
+    hole = np.empty((stop - start, 2), dtype=np.int64)
+    board = np.empty((stop - start, BOARD_SIZES[street]), dtype=np.int64)
+    for row, index in enumerate(range(start, stop)):
+        rounds = HOLDEM.unindex(street, index)
+        hole[row] = rounds[0]
+        board[row] = [card_id for cards in rounds[1:] for card_id in cards]
+    return hole, board
+
+
+def hand_features(hole: np.ndarray, board: np.ndarray, runouts: int, opponents: int,
+                  bins: int, rng) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ホールカード (N, 2) とボード (N, b) の各行の EHS, EHS², 分布を求める
+
+    各行についてリバーまでの残りのボードを runouts 通り、それぞれに相手のホールカードを
+    opponents 通り配り、配り方ごとの勝率を求める。
+
+    Returns:
+        (ehs (N,), ehs2 (N,), histogram (N, bins))。histogram は各行の合計が 1
+    """
+    rows = len(hole)
+    used = np.left_shift(1, hole[:, 0]) | np.left_shift(1, hole[:, 1])
+    for j in range(board.shape[1]):
+        used |= np.left_shift(1, board[:, j])
+
+    # (行, 配り方) ごとに残りのボードを配る
+    used = np.repeat(used, runouts)
+    rest = draw_cards(np, rng, used, 5 - board.shape[1])
+    full_board = np.concatenate([np.repeat(board, runouts, axis=0), rest], axis=1)
+    hero = HandEvaluator.evaluate_batch(
+        np.concatenate([np.repeat(hole, runouts, axis=0), full_board], axis=1))
+
+    # (行, 配り方, 相手) ごとに相手のホールカードを配る
+    villain_cards = draw_cards(np, rng, np.repeat(used, opponents), 2)
+    villain = HandEvaluator.evaluate_batch(
+        np.concatenate([villain_cards, np.repeat(full_board, opponents, axis=0)], axis=1))
+    hero = np.repeat(hero, opponents)
+    share = np.where(hero > villain, 1.0, np.where(hero == villain, 0.5, 0.0))
+    strength = share.reshape(rows, runouts, opponents).mean(axis=2)
+
+    ehs = strength.mean(axis=1)
+    ehs2 = (strength ** 2).mean(axis=1)
+    bin_index = np.minimum((strength * bins).astype(np.int64), bins - 1)
+    histogram = np.zeros((rows, bins), dtype=np.float64)
+    np.add.at(histogram, (np.repeat(np.arange(rows), runouts), bin_index.ravel()), 1.0 / runouts)
+    return ehs, ehs2, histogram
+
+
+def _features_chunk(street: int, start: int, stop: int, runouts: int, opponents: int,
+                    bins: int, seed: int):
+    """正規インデックス start〜stop の特徴量（プロセスで実行する）"""
+    rng = np.random.default_rng([seed, street, start])
+    hole, board = _card_arrays(street, start, stop)
+    ehs, ehs2, histogram = hand_features(hole, board, runouts, opponents, bins, rng)
+    return start, ehs, ehs2, histogram
+
+
+# ---------------------------------------------------------------------------
+# k-means
+# ---------------------------------------------------------------------------
+
+def _nearest(points: np.ndarray, centers: np.ndarray, out: Optional[np.ndarray] = None,
+             chunk: int = 65536) -> np.ndarray:
+    """各点に最も近い中心の番号（行を区切って距離を計算するので、points は memmap でもよい）"""
+    labels = out if out is not None else np.empty(len(points), dtype=np.int64)
+    center_norms = (centers ** 2).sum(axis=1)
+    for start in range(0, len(points), chunk):
+        block = np.asarray(points[start:start + chunk], dtype=np.float64)
+        # |x - c|² の、点ごとに定数の |x|² を除いた部分
+        distances = center_norms[None, :] - 2.0 * block @ centers.T
+        labels[start:start + chunk] = distances.argmin(axis=1)
+    return labels
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = 50, sample: int = 200_000,
+           seed: int = 0, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    k-means（初期値は k-means++）で点をクラスタに分ける
+
+    中心は最大 sample 点の標本で学習し、最後に全ての点を最も近い中心に割り当てる
+    （全ての点をメモリに載せないので、points は memmap でもよい）。
+
+    Args:
+        out: バケット番号を書き込む配列（memmap など）
+
+    Returns:
+        (labels (N,), centers (k, d))
+    """
+    rng = np.random.default_rng(seed)
+    if points.ndim == 1:
+        points = points[:, None]
+    if len(points) <= sample:
+        train = np.asarray(points, dtype=np.float64)
+    else:
+        rows = np.sort(rng.choice(len(points), sample, replace=False))
+        train = np.asarray(points[rows], dtype=np.float64)
+    k = min(k, len(np.unique(train, axis=0)))
+
+    # k-means++: 既存の中心から遠い点ほど選ばれやすくする
+    centers = np.empty((k, train.shape[1]), dtype=np.float64)
+    centers[0] = train[rng.integers(len(train))]
+    distances = ((train - centers[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        centers[i] = train[rng.choice(len(train), p=distances / distances.sum())]
+        distances = np.minimum(distances, ((train - centers[i]) ** 2).sum(axis=1))
+
+    labels = _nearest(train, centers)
+    for _ in range(iterations):
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=train[:, j], minlength=k)
+                         for j in range(train.shape[1])], axis=1)
+        empty = counts == 0
+        centers[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            # 空になったクラスタは、いまの中心から最も遠い点で置き換える
+            far = ((train - centers[labels]) ** 2).sum(axis=1).argsort()[::-1]
+            centers[empty] = train[far[:int(empty.sum())]]
+        new_labels = _nearest(train, centers)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    # バケット番号が強さの順になるように、中心を平均の勝率で並べ替える
+    if train.shape[1] > 1:
+        mids = (np.arange(train.shape[1]) + 0.5) / train.shape[1]
+        order = np.argsort(centers @ mids)
+    else:
+        order = np.argsort(centers[:, 0])
+    centers = centers[order]
+    return _nearest(points, centers, out), centers
+
+
+# ---------------------------------------------------------------------------
+# 生成と参照
+# ---------------------------------------------------------------------------
+
+def build_abstraction(path: str = DEFAULT_ABSTRACTION_PATH,
+                      streets: Sequence[str] = ("preflop", "flop"),
+                      buckets: Sequence[int] = (169, 50), runouts: int = 8, opponents: int = 16,
+                      bins: int = 10, seed: int = 0, workers: Optional[int] = None):
+    """
+    指定したストリートのバケットを計算してディレクトリに保存する
+
+    Args:
+        streets: 計算するストリート（'preflop', 'flop', 'turn', 'river'）
+        buckets: ストリートごとのバケット数
+        runouts: 1つの局面あたりの、リバーまでの残りのボードの配り方の数
+        opponents: 1つの配り方あたりの、相手のホールカードの配り方の数
+        bins: 分布（ヒストグラム）の区間の数
+        workers: プロセス数（None でCPU数）
+    """
+    os.makedirs(path, exist_ok=True)
+    for street_name, num_buckets in zip(streets, buckets):
+        street = STREETS.index(street_name)
+        size = HOLDEM.size(street)
+        if street == 3:
+            # リバーは残りのカードが無いので、同じ評価回数を全て相手のハンドに使い EHS だけ求める
+            street_runouts, street_opponents, street_bins = 1, runouts * opponents, 1
+        else:
+            street_runouts, street_opponents, street_bins = runouts, opponents, bins
+        ehs = _open_array(path, f"ehs_{street_name}.npy", np.float32, (size,))
+        ehs2 = _open_array(path, f"ehs2_{street_name}.npy", np.float32, (size,))
+        histogram = None
+        if street < 3:
+            histogram = _open_array(path, f"histogram_{street_name}.tmp.npy", np.float32,
+                                    (size, bins))
+
+        tasks = ((street, start, min(start + CHUNK_SIZE, size), street_runouts,
+                  street_opponents, street_bins, seed) for start in range(0, size, CHUNK_SIZE))
+        for start, chunk_ehs, chunk_ehs2, chunk_histogram in _run_tasks(tasks, workers):
+            stop = start + len(chunk_ehs)
+            ehs[start:stop] = chunk_ehs
+            ehs2[start:stop] = chunk_ehs2
+            if histogram is not None:
+                histogram[start:stop] = chunk_histogram
+
+        buckets_out = _open_array(path, f"buckets_{street_name}.npy", np.uint16, (size,))
+        _, centers = kmeans(ehs if histogram is None else histogram, num_buckets, seed=seed,
+                            out=buckets_out)
+        np.save(os.path.join(path, f"centers_{street_name}.npy"), centers)
+        for array in (ehs, ehs2, buckets_out):
+            array.flush()
+        del ehs, ehs2, buckets_out
+        if histogram is not None:
+            del histogram
+            os.remove(os.path.join(path, f"histogram_{street_name}.tmp.npy"))
+
+
+def _open_array(path: str, name: str, dtype, shape: Tuple[int, ...]) -> np.ndarray:
+    """書き込み用に .npy を memmap で作る"""
+    return np.lib.format.open_memmap(os.path.join(path, name), mode="w+", dtype=dtype,
+                                     shape=shape)
+
+
+def _run_tasks(tasks, workers: Optional[int]):
+    """_features_chunk をプロセスで実行し、結果を順に返す（同時に投入するタスク数は抑える）"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = 4 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_features_chunk, *task))
+            if len(pending) >= limit:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Abstraction:
+    """保存したバケットを mmap で開き、局面をバケットに分類する"""
+
+    def __init__(self, path: str = DEFAULT_ABSTRACTION_PATH):
+        self.path = path
+        self._arrays: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def _array(self, name: str, street: int) -> np.ndarray:
+        key = (name, street)
+        array = self._arrays.get(key)
+        if array is None:
+            file_path = os.path.join(self.path, f"{name}_{STREETS[street]}.npy")
+            if not os.path.exists(file_path):
+                raise ValueError(f"{STREETS[street]} のバケットがありません: {self.path}")
+            array = self._arrays[key] = np.load(file_path, mmap_mode="r")
+        return array
+
+    def has_street(self, board_size: int) -> bool:
+        """ボードの枚数に対応するストリートのバケットがあるか"""
+        street = BOARD_SIZES.index(board_size)
+        return os.path.exists(os.path.join(self.path, f"buckets_{STREETS[street]}.npy"))
+
+    def num_buckets(self, board_size: int) -> int:
+        return len(self._array("centers", BOARD_SIZES.index(board_size)))
+
+    def bucket(self, hole_cards: Sequence, board: Sequence = ()) -> int:
+        """局面のバケット番号（番号が大きいほど強い）"""
+        street = BOARD_SIZES.index(len(board))
+        return int(self._array("buckets", street)[canonical_index(hole_cards, board)])
+
+    def ehs(self, hole_cards: Sequence, board: Sequence = ()) -> float:
+        """局面の EHS"""
+        street = BOARD_SIZES.index(len(board))
+        return float(self._array("ehs", street)[canonical_index(hole_cards, board)])
+
+    def ehs2(self, hole_cards: Sequence, board: Sequence = ()) -> float:
+        """局面の EHS²"""
+        street = BOARD_SIZES.index(len(board))
+        return float(self._array("ehs2", street)[canonical_index(hole_cards, board)])
+
+
+_abstractions: Dict[str, Optional[Abstraction]] = {}
+
+
+def load_abstraction(path: str = DEFAULT_ABSTRACTION_PATH) -> Optional[Abstraction]:
+    """抽象化を開く（プロセス内で1度だけ）。ディレクトリが無ければ None"""
+    if path not in _abstractions:
+        _abstractions[path] = Abstraction(path) if os.path.isdir(path) else None
+    return _abstractions[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ハンドの強さによるバケットを生成します")
+    parser.add_argument("--output", default=DEFAULT_ABSTRACTION_PATH, help="出力ディレクトリ")
+    parser.add_argument("--streets", nargs="+", default=["preflop", "flop"], choices=STREETS,
+                        help="計算するストリート")
+    parser.add_argument("--buckets", nargs="+", type=int, default=[169, 50],
+                        help="ストリートごとのバケット数")
+    parser.add_argument("--runouts", type=int, default=8, help="残りのボードの配り方の数")
+    parser.add_argument("--opponents", type=int, default=16, help="相手のハンドの配り方の数")
+    parser.add_argument("--bins", type=int, default=10, help="分布の区間の数")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数")
+    args = parser.parse_args()
+
+    if len(args.buckets) != len(args.streets):
+        parser.error("--buckets はストリートと同じ数だけ指定してください")
+    build_abstraction(args.output, args.streets, args.buckets, args.runouts, args.opponents,
+                      args.bins, args.seed, args.workers)
+    print(f"バケットを {args.output} に保存しました")
+
+
+if __name__ == "__main__":
+    main()
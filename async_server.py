@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+asyncio で多数のテーブルを同時に進行するゲームサーバー
+
+1つのイベントループで多数の TexasHoldem テーブルを動かす。
+プレイヤーの判断は await で待ち、時間切れになったらフォールドさせるので、
+判断の遅いプレイヤーがいても他のテーブルは止まらない。
+
+リモートのクライアントは TCP で接続し、1行1つの JSON メッセージでやり取りする:
+    クライアント → サーバー
+        {"type": "join", "table": 1, "name": "alice"}
+        {"type": "action", "action": "raise", "amount": 40}
+    サーバー → クライアント
+        {"type": "joined", "table": 1, "chips": 1000}
+        {"type": "action_request", "hand": [...], "board": [...],
+         "legal_actions": ["fold", "call", "raise"], "current_bet": 20,
+         "to_call": 10, "min_raise": 20, "max_raise": null, "pot": 30, "chips": 990,
+         "timeout": 30.0}
+        （max_raise はポットリミットでのレイズ額の上限。上限がなければ null）
+        {"type": "hand_result", "board": [...], "winners": [...], "chips": {...}}
+        {"type": "busted"} / {"type": "error", "message": "..."}
+
+実行例:
+    python3 async_server.py --port 8765 --tables 100
+"""
+import argparse
+import asyncio
+import inspect
+import json
+from typing import Dict, List, Optional, Tuple
+
+from player import AIPlayer, Player
+from texas_holdem import TexasHoldem
+
+ACTION_TIMEOUT = 30.0  # 1アクションの制限時間（秒）
+VALID_ACTIONS = ("fold", "check", "call", "raise")
+
+
+class AsyncTexasHoldem(TexasHoldem):
+    """プレイヤーの判断を await で待つ TexasHoldem"""
+
+    def __init__(self, players: List[Player], small_blind: int = 10, big_blind: int = 20,
+                 action_timeout: float = ACTION_TIMEOUT, **kwargs):
+        kwargs.setdefault("headless", True)
+        kwargs.setdefault("action_delay", 0)
+        super().__init__(players, small_blind, big_blind, **kwargs)
+        self.action_timeout = action_timeout
+
+    async def play_hand_async(self, yield_each_action: bool = True):
+        """
+        1ハンドをプレイ（判断を待つ間は他のテーブルに処理を譲る）
+
+        yield_each_action が False のときは、アクションごとの asyncio.sleep を省き、
+        判断を await で待つプレイヤーのときだけ処理を譲る。
+        """
+        steps = self.hand_steps()
+        decision = None
+        try:
+            while True:
+                player = steps.send(decision)
+                decision = await self.request_action(player)
+                if yield_each_action:
+                    # AIだけのテーブルでもイベントループを独占しないように毎回譲る
+                    await asyncio.sleep(self.action_delay)
+        except StopIteration:
+            pass
+
+    async def request_action(self, player: Player) -> Tuple[str, int]:
+        """
+        プレイヤーの判断を取得
+
+        decide_action が awaitable を返す場合は制限時間まで待ち、
+        時間切れならフォールドとして扱う。
+        """
+        decision = player.decide_action(self.current_bet, self.min_raise, self.pot)
+        if inspect.isawaitable(decision):
+            try:
+                decision = await asyncio.wait_for(decision, self.action_timeout)
+            except asyncio.TimeoutError:
+                return ('fold', 0)
+        return decision
+
+
+class RemotePlayer(Player):
+    """TCP で接続したクライアントのプレイヤー"""
+
+    def __init__(self, name: str, connection: "ClientConnection", chips: int = 1000):
+        super().__init__(name, chips)
+        self.connection = connection
+        self.timeout = ACTION_TIMEOUT
+
+    async def decide_action(self, current_bet: int, min_raise: int, pot: int) -> Tuple[str, int]:
+        """クライアントにアクションを要求し、返ってきたアクションを返す"""
+        if self.connection.closed:
+            return ('fold', 0)
+
+        # 前の要求の時間切れ後に届いたアクションは捨てる
+        actions = self.connection.actions
+        while not actions.empty():
+            if actions.get_nowait() is None:
+                return ('fold', 0)
+
+        to_call = current_bet - self.current_bet
+        game = self.connection.table.game
+        legal_actions = list(VALID_ACTIONS)
+        if game.betting is not None:
+            legal_actions = game.betting.legal_actions(self)
+            # チップが足りなければ最小レイズ額未満のオールインもできる
+            min_raise = game.betting.min_raise_amount(self)
+        max_raise = game.max_raise(self)
+        self.connection.send({
+            "type": "action_request",
+            "hand": [str(c) for c in self.hand],
+            "board": [str(c) for c in game.community_cards],
+            "legal_actions": legal_actions,
+            "current_bet": current_bet,
+            "to_call": to_call,
+            "min_raise": min_raise,
+            "max_raise": max_raise,
+            "pot": pot,
+            "chips": self.chips,
+            "timeout": self.timeout,
+        })
+
+        while True:
+            message = await actions.get()
+            if message is None:  # 切断
+                return ('fold', 0)
+            action = message.get("action")
+            amount = message.get("amount", 0)
+            if action not in legal_actions or not isinstance(amount, int):
+                self.connection.send({"type": "error", "message": "無効なアクションです"})
+                continue
+            if action == 'call':
+                amount = to_call
+            elif action == 'raise' and amount < min_raise:
+                self.connection.send({"type": "error", "message": f"最小レイズ額は{min_raise}です"})
+                continue
+            elif action == 'raise' and max_raise is not None and amount > max_raise:
+                self.connection.send({"type": "error", "message": f"最大レイズ額は{max_raise}です"})
+                continue
+            return (action, amount)
+
+
+class ClientConnection:
+    """クライアント1人分の接続"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.actions: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+        self.table: Optional["Table"] = None
+        self.player: Optional[RemotePlayer] = None
+        self.closed = False
+
+    def send(self, message: Dict):
+        """メッセージを送信（書き込みはバッファされるので待たない）"""
+        if not self.closed:
+            self.writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.actions.put_nowait(None)
+            self.writer.close()
+
+
+class Table:
+    """サーバー上の1テーブル（ハンドの合間に参加者を着席させる）"""
+
+    def __init__(self, table_id: int, seats: int, small_blind: int, big_blind: int,
+                 action_timeout: float):
+        self.table_id = table_id
+        self.seats = seats
+        self.game = AsyncTexasHoldem([], small_blind, big_blind, action_timeout=action_timeout)
+        self._waiting: List[Player] = []
+        self._player_joined = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def seated(self) -> int:
+        return len(self.game.players) + len(self._waiting)
+
+    def add_player(self, player: Player) -> bool:
+        """次のハンドから参加させる。満席なら False"""
+        if self.seated >= self.seats:
+            return False
+        self._waiting.append(player)
+        self._player_joined.set()
+        return True
+
+    def _seat_waiting_players(self):
+        self.game.players.extend(self._waiting)
+        self._waiting = []
+
+    def _remove_disconnected(self):
+        self.game.players = [
+            p for p in self.game.players
+            if not (isinstance(p, RemotePlayer) and p.connection.closed)
+        ]
+
+    async def run(self):
+        """テーブルのゲームループ"""
+        while True:
+            self._remove_disconnected()
+            self._seat_waiting_players()
+            if len(self.game.players) < 2:
+                self._player_joined.clear()
+                await self._player_joined.wait()
+                continue
+
+            await self.game.play_hand_async()
+            self._broadcast_result()
+
+            for player in self.game.players:
+                if player.chips <= 0 and isinstance(player, RemotePlayer):
+                    player.connection.send({"type": "busted"})
+            self.game.eliminate_broke_players()
+
+    def _broadcast_result(self):
+        message = {
+            "type": "hand_result",
+            "table": self.table_id,
+            "board": [str(c) for c in self.game.community_cards],
+            "winners": [p.name for p in self.game.last_winners],
+            "chips": {p.name: p.chips for p in self.game.players},
+        }
+        for player in self.game.players:
+            if isinstance(player, RemotePlayer):
+                player.connection.send(message)
+
+
+class GameServer:
+    """多数のテーブルを1つのイベントループで動かすサーバー"""
+
+    def __init__(self, seats: int = 6, small_blind: int = 10, big_blind: int = 20,
+                 chips: int = 1000, action_timeout: float = ACTION_TIMEOUT):
+        self.seats = seats
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.chips = chips
+        self.action_timeout = action_timeout
+        self.tables: Dict[int, Table] = {}
+
+    def get_table(self, table_id: int) -> Table:
+        """テーブルを取得（無ければ作成してゲームループを開始）"""
+        table = self.tables.get(table_id)
+        if table is None:
+            table = Table(table_id, self.seats, self.small_blind, self.big_blind,
+                          self.action_timeout)
+            table.task = asyncio.get_running_loop().create_task(table.run())
+            self.tables[table_id] = table
+        return table
+
+    def add_ai_players(self, table_id: int, count: int):
+        """テーブルにAIプレイヤーを座らせる"""
+        table = self.get_table(table_id)
+        for i in range(count):
+            aggression = (i + 1) / (count + 1)
+            table.add_player(AIPlayer(f"AI_{table_id}_{i}", self.chips, aggression))
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """クライアント1人分の受信ループ"""
+        connection = ClientConnection(reader, writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    connection.send({"type": "error", "message": "JSONとして読めません"})
+                    continue
+
+                if message.get("type") == "join" and connection.player is None:
+                    self._join(connection, message)
+                elif message.get("type") == "action":
+                    connection.actions.put_nowait(message)
+                else:
+                    connection.send({"type": "error", "message": "不明なメッセージです"})
+        finally:
+            connection.close()
+
+    def _join(self, connection: ClientConnection, message: Dict):
+        table = self.get_table(int(message.get("table", 0)))
+        player = RemotePlayer(str(message.get("name") or "player"), connection, self.chips)
+        player.timeout = self.action_timeout
+        if not table.add_player(player):
+            connection.send({"type": "error", "message": "テーブルが満席です"})
+            return
+        connection.table = table
+        connection.player = player
+        connection.send({"type": "joined", "table": table.table_id, "chips": player.chips})
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        """TCP で接続を受け付ける"""
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数テーブルのポーカーサーバーを起動します")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="待ち受けるポート")
+    parser.add_argument("--tables", type=int, default=10, help="あらかじめ用意するテーブル数")
+    parser.add_argument("--seats", type=int, default=6, help="1テーブルの席数")
+    parser.add_argument("--ai-per-table", type=int, default=1, help="各テーブルに座らせるAIの人数")
+    parser.add_argument("--timeout", type=float, default=ACTION_TIMEOUT, help="1アクションの制限時間（秒）")
+    args = parser.parse_args()
+
+    async def run():
+        server = GameServer(seats=args.seats, action_timeout=args.timeout)
+        for table_id in range(args.tables):
+            server.add_ai_players(table_id, args.ai_per_table)
+        print(f"{args.host}:{args.port} で待ち受けています（テーブル数: {args.tables}）")
+        await server.serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nサーバーを停止しました")
+
+
+if __name__ == "__main__":
+    main()
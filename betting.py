@@ -0,0 +1,166 @@
+"""
+ベッティングラウンドの状態機械
+
+1回のベッティングラウンド（プリフロップ、フロップ、ターン、リバーのいずれか）の状態を、
+「まだ行動が必要な人数」「現在のベット額」「フォールドしていない人数」
+「行動できる（フォールドもオールインもしていない）人数」のカウンタで持つ。
+行動できるプレイヤーは双方向の循環リストでつなぎ、フォールドやオールインで外す。
+1アクションの処理も次のプレイヤーの決定も、人数によらず O(1) で済む。
+
+TexasHoldem がラウンドの進行に使い、AI やサーバーは legal_actions と min_raise で
+選べるアクションとレイズ額の下限を参照する。
+"""
+from typing import List, Optional, Sequence
+
+from player import Player
+
+
+class BettingRound:
+    """1回のベッティングラウンドの状態"""
+
+    def __init__(self, players: Sequence[Player], first_to_act: int,
+                 current_bet: int, big_blind: int):
+        """
+        Args:
+            players: 席順のプレイヤー
+            first_to_act: 最初に行動する席（行動できなければ時計回りに次の席）
+            current_bet: ラウンド開始時のベット額（プリフロップならビッグブラインド）
+            big_blind: 最小レイズ額の初期値
+        """
+        self.players = list(players)
+        self.current_bet = current_bet
+        # 最小レイズ額は直前のレイズの上げ幅（ビッグブラインド以上）
+        self.min_raise = big_blind
+        self.live = sum(1 for p in self.players if not p.folded)
+        self._seat = {p: i for i, p in enumerate(self.players)}
+        # 席ごとに、最後に行動したときのベット額（まだ行動していなければ -1）。
+        # そこから最小レイズ額以上に上がっていなければ、レイズはできない
+        self.acted_at = [-1] * len(self.players)
+
+        # 行動できるプレイヤーの循環リスト
+        seats = [i for i, p in enumerate(self.players) if p.can_act()]
+        self.active = len(seats)
+        n = len(self.players)
+        self._next = [0] * n
+        self._prev = [0] * n
+        for i, seat in enumerate(seats):
+            self._next[seat] = seats[(i + 1) % len(seats)]
+            self._prev[seat] = seats[i - 1]
+
+        if self.active > 1:
+            self.to_act = self.active
+        else:
+            # 行動できるのが1人だけなら、コールが必要なときだけ行動する
+            self.to_act = sum(1 for seat in seats
+                              if self.players[seat].current_bet < current_bet)
+
+        self._current: Optional[int] = None
+        if seats:
+            for offset in range(n):
+                seat = (first_to_act + offset) % n
+                if self.players[seat].can_act():
+                    # next_player で最初に返すのがこの席になるように、1つ前の席を指しておく
+                    self._current = self._prev[seat]
+                    break
+
+    @property
+    def finished(self) -> bool:
+        """全員の行動が終わった、または1人を除いて全員フォールドした"""
+        return self.to_act <= 0 or self.live <= 1
+
+    @property
+    def can_continue(self) -> bool:
+        """次のストリートでもベッティングができる（2人以上が行動できる）"""
+        return self.live > 1 and self.active > 1
+
+    def next_player(self) -> Player:
+        """次に行動するプレイヤー"""
+        if self.finished:
+            raise ValueError("ベッティングラウンドは終了しています")
+        self._current = self._next[self._current]
+        return self.players[self._current]
+
+    def to_call(self, player: Player) -> int:
+        """コールに必要な額"""
+        return self.current_bet - player.current_bet
+
+    def min_raise_amount(self, player: Player) -> int:
+        """レイズ額（コール額への上乗せ分）の下限。チップが足りなければオールインの額"""
+        return min(self.min_raise, player.chips - self.to_call(player))
+
+    def legal_actions(self, player: Player) -> List[str]:
+        """選べるアクション（'fold', 'check' / 'call', 'raise'）"""
+        to_call = self.to_call(player)
+        actions = ['fold', 'check' if to_call <= 0 else 'call']
+        if self.raise_open(player) and player.chips > to_call:
+            actions.append('raise')
+        return actions
+
+    def raise_open(self, player: Player) -> bool:
+        """
+        レイズが許されている（チップの額は見ない）
+
+        他に行動できる人がいて、まだ行動していないか、前に行動してから
+        最小レイズ額以上のレイズがあったときだけレイズできる。最小レイズ額に満たない
+        オールインを受けただけなら、行動済みのプレイヤーはコールかフォールドしかできない。
+        """
+        others = self.active - (1 if player.can_act() else 0)
+        if others <= 0:
+            return False
+        acted_at = self.acted_at[self._seat[player]]
+        return acted_at < 0 or self.current_bet - acted_at >= self.min_raise
+
+    def apply(self, player: Player, action: str, amount: int) -> int:
+        """
+        アクションを反映して、ポットに入った額を返す
+
+        'raise' の amount はコール額に上乗せする額で、min_raise_amount 以上でなければならない
+        （チップが足りなければ下限未満のオールインもできる）。チップを超える額はオールインになる。
+        legal_actions に無いアクションと下限未満のレイズは ValueError にする
+        （どのフロントエンドから来たアクションも同じ規則で検証する）。
+
+        最小レイズ額以上の上げ幅のレイズだけがレイズを再開させる。最小レイズ額に満たない
+        オールインでも、行動済みのプレイヤーは差額をコールするかフォールドするために
+        もう一度行動するが、レイズはできない。
+        """
+        seat = self._seat[player]
+        to_call = self.to_call(player)
+
+        legal = self.legal_actions(player)
+        if action not in legal:
+            raise ValueError(f"{player.name}は{action}できません（選べるアクション: {', '.join(legal)}）")
+        if action == 'raise' and amount < self.min_raise_amount(player):
+            raise ValueError(f"{player.name}のレイズ額{amount}は最小レイズ額"
+                             f"{self.min_raise_amount(player)}未満です")
+
+        if action == 'fold':
+            player.fold()
+            self.live -= 1
+            self._remove(seat)
+            self.to_act -= 1
+            return 0
+
+        if action == 'raise':
+            paid = player.bet(to_call + amount)
+        else:
+            paid = player.bet(to_call)
+        if player.all_in:
+            self._remove(seat)
+
+        if player.current_bet > self.current_bet:
+            # レイズ: レイズした人以外の行動できる全員がもう一度行動する
+            # （最小レイズ額に満たないオールインなら、行動済みの人はコールかフォールドだけ）
+            self.min_raise = max(self.min_raise, player.current_bet - self.current_bet)
+            self.current_bet = player.current_bet
+            self.to_act = self.active - (0 if player.all_in else 1)
+        else:
+            self.to_act -= 1
+        self.acted_at[seat] = self.current_bet
+        return paid
+
+    def _remove(self, seat: int):
+        """行動できるプレイヤーの循環リストから外す（_next は次の席を探すために残す）"""
+        next_seat, prev_seat = self._next[seat], self._prev[seat]
+        self._next[prev_seat] = next_seat
+        self._prev[next_seat] = prev_seat
+        self.active -= 1
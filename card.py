@@ -1,9 +1,14 @@
 """
 カードとデッキを管理するモジュール
+
+カードは 0〜51 の整数（カード番号）と相互に変換できる。
+カード番号は (ランク - 2) * 4 + スート番号 で、52枚の Card オブジェクトは
+モジュール読み込み時に1度だけ生成して使い回す。
 """
 import random
+from array import array
 from enum import Enum
-from typing import List
+from typing import Iterable, List, Optional
 
 
 class Suit(Enum):
@@ -31,59 +36,208 @@ class Rank(Enum):
     ACE = (14, "A")
 
     def __init__(self, value: int, display: str):
-        self.value = value
+        self._value_ = value
         self.display = display
 
 
+SUITS: List[Suit] = list(Suit)
+RANKS: List[Rank] = list(Rank)
+_SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
+
+
+def card_index(suit: Suit, rank: Rank) -> int:
+    """スートとランクからカード番号（0〜51）を求める"""
+    return (rank.value - 2) * 4 + _SUIT_INDEX[suit]
+
+
 class Card:
-    """トランプのカード"""
+    """
+    トランプのカード
+
+    同じスートとランクの Card は常に同一のオブジェクトになる。
+    rank_value / suit_index / id / bit は Enum を介さずに参照できる整数。
+    """
+
+    __slots__ = ("suit", "rank", "id", "bit", "rank_value", "suit_index", "_text")
+
+    def __new__(cls, suit: Suit, rank: Rank) -> "Card":
+        return CARDS[card_index(suit, rank)]
+
+    @staticmethod
+    def from_int(card_id: int) -> "Card":
+        """カード番号から Card を取得"""
+        return CARDS[card_id]
 
-    def __init__(self, suit: Suit, rank: Rank):
-        self.suit = suit
-        self.rank = rank
+    def __int__(self) -> int:
+        return self.id
+
+    def __index__(self) -> int:
+        return self.id
 
     def __str__(self) -> str:
-        return f"{self.suit.value}{self.rank.display}"
+        return self._text
 
     def __repr__(self) -> str:
-        return self.__str__()
-
-    def __eq__(self, other) -> bool:
-        if not isinstance(other, Card):
-            return False
-        return self.suit == other.suit and self.rank == other.rank
+        return self._text
 
     def __lt__(self, other) -> bool:
-        return self.rank.value < other.rank.value
+        return self.rank_value < other.rank_value
 
-    def __hash__(self) -> int:
-        return hash((self.suit, self.rank))
+    def __reduce__(self):
+        # 別プロセスに渡しても同一オブジェクトに戻るようにする
+        return (Card.from_int, (self.id,))
 
 
-class Deck:
-    """トランプのデッキ"""
+def _create_card(card_id: int) -> Card:
+    card = object.__new__(Card)
+    card.suit = SUITS[card_id & 3]
+    card.rank = RANKS[card_id >> 2]
+    card.id = card_id
+    card.bit = 1 << card_id
+    card.rank_value = (card_id >> 2) + 2
+    card.suit_index = card_id & 3
+    card._text = f"{card.suit.value}{card.rank.display}"
+    return card
+
+
+CARDS: List[Card] = [_create_card(card_id) for card_id in range(52)]
+
+
+def cards_to_mask(cards: Iterable[Card]) -> int:
+    """カードの集合を52ビットのマスクに変換"""
+    mask = 0
+    for card in cards:
+        mask |= card.bit
+    return mask
+
 
-    def __init__(self):
-        self.cards: List[Card] = []
-        self.reset()
+def mask_to_cards(mask: int) -> List[Card]:
+    """52ビットのマスクをカードのリストに変換"""
+    return [card for card in CARDS if mask & card.bit]
+
+
+_RANK_CODES = "23456789TJQKA"
+_SUIT_CODES = "hdcs"  # SUITS と同じ順（♥ ♦ ♣ ♠）
+
+
+def card_code(card: Card) -> str:
+    """カードを "Ah" や "Td" のような2文字の表記に変換"""
+    return _RANK_CODES[card.rank_value - 2] + _SUIT_CODES[card.suit_index]
+
+
+def parse_card(text: str) -> Card:
+    """
+    "Ah"、"Td"、"10s"、"♠A" のような表記からカードを取得
+
+    ランクは 2〜9, T(10), J, Q, K, A、スートは h/d/c/s または ♥♦♣♠。
+    """
+    code = text.strip()
+    for i, suit in enumerate(SUITS):
+        # "♠A" のように str(card) と同じ形式
+        if code.startswith(suit.value):
+            code = code[1:] + _SUIT_CODES[i]
+    rank_text, suit_text = code[:-1].upper(), code[-1:].lower()
+    if rank_text == "10":
+        rank_text = "T"
+    if len(rank_text) != 1 or rank_text not in _RANK_CODES or suit_text not in _SUIT_CODES:
+        raise ValueError(f"カードの表記が正しくありません: {text}")
+    return CARDS[_RANK_CODES.index(rank_text) * 4 + _SUIT_CODES.index(suit_text)]
+
+
+_FULL_DECK = array("B", range(52))
+
+
+class Deck:
+    """
+    トランプのデッキ
+
+    カード番号の配列で管理し、先頭から _top 枚が山札に残っているカード。
+    リセットは配列の書き戻しだけで、Card オブジェクトは生成しない。
+
+    シャッフルは遅延評価で、引くたびにフィッシャー–イェーツ法の1ステップだけを行う。
+    4人のハンドなら52枚中13枚分しか乱数を使わない。
+    """
+
+    def __init__(self, rng=None, seed: Optional[int] = None,
+                 card_ids: Optional[Iterable[int]] = None):
+        """
+        Args:
+            rng: このデッキ専用の乱数生成器（random.Random または numpy.random.Generator）
+            seed: rng を省略したときに作る random.Random のシード
+            card_ids: デッキに入れるカード番号（省略すると52枚。ショートデッキなら6〜Aの36枚）
+        """
+        self._full = _FULL_DECK if card_ids is None else array("B", card_ids)
+        self._order = array("B", self._full)
+        self._top = len(self._full)
+        self._shuffled = False
+        self.set_rng(rng if rng is not None else random.Random(seed))
+
+    def set_rng(self, rng):
+        """乱数生成器を差し替える"""
+        self.rng = rng
+        if hasattr(rng, "integers"):
+            # numpy.random.Generator
+            self._randbelow = lambda n: int(rng.integers(n))
+        else:
+            self._randbelow = rng.randrange
+
+    def seed(self, seed: Optional[int]):
+        """乱数生成器のシードを設定し直す"""
+        self.set_rng(random.Random(seed))
+
+    @property
+    def cards(self) -> List[Card]:
+        """山札に残っているカード（シャッフル後は引くまで順序は決まらない）"""
+        return [CARDS[card_id] for card_id in self._order[:self._top]]
 
     def reset(self):
-        """デッキをリセットして52枚のカードを生成"""
-        self.cards = [
-            Card(suit, rank)
-            for suit in Suit
-            for rank in Rank
-        ]
+        """デッキをリセットしてすべてのカードに戻す"""
+        self._order[:] = self._full
+        self._top = len(self._full)
+        self._shuffled = False
 
     def shuffle(self):
-        """デッキをシャッフル"""
-        random.shuffle(self.cards)
+        """デッキをシャッフル（実際の並べ替えは draw のたびに行う）"""
+        self._shuffled = True
+
+    def draw_id(self) -> int:
+        """カードを1枚引いてカード番号で返す"""
+        top = self._top
+        if not top:
+            raise ValueError("デッキにカードがありません")
+        top -= 1
+        self._top = top
+        order = self._order
+        if self._shuffled:
+            # 残りのカードから1枚選んで末尾と入れ替える
+            j = self._randbelow(top + 1)
+            order[j], order[top] = order[top], order[j]
+        return order[top]
 
     def draw(self) -> Card:
         """カードを1枚引く"""
-        if not self.cards:
+        return CARDS[self.draw_id()]
+
+    def deal_hands(self, n_hands: int, cards_per_hand: int = 2, out=None):
+        """
+        n_hands 人分のカードをまとめて配る
+
+        Args:
+            out: 書き込み先（長さ n_hands * cards_per_hand 以上の array など）。
+                 省略すると array('B') を作る。i 人目の j 枚目は out[i * cards_per_hand + j]
+
+        Returns:
+            カード番号を書き込んだ out
+        """
+        total = n_hands * cards_per_hand
+        if total > self._top:
             raise ValueError("デッキにカードがありません")
-        return self.cards.pop()
+        if out is None:
+            out = array("B", bytes(total))
+        draw_id = self.draw_id
+        for i in range(total):
+            out[i] = draw_id()
+        return out
 
     def __len__(self) -> int:
-        return len(self.cards)
+        return self._top
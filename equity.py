@@ -0,0 +1,562 @@
+"""
+勝率（エクイティ）を計算するモジュール
+
+各プレイヤーのホールカード、途中までのボード、デッドカードから、
+残りのカードをランダムに配って HandEvaluator で評価し、
+勝ち・引き分け・負けの割合を推定する（モンテカルロ法）。
+"""
+import os
+import random
+import time
+from collections import OrderedDict, deque
+from itertools import combinations
+from math import comb
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Sequence
+
+import preflop
+from card import Card
+from hand_evaluator import CARD_KEYS, HandEvaluator, hand_key, strength_from_ids, strength_from_key
+
+try:
+    import numpy as np
+except ImportError:  # NumPy が無ければ1試行ずつ評価する
+    np = None
+
+
+MIN_PLAYERS = 2
+MAX_PLAYERS = 10
+BATCH_TRIALS = 10_000  # 1回のワーカー呼び出しで実行する試行数
+EXACT_ENUMERATION_LIMIT = 5_000  # これ以下のランアウト数なら全通りを列挙する
+
+
+class PlayerEquity:
+    """1人分のエクイティの集計結果"""
+
+    def __init__(self, wins: int, ties: int, losses: int, trials: int,
+                 equity_sum: float, equity_sq_sum: float):
+        self.wins = wins
+        self.ties = ties  # 引き分けた試行数
+        self.losses = losses
+        self.trials = trials
+        self._equity_sum = equity_sum
+        self._equity_sq_sum = equity_sq_sum
+
+    @property
+    def win(self) -> float:
+        """勝率"""
+        return self.wins / self.trials if self.trials else 0.0
+
+    @property
+    def tie(self) -> float:
+        """引き分け率"""
+        return self.ties / self.trials if self.trials else 0.0
+
+    @property
+    def lose(self) -> float:
+        """負け率"""
+        return self.losses / self.trials if self.trials else 0.0
+
+    @property
+    def equity(self) -> float:
+        """ポットの取り分の期待値（引き分けは人数で割る）"""
+        return self._equity_sum / self.trials if self.trials else 0.0
+
+    @property
+    def stderr(self) -> float:
+        """エクイティの標準誤差"""
+        if self.trials < 2:
+            return 1.0
+        mean = self.equity
+        variance = max(self._equity_sq_sum / self.trials - mean * mean, 0.0)
+        return (variance / (self.trials - 1)) ** 0.5
+
+    def __str__(self) -> str:
+        return (f"勝ち {self.win:.1%} / 引き分け {self.tie:.1%} / "
+                f"負け {self.lose:.1%} (エクイティ {self.equity:.1%})")
+
+
+class EquityResult:
+    """エクイティ計算の結果"""
+
+    def __init__(self, players: List[PlayerEquity], trials: int, seed: Optional[int],
+                 elapsed: float, exact: bool = False, approximate: bool = False):
+        self.players = players
+        self.trials = trials
+        self.seed = seed  # 同じ結果を再現するためのシード
+        self.elapsed = elapsed
+        self.exact = exact  # 全通り列挙による厳密な値ならTrue
+        # プリフロップ表のクラス同士の平均値ならTrue（スートとカードの重なりを無視した近似。
+        # 回数は表の割合から逆算した値）
+        self.approximate = approximate
+
+    def __getitem__(self, index: int) -> PlayerEquity:
+        return self.players[index]
+
+    def __len__(self) -> int:
+        return len(self.players)
+
+
+def _new_totals(num_players: int) -> Dict[str, list]:
+    return {
+        "wins": [0] * num_players,
+        "ties": [0] * num_players,
+        "losses": [0] * num_players,
+        "equity": [0.0] * num_players,
+        "equity_sq": [0.0] * num_players,
+        "trials": 0,
+    }
+
+
+def _merge_totals(totals: Dict[str, list], batch: Dict[str, list]):
+    for name in ("wins", "ties", "losses", "equity", "equity_sq"):
+        totals[name] = [a + b for a, b in zip(totals[name], batch[name])]
+    totals["trials"] += batch["trials"]
+
+
+def _add_showdown(totals: Dict[str, list], strengths: List[int]):
+    """1回分のショーダウン結果を集計に加える"""
+    best = max(strengths)
+    winners = [i for i, s in enumerate(strengths) if s == best]
+    share = 1.0 / len(winners)
+    for i in range(len(strengths)):
+        if strengths[i] != best:
+            totals["losses"][i] += 1
+            continue
+        if len(winners) == 1:
+            totals["wins"][i] += 1
+        else:
+            totals["ties"][i] += 1
+        totals["equity"][i] += share
+        totals["equity_sq"][i] += share * share
+    totals["trials"] += 1
+
+
+def _run_trials_python(hole_ids: List[List[int]], board_ids: List[int],
+                       deck_ids: List[int], trials: int, seed: int) -> Dict[str, list]:
+    """1試行ずつカードを配って評価する"""
+    rng = random.Random(seed)
+    need = 5 - len(board_ids)
+    totals = _new_totals(len(hole_ids))
+    for _ in range(trials):
+        board = board_ids + rng.sample(deck_ids, need)
+        _add_showdown(totals, [strength_from_ids(hole + board) for hole in hole_ids])
+    return totals
+
+
+def _run_trials_numpy(hole_ids: List[List[int]], board_ids: List[int],
+                      deck_ids: List[int], trials: int, seed: int) -> Dict[str, list]:
+    """全試行のボードをまとめて配り、HandEvaluator.evaluate_batch で評価する"""
+    rng = np.random.default_rng(seed)
+    need = 5 - len(board_ids)
+
+    # 各行の先頭 need 枚だけを部分的にフィッシャー–イェーツでシャッフル
+    decks = np.tile(np.array(deck_ids, dtype=np.int64), (trials, 1))
+    rows = np.arange(trials)
+    for j in range(need):
+        picks = rng.integers(j, len(deck_ids), size=trials)
+        chosen = decks[rows, picks]
+        decks[rows, picks] = decks[:, j]
+        decks[:, j] = chosen
+
+    boards = np.concatenate(
+        [np.tile(np.array(board_ids, dtype=np.int64), (trials, 1)), decks[:, :need]], axis=1)
+    strengths = np.stack([
+        HandEvaluator.evaluate_batch(
+            np.concatenate([np.tile(np.array(hole, dtype=np.int64), (trials, 1)), boards], axis=1),
+            validate=False)  # 山札から配ったので重複は無い
+        for hole in hole_ids
+    ])
+
+    best = strengths.max(axis=0)
+    is_best = strengths == best
+    num_best = is_best.sum(axis=0)
+    shares = np.where(is_best, 1.0 / num_best, 0.0)
+    return {
+        "wins": (is_best & (num_best == 1)).sum(axis=1).tolist(),
+        "ties": (is_best & (num_best > 1)).sum(axis=1).tolist(),
+        "losses": (~is_best).sum(axis=1).tolist(),
+        "equity": shares.sum(axis=1).tolist(),
+        "equity_sq": (shares * shares).sum(axis=1).tolist(),
+        "trials": trials,
+    }
+
+
+def _run_trials(hole_ids: List[List[int]], board_ids: List[int], deck_ids: List[int],
+                trials: int, seed: int) -> Dict[str, list]:
+    """ワーカープロセスで実行される試行のまとまり"""
+    if np is not None:
+        return _run_trials_numpy(hole_ids, board_ids, deck_ids, trials, seed)
+    return _run_trials_python(hole_ids, board_ids, deck_ids, trials, seed)
+
+
+def _batch_seed(seed: int, batch_index: int) -> int:
+    """マスターシードとバッチ番号から、バッチごとの独立したシードを作る"""
+    return (seed << 20) | batch_index
+
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """ワーカー数ごとにプロセスプールを使い回す（起動コストを毎回払わない）"""
+    executor = _executors.get(workers)
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        _executors[workers] = executor
+    return executor
+
+
+def shutdown_workers():
+    """使い回しているプロセスプールを終了"""
+    for executor in _executors.values():
+        executor.shutdown(cancel_futures=True)
+    _executors.clear()
+
+
+def _validate(hole_cards: Sequence[Sequence[Card]], board: Sequence[Card],
+              dead_cards: Sequence[Card]):
+    if not MIN_PLAYERS <= len(hole_cards) <= MAX_PLAYERS:
+        raise ValueError(f"プレイヤーは{MIN_PLAYERS}〜{MAX_PLAYERS}人である必要があります")
+    if any(len(hand) != 2 for hand in hole_cards):
+        raise ValueError("ホールカードは2枚ずつ必要です")
+    if len(board) > 5:
+        raise ValueError("ボードは5枚までです")
+
+    known = [card.id for hand in hole_cards for card in hand]
+    known += [card.id for card in board] + [card.id for card in dead_cards]
+    if len(set(known)) != len(known):
+        raise ValueError("同じカードが重複しています")
+
+
+def _to_ids(hole_cards: Sequence[Sequence[Card]], board: Sequence[Card],
+            dead_cards: Sequence[Card]):
+    hole_ids = [[card.id for card in hand] for hand in hole_cards]
+    board_ids = [card.id for card in board]
+    used = {card_id for hand in hole_ids for card_id in hand}
+    used.update(board_ids)
+    used.update(card.id for card in dead_cards)
+    deck_ids = [card_id for card_id in range(52) if card_id not in used]
+    return hole_ids, board_ids, deck_ids
+
+
+def _build_result(totals: Dict[str, list], seed: Optional[int], started: float,
+                  exact: bool = False) -> EquityResult:
+    players = [
+        PlayerEquity(totals["wins"][i], totals["ties"][i], totals["losses"][i],
+                     totals["trials"], totals["equity"][i], totals["equity_sq"][i])
+        for i in range(len(totals["wins"]))
+    ]
+    return EquityResult(players, totals["trials"], seed, time.perf_counter() - started, exact)
+
+
+def _converged(totals: Dict[str, list], target_stderr: float) -> bool:
+    """全員のエクイティの標準誤差が目標以下になったか"""
+    trials = totals["trials"]
+    if trials < 2:
+        return False
+    for equity_sum, equity_sq in zip(totals["equity"], totals["equity_sq"]):
+        mean = equity_sum / trials
+        variance = max(equity_sq / trials - mean * mean, 0.0)
+        if (variance / (trials - 1)) ** 0.5 > target_stderr:
+            return False
+    return True
+
+
+def monte_carlo_equity(hole_cards: Sequence[Sequence[Card]],
+                       board: Sequence[Card] = (),
+                       dead_cards: Sequence[Card] = (),
+                       trials: int = 100_000,
+                       seed: Optional[int] = None,
+                       workers: Optional[int] = None,
+                       target_stderr: Optional[float] = None,
+                       time_budget: Optional[float] = None) -> EquityResult:
+    """
+    モンテカルロ法でエクイティを推定
+
+    Args:
+        hole_cards: 各プレイヤーのホールカード（2〜10人、2枚ずつ）
+        board: 公開済みのコミュニティカード（0〜5枚）
+        dead_cards: 山札に無いことが分かっているカード
+        trials: 試行回数の上限（1以上）
+        seed: 乱数シード。同じシードとワーカー構成なら結果が再現される
+        workers: プロセス数（None でCPU数、1 でこのプロセス内で実行）
+        target_stderr: 全員の標準誤差がこの値以下になったら打ち切る
+        time_budget: 計算に使う秒数の上限。時間切れでも最初のバッチ
+            （最大 BATCH_TRIALS 試行）は必ず終えるので、この秒数を少し超えることがある
+
+    Returns:
+        EquityResult: プレイヤー順のエクイティ
+
+    性能: NumPy ありの1コアで 100,000 試行に70〜85ms ほどかかり、目標の50msには届いていない。
+    """
+    if trials <= 0:
+        raise ValueError("試行回数は1以上である必要があります")
+    _validate(hole_cards, board, dead_cards)
+    started = time.perf_counter()
+    if seed is None:
+        seed = random.SystemRandom().randrange(1 << 32)
+
+    hole_ids, board_ids, deck_ids = _to_ids(hole_cards, board, dead_cards)
+    if len(deck_ids) < 5 - len(board_ids):
+        raise ValueError("山札のカードが足りません")
+
+    batches = [BATCH_TRIALS] * (trials // BATCH_TRIALS)
+    if trials % BATCH_TRIALS:
+        batches.append(trials % BATCH_TRIALS)
+
+    totals = _new_totals(len(hole_ids))
+    deadline = started + time_budget if time_budget is not None else None
+
+    def finished() -> bool:
+        if target_stderr is not None and _converged(totals, target_stderr):
+            return True
+        return deadline is not None and time.perf_counter() >= deadline
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(batches) <= 1:
+        for index, batch_trials in enumerate(batches):
+            _merge_totals(totals, _run_trials(
+                hole_ids, board_ids, deck_ids, batch_trials, _batch_seed(seed, index)))
+            if finished():
+                break
+        return _build_result(totals, seed, started)
+
+    # バッチは番号順に集計するので、打ち切りが無ければ結果は実行順に依存しない。
+    # 実行中のバッチは止められないので、投入するのはワーカー数ぶんだけにして、
+    # 打ち切った後も無駄に走り続けるのを各ワーカー1バッチまでに抑える
+    executor = _get_executor(workers)
+
+    def submit(index: int):
+        return executor.submit(_run_trials, hole_ids, board_ids, deck_ids, batches[index],
+                               _batch_seed(seed, index))
+
+    pending = deque(submit(index) for index in range(min(workers, len(batches))))
+    next_index = len(pending)
+    try:
+        while pending:
+            timeout = None
+            # 最初のバッチは時間切れでも待つ（試行0回の結果は返さない）
+            if deadline is not None and totals["trials"]:
+                timeout = max(deadline - time.perf_counter(), 0.0)
+            try:
+                batch = pending[0].result(timeout=timeout)
+            except FutureTimeout:
+                break
+            pending.popleft()
+            _merge_totals(totals, batch)
+            if finished():
+                break
+            if next_index < len(batches):
+                pending.append(submit(next_index))
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return _build_result(totals, seed, started)
+
+
+def exact_equity(hole_cards: Sequence[Sequence[Card]],
+                 board: Sequence[Card] = (),
+                 dead_cards: Sequence[Card] = ()) -> EquityResult:
+    """
+    残りのボードの全通り（ランアウト）を列挙して厳密なエクイティを求める
+
+    各プレイヤーのホールカード＋ボードのキーを最初に1度だけ求め、
+    ランアウトごとにはランアウトのカードのキーを足すだけで評価する。
+    """
+    _validate(hole_cards, board, dead_cards)
+    started = time.perf_counter()
+
+    hole_ids, board_ids, deck_ids = _to_ids(hole_cards, board, dead_cards)
+    known_ids = [hole + board_ids for hole in hole_ids]
+    known_keys = [hand_key(ids) for ids in known_ids]
+    players = range(len(hole_ids))
+    totals = _new_totals(len(hole_ids))
+
+    for runout in combinations(deck_ids, 5 - len(board_ids)):
+        runout_key = 0
+        for card_id in runout:
+            runout_key += CARD_KEYS[card_id]
+        _add_showdown(totals, [
+            strength_from_key(known_keys[i] + runout_key, known_ids[i], runout)
+            for i in players
+        ])
+
+    return _build_result(totals, None, started, exact=True)
+
+
+def count_runouts(board: Sequence[Card], num_unknown: int) -> int:
+    """残りのボードの組み合わせ数（num_unknown は山札に残っているカードの枚数）"""
+    return comb(num_unknown, 5 - len(board))
+
+
+def equity_vs_random(hole_cards: Sequence[Card],
+                     board: Sequence[Card] = (),
+                     num_opponents: int = 1,
+                     trials: int = 1000,
+                     seed: Optional[int] = None,
+                     time_budget: Optional[float] = None,
+                     use_preflop_table: bool = True) -> float:
+    """
+    相手のハンドが分からないときのエクイティ（num_opponents 人のランダムなハンドに対して）
+
+    プリフロップはプリフロップ表があれば表を引く。それ以外はこのプロセス内で
+    相手のハンドと残りのボードを配って評価する。自分のホールカード＋ボードのキーは
+    最初に1度だけ求め、試行ごとには配ったカードのキーを足すだけにする。
+
+    Args:
+        trials: 試行回数の上限
+        seed: 乱数シード（同じ局面に同じシードなら同じ結果になる）
+        time_budget: 計算に使う秒数の上限（AIの判断時間を一定以下に抑える）。
+            打ち切る位置で結果が変わるので、seed を指定したときは使わない
+    """
+    if len(hole_cards) != 2:
+        raise ValueError("ホールカードは2枚必要です")
+    if not 1 <= num_opponents < MAX_PLAYERS:
+        raise ValueError(f"相手の人数は1〜{MAX_PLAYERS - 1}人で指定してください")
+    if len(board) > 5:
+        raise ValueError("ボードは5枚までです")
+    if trials <= 0:
+        raise ValueError("試行回数は1以上である必要があります")
+
+    if use_preflop_table and not board:
+        table = preflop.load_table()
+        if table is not None and num_opponents <= table.max_opponents:
+            return table.vs_random(preflop.hand_class(*hole_cards), num_opponents)
+
+    hero_ids = [card.id for card in hole_cards] + [card.id for card in board]
+    if len(set(hero_ids)) != len(hero_ids):
+        raise ValueError("同じカードが重複しています")
+    hero_key = hand_key(hero_ids)
+    deck_ids = [card_id for card_id in range(52) if card_id not in hero_ids]
+    board_ids = hero_ids[2:]
+    need = 5 - len(board_ids)
+    draw = 2 * num_opponents + need
+
+    rng = random.Random(seed)
+    deadline = None
+    if time_budget is not None and seed is None:
+        deadline = time.perf_counter() + time_budget
+    equity_sum = 0.0
+    done = 0
+    while done < trials:
+        drawn = rng.sample(deck_ids, draw)
+        runout = drawn[:need]
+        runout_key = 0
+        for card_id in runout:
+            runout_key += CARD_KEYS[card_id]
+        hero = strength_from_key(hero_key + runout_key, hero_ids, runout)
+        full_board = board_ids + runout
+        ties = 1
+        for i in range(need, draw, 2):
+            villain = strength_from_ids(drawn[i:i + 2] + full_board)
+            if villain > hero:
+                break
+            ties += villain == hero
+        else:
+            equity_sum += 1.0 / ties
+        done += 1
+        # 時刻の確認は数十試行ごとで十分
+        if deadline is not None and not done & 31 and time.perf_counter() >= deadline:
+            break
+    return equity_sum / done
+
+
+class EquityCache:
+    """
+    局面ごとのエクイティを保存する容量制限付きのキャッシュ（LRU）
+
+    キーには isomorphism.canonical_key の値と相手の人数（EquityAIPlayer は試行回数とシードも）を使い、
+    スートを入れ替えただけの局面は同じエントリを参照する。
+    """
+
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._items: "OrderedDict[object, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Optional[float]:
+        equity = self._items.get(key)
+        if equity is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return equity
+
+    def put(self, key, equity: float):
+        self._items[key] = equity
+        self._items.move_to_end(key)
+        if len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """キャッシュから返せた割合"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def _preflop_table_equity(hole_cards: Sequence[Sequence[Card]]) -> Optional[EquityResult]:
+    """
+    プリフロップ表からヘッズアップのエクイティを作る（表が無ければ None）
+
+    表は169クラス同士の平均なので、実際のスートやカードの重なりは反映されない
+    （結果の approximate が True になる）。
+    """
+    table = preflop.load_table()
+    if table is None:
+        return None
+
+    started = time.perf_counter()
+    hero, villain = (preflop.hand_class(*hand) for hand in hole_cards)
+    win, tie = table.heads_up(hero, villain)
+    players = []
+    # 表の試行数を試行回数とみなして、割合を回数に戻す
+    for win_rate, tie_rate in ((win, tie), (1.0 - win - tie, tie)):
+        wins, ties = win_rate * table.trials, tie_rate * table.trials
+        players.append(PlayerEquity(wins, ties, table.trials - wins - ties, table.trials,
+                                    wins + ties / 2, wins + ties / 4))
+    return EquityResult(players, table.trials, None, time.perf_counter() - started,
+                        approximate=True)
+
+
+def calculate_equity(hole_cards: Sequence[Sequence[Card]],
+                     board: Sequence[Card] = (),
+                     dead_cards: Sequence[Card] = (),
+                     max_enumerations: int = EXACT_ENUMERATION_LIMIT,
+                     use_preflop_table: bool = False,
+                     **monte_carlo_options) -> EquityResult:
+    """
+    エクイティを求める
+
+    ランアウトの数が max_enumerations 以下（ターン、リバー、オールインの多くの場面）なら
+    全通りを列挙した厳密な値を返し、それより多ければ monte_carlo_equity に切り替える。
+    use_preflop_table が True なら、プリフロップのヘッズアップはプリフロップ表（preflop.py）が
+    あれば表を引く。表はクラス同士の平均なので、結果は approximate=True の近似値になり、
+    monte_carlo_options（trials や seed）は使われない。
+    monte_carlo_options は monte_carlo_equity にそのまま渡す。
+    """
+    _validate(hole_cards, board, dead_cards)
+    if use_preflop_table and not board and not dead_cards and len(hole_cards) == 2:
+        result = _preflop_table_equity(hole_cards)
+        if result is not None:
+            return result
+
+    num_known = 2 * len(hole_cards) + len(board) + len(dead_cards)
+    if count_runouts(board, 52 - num_known) <= max_enumerations:
+        return exact_equity(hole_cards, board, dead_cards)
+    return monte_carlo_equity(hole_cards, board, dead_cards, **monte_carlo_options)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+役判定・ショーダウン・エクイティを返すローカルHTTPサービス
+
+Web版（index.html / game.js）とPython版で同じ評価エンジン（hand_evaluator.py）を使うためのサービス。
+すべてのエンドポイントは JSON を POST で受け取り、まとめて（バッチで）処理する。
+カードは "Ah"、"Td"、"10s" のような表記で渡す。
+
+    POST /evaluate  {"hands": [["Ah", "Kh", ...], ...]}            各ハンド（5〜7枚）の役
+    POST /showdown  {"players": [["Ah", "Kd"], ...], "board": [...]} 役と勝者
+    POST /equity    {"players": [...], "board": [...], "dead": [...], "trials": 20000}
+    GET  /health
+
+同じリクエストの結果は LRU キャッシュから返し、同じリクエストが同時に届いた場合は
+1回だけ計算して結果を共有する（リクエストの集約）。
+
+実行例:
+    python3 eval_service.py --port 8766
+"""
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from card import Card, parse_card
+from equity import calculate_equity
+from hand_evaluator import HandEvaluator, decode_strength
+
+DEFAULT_PORT = 8766
+CACHE_SIZE = 4096
+MAX_EQUITY_TRIALS = 200_000
+
+
+class ServiceError(Exception):
+    """リクエストの内容が正しくない"""
+
+
+class LRUCache:
+    """スレッドセーフな容量制限付きのキャッシュ"""
+
+    def __init__(self, capacity: int = CACHE_SIZE):
+        self.capacity = capacity
+        self._items: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Dict):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+
+class _Call:
+    """計算中のリクエスト（同じリクエストのスレッドはこの結果を待つ）"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Dict] = None
+        self.error: Optional[Exception] = None
+
+
+def _parse_cards(values, name: str) -> List[Card]:
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ServiceError(f"{name} はカードのリストで指定してください")
+    try:
+        return [parse_card(value) for value in values]
+    except ValueError as e:
+        raise ServiceError(str(e))
+
+
+def _parse_hands(values, name: str) -> List[List[Card]]:
+    if not isinstance(values, list):
+        raise ServiceError(f"{name} はカードのリストのリストで指定してください")
+    return [_parse_cards(hand, name) for hand in values]
+
+
+def _parse_int(payload: Dict, name: str, default: int, minimum: Optional[int] = None) -> int:
+    value = payload.get(name, default)
+    # bool は int のサブクラスなので別に除く
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ServiceError(f"{name} は整数で指定してください")
+    if minimum is not None and value < minimum:
+        raise ServiceError(f"{name} は{minimum}以上で指定してください")
+    return value
+
+
+def _check_unique(cards: List[Card]):
+    """同じカードが2回以上使われていないか確認"""
+    seen = 0
+    for card in cards:
+        if seen & card.bit:
+            raise ServiceError(f"カードが重複しています: {card}")
+        seen |= card.bit
+
+
+def _describe(strength: int) -> Dict:
+    hand_rank, kickers = decode_strength(strength)
+    return {
+        "rank": hand_rank.name,
+        "value": hand_rank.value,
+        "display": hand_rank.display,
+        "kickers": kickers,
+        "strength": strength,
+    }
+
+
+class EvaluationService:
+    """HTTP から独立したサービス本体（キャッシュとリクエストの集約を行う）"""
+
+    def __init__(self, cache_size: int = CACHE_SIZE):
+        self.cache = LRUCache(cache_size)
+        self._in_flight: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, Callable[[Dict], Dict]] = {
+            "/evaluate": self.evaluate,
+            "/showdown": self.showdown,
+            "/equity": self.equity,
+        }
+
+    def handle(self, path: str, payload: Dict) -> Dict:
+        """エンドポイントを実行（キャッシュ済みならキャッシュから返す）"""
+        endpoint = self._endpoints.get(path)
+        if endpoint is None:
+            raise ServiceError(f"不明なエンドポイントです: {path}")
+
+        key = path + json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = endpoint(payload)
+            self.cache.put(key, call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def evaluate(self, payload: Dict) -> Dict:
+        """各ハンド（5〜7枚）の役を返す"""
+        hands = _parse_hands(payload.get("hands", []), "hands")
+        if any(not 5 <= len(hand) <= 7 for hand in hands):
+            raise ServiceError("各ハンドは5〜7枚で指定してください")
+        for hand in hands:
+            _check_unique(hand)
+        return {"results": [_describe(HandEvaluator.evaluate_strength(hand)) for hand in hands]}
+
+    def showdown(self, payload: Dict) -> Dict:
+        """各プレイヤーの役と勝者（同点なら複数）を返す"""
+        board = _parse_cards(payload.get("board", []), "board")
+        players = _parse_hands(payload.get("players", []), "players")
+        if not players:
+            raise ServiceError("players を指定してください")
+        if any(not 5 <= len(hand) + len(board) <= 7 for hand in players):
+            raise ServiceError("手札とボードを合わせて5〜7枚必要です")
+        _check_unique(board + [card for hand in players for card in hand])
+
+        strengths = [HandEvaluator.evaluate_strength(hand + board) for hand in players]
+        best = max(strengths)
+        results = []
+        for strength in strengths:
+            result = _describe(strength)
+            result["winner"] = strength == best
+            results.append(result)
+        return {
+            "players": results,
+            "winners": [i for i, strength in enumerate(strengths) if strength == best],
+        }
+
+    def equity(self, payload: Dict) -> Dict:
+        """各プレイヤーのエクイティ（同じリクエストには同じ結果を返すようにシードを固定）"""
+        board = _parse_cards(payload.get("board", []), "board")
+        dead = _parse_cards(payload.get("dead", []), "dead")
+        players = _parse_hands(payload.get("players", []), "players")
+        _check_unique(board + dead + [card for hand in players for card in hand])
+        trials = min(_parse_int(payload, "trials", 20_000, minimum=1), MAX_EQUITY_TRIALS)
+        seed = _parse_int(payload, "seed", 0)
+        try:
+            result = calculate_equity(players, board, dead, trials=trials, seed=seed, workers=1)
+        except ValueError as e:
+            raise ServiceError(str(e))
+        return {
+            "players": [
+                {"win": p.win, "tie": p.tie, "lose": p.lose, "equity": p.equity}
+                for p in result.players
+            ],
+            "trials": result.trials,
+            "exact": result.exact,
+            "approximate": result.approximate,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: EvaluationService
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        # index.html をファイルとして開いた場合でも呼べるようにする
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "POST, GET, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "見つかりません"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ServiceError("リクエストは JSON オブジェクトで送ってください")
+            self._send_json(200, self.service.handle(self.path, payload))
+        except (ServiceError, json.JSONDecodeError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            # 想定外のエラーでも応答を返し、クライアントを待たせたままにしない
+            self.log_error("%s の処理中にエラー: %r", self.path, e)
+            self._send_json(500, {"error": "サーバー内部のエラーです"})
+
+    def log_message(self, format, *args):
+        # リクエストごとのログは出さない
+        pass
+
+
+def create_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                  service: Optional[EvaluationService] = None) -> ThreadingHTTPServer:
+    """サービスの HTTP サーバーを作成（serve_forever で開始）"""
+    handler = type("Handler", (_Handler,), {"service": service or EvaluationService()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="役判定・エクイティのHTTPサービスを起動します")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="待ち受けるポート")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="キャッシュする応答の数")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, EvaluationService(args.cache_size))
+    print(f"http://{args.host}:{args.port} で待ち受けています")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nサービスを停止しました")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""
+ゲームの進行を通知するイベントと、イベントの配信（イベントバス）
+
+TexasHoldem は表示の代わりにイベント（HandStarted, BlindPosted, ActionTaken ...）を
+EventBus に送り、購読者（サブスクライバー）が表示・記録・集計を行う。
+
+    ConsoleRenderer    これまでの print と同じ内容をコンソールに表示
+    BufferedFileLogger イベントを JSON Lines でファイルにまとめて書き出す
+    EventCollector     イベントをメモリ上のリストに溜める（テストや集計用）
+
+購読者がいなければ bus.active が False になり、ゲーム側はイベントを作らずに進む。
+ヘッドレスのシミュレーションはイベントの分のコストを払わない。
+
+    if self.events.active:
+        self.events.emit(ActionTaken(player, action, amount))
+"""
+import json
+from typing import Callable, Dict, IO, Iterable, List, Optional, Tuple, Type
+
+
+class Event:
+    """イベントの基底クラス（属性は __slots__ に並べる）"""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        """JSON に変換できる辞書（プレイヤーは名前、カードは文字列にする）"""
+        data = {"type": type(self).__name__}
+        for name in self.__slots__:
+            data[name] = _plain(getattr(self, name))
+        return data
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _plain(value):
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {str(_plain(k)): _plain(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    name = getattr(value, "name", None)
+    if isinstance(name, str):  # Player
+        return name
+    return str(value)  # Card など
+
+
+class HandStarted(Event):
+    """ハンドの開始"""
+    __slots__ = ("dealer", "players")
+
+    def __init__(self, dealer, players: List):
+        self.dealer = dealer
+        self.players = players
+
+
+class StreetStarted(Event):
+    """ストリートの開始（'preflop', 'flop', 'turn', 'river'）"""
+    __slots__ = ("street",)
+
+    def __init__(self, street: str):
+        self.street = street
+
+
+class BlindPosted(Event):
+    """ブラインドの徴収（kind は 'small'、'big'、またはアンティの 'ante'）"""
+    __slots__ = ("player", "kind", "amount")
+
+    def __init__(self, player, kind: str, amount: int):
+        self.player = player
+        self.kind = kind
+        self.amount = amount
+
+
+class HoleCardsDealt(Event):
+    """ホールカードの配布"""
+    __slots__ = ("player", "cards")
+
+    def __init__(self, player, cards: List):
+        self.player = player
+        self.cards = cards
+
+
+class CardsDealt(Event):
+    """コミュニティカードの公開（cards は新しいカード、board は公開済みの全カード）"""
+    __slots__ = ("cards", "board")
+
+    def __init__(self, cards: List, board: List):
+        self.cards = cards
+        self.board = board
+
+
+class TurnStarted(Event):
+    """プレイヤーの手番"""
+    __slots__ = ("player",)
+
+    def __init__(self, player):
+        self.player = player
+
+
+class ActionTaken(Event):
+    """アクション（amount はポットに入れた額）"""
+    __slots__ = ("player", "action", "amount")
+
+    def __init__(self, player, action: str, amount: int):
+        self.player = player
+        self.action = action
+        self.amount = amount
+
+
+class AllInEquity(Event):
+    """
+    オールイン時点のポットごとのエクイティ
+
+    pots は [(ポットの額, [(プレイヤー, エクイティ)])] で、最初がメインポット。
+    各ポットのエクイティは、そのポットを獲得できるプレイヤーの間での取り分。
+    """
+    __slots__ = ("players", "pots")
+
+    def __init__(self, players: List, pots: List[Tuple]):
+        self.players = players  # フォールドしていないプレイヤー（席順）
+        self.pots = pots
+
+    def expected_chips(self) -> Dict:
+        """プレイヤーごとの獲得チップの期待値（各ポットの額 × エクイティの合計）"""
+        expected = {player: 0.0 for player in self.players}
+        for amount, equities in self.pots:
+            for player, equity in equities:
+                expected[player] += equity * amount
+        return expected
+
+
+class ShowdownStarted(Event):
+    """ショーダウンの開始"""
+    __slots__ = ()
+
+
+class HandShown(Event):
+    """ショーダウンで公開されたハンドと役"""
+    __slots__ = ("player", "cards", "hand_rank")
+
+    def __init__(self, player, cards: List, hand_rank):
+        self.player = player
+        self.cards = cards
+        self.hand_rank = hand_rank
+
+
+class PotAwarded(Event):
+    """チップの獲得（hand_rank はフォールドによる獲得なら None）"""
+    __slots__ = ("player", "amount", "hand_rank")
+
+    def __init__(self, player, amount: int, hand_rank=None):
+        self.player = player
+        self.amount = amount
+        self.hand_rank = hand_rank
+
+
+class HandFinished(Event):
+    """ハンドの終了"""
+    __slots__ = ("winners", "chips")
+
+    def __init__(self, winners: List, chips: Dict):
+        self.winners = winners
+        self.chips = chips
+
+
+class PlayerEliminated(Event):
+    """チップが無くなったプレイヤーの脱落"""
+    __slots__ = ("player",)
+
+    def __init__(self, player):
+        self.player = player
+
+
+class ChipCounts(Event):
+    """全プレイヤーのチップ数（chips はプレイヤー → チップ数）"""
+    __slots__ = ("chips",)
+
+    def __init__(self, chips: Dict):
+        self.chips = chips
+
+
+Handler = Callable[[Event], None]
+
+
+class EventBus:
+    """イベントを購読者に配信する"""
+
+    def __init__(self):
+        self._handlers: Dict[Optional[Type[Event]], List[Handler]] = {}
+        self.active = False  # 購読者がいるか（いなければイベントを作らなくてよい）
+
+    def subscribe(self, handler: Handler, event_types: Iterable[Type[Event]] = None) -> Handler:
+        """
+        購読者を登録
+
+        Args:
+            handler: イベントを受け取る関数（close メソッドがあれば close() で呼ぶ）
+            event_types: 受け取るイベントの種類（省略すると全て）
+        """
+        for event_type in (event_types or [None]):
+            self._handlers.setdefault(event_type, []).append(handler)
+        self.active = True
+        return handler
+
+    def unsubscribe(self, handler: Handler):
+        """購読者の登録を解除"""
+        for handlers in self._handlers.values():
+            while handler in handlers:
+                handlers.remove(handler)
+        self._handlers = {t: h for t, h in self._handlers.items() if h}
+        self.active = bool(self._handlers)
+
+    def wants(self, event_type: Type[Event]) -> bool:
+        """
+        この種類を指定した購読者がいるか
+
+        作るのにコストがかかるイベント（AllInEquity など）は、種類を指定して
+        購読されているときだけ作る。全てのイベントの購読者だけでは作らない。
+        """
+        return event_type in self._handlers
+
+    def emit(self, event: Event):
+        """イベントを配信"""
+        for handler in self._handlers.get(type(event), ()):
+            handler(event)
+        for handler in self._handlers.get(None, ()):
+            handler(event)
+
+    def close(self):
+        """close メソッドを持つ購読者を閉じる（ファイルの書き出しなど）"""
+        closed = set()
+        for handlers in self._handlers.values():
+            for handler in handlers:
+                close = getattr(handler, "close", None)
+                if close is not None and id(handler) not in closed:
+                    closed.add(id(handler))
+                    close()
+
+
+_STREET_NAMES = {"preflop": "プリフロップ", "flop": "フロップ", "turn": "ターン", "river": "リバー"}
+
+
+class ConsoleRenderer:
+    """イベントをコンソールに表示（bus.subscribe(renderer, renderer.event_types) で登録する）"""
+
+    def __init__(self, output: Callable[[str], None] = print):
+        self.output = output
+        self._render: Dict[Type[Event], Callable] = {
+            HandStarted: self._hand_started,
+            StreetStarted: self._street_started,
+            BlindPosted: self._blind_posted,
+            CardsDealt: self._cards_dealt,
+            TurnStarted: self._turn_started,
+            ActionTaken: self._action_taken,
+            AllInEquity: self._all_in_equity,
+            ShowdownStarted: self._showdown_started,
+            HandShown: self._hand_shown,
+            PotAwarded: self._pot_awarded,
+            PlayerEliminated: self._player_eliminated,
+            ChipCounts: self._chip_counts,
+        }
+        self.event_types = tuple(self._render)
+        self._winners_shown = False
+
+    def __call__(self, event: Event):
+        render = self._render.get(type(event))
+        if render is not None:
+            render(event)
+
+    def _hand_started(self, event: HandStarted):
+        self.output("\n" + "=" * 50)
+        self.output("新しいハンドを開始します")
+        self.output("=" * 50)
+
+    def _street_started(self, event: StreetStarted):
+        self.output(f"\n--- {_STREET_NAMES[event.street]} ---")
+        self._winners_shown = False
+
+    def _blind_posted(self, event: BlindPosted):
+        if event.kind == "ante":
+            self.output(f"{event.player.name}がアンティ{event.amount}を支払い")
+            return
+        kind = "スモールブラインド" if event.kind == "small" else "ビッグブラインド"
+        self.output(f"{event.player.name}が{kind}{event.amount}をベット")
+
+    def _cards_dealt(self, event: CardsDealt):
+        self.output(f"コミュニティカード: {' '.join(str(c) for c in event.board)}")
+
+    def _turn_started(self, event: TurnStarted):
+        self.output(f"\n{event.player.name}のターン")
+
+    def _action_taken(self, event: ActionTaken):
+        name = event.player.name
+        if event.action == 'fold':
+            self.output(f"{name}はフォールドしました")
+        elif event.action == 'raise':
+            self.output(f"{name}は{event.amount}にレイズしました")
+        elif event.amount:
+            self.output(f"{name}は{event.amount}をコールしました")
+        else:
+            self.output(f"{name}はチェックしました")
+
+    def _all_in_equity(self, event: AllInEquity):
+        self.output("\nオールイン！")
+        expected = event.expected_chips()
+        for player in event.players:
+            self.output(f"  {player.name}: {' '.join(str(c) for c in player.hand)} - "
+                        f"期待値 {expected[player]:.0f}チップ")
+        for index, (amount, equities) in enumerate(event.pots):
+            name = "メインポット" if index == 0 else f"サイドポット{index}"
+            shares = " / ".join(f"{player.name} {equity:.1%}" for player, equity in equities)
+            self.output(f"  {name} {amount}チップ: {shares}")
+
+    def _showdown_started(self, event: ShowdownStarted):
+        self.output("\n" + "=" * 50)
+        self.output("ショーダウン！")
+        self.output("=" * 50)
+        self._winners_shown = False
+
+    def _hand_shown(self, event: HandShown):
+        self.output(f"{event.player.name}: {' '.join(str(c) for c in event.cards)} - "
+                    f"{event.hand_rank.display}")
+
+    def _pot_awarded(self, event: PotAwarded):
+        if event.hand_rank is None:
+            self.output(f"\n{event.player.name}が{event.amount}チップを獲得しました！")
+            return
+        if not self._winners_shown:
+            self.output("\n勝者:")
+            self._winners_shown = True
+        self.output(f"  {event.player.name} - {event.hand_rank.display} (+{event.amount}チップ)")
+
+    def _player_eliminated(self, event: PlayerEliminated):
+        self.output(f"\n{event.player.name}はチップが無くなり、ゲームから脱落しました")
+
+    def _chip_counts(self, event: ChipCounts):
+        self.output("\n現在のチップ:")
+        for player, chips in event.chips.items():
+            self.output(f"  {player.name}: {chips}")
+
+
+class BufferedFileLogger:
+    """イベントを JSON Lines で書き出す（buffer_size 件ごとにまとめて書く）"""
+
+    def __init__(self, path_or_file, buffer_size: int = 1000):
+        if isinstance(path_or_file, str):
+            self._file: IO[str] = open(path_or_file, "a", encoding="utf-8")
+            self._owns_file = True
+        else:
+            self._file = path_or_file
+            self._owns_file = False
+        self.buffer_size = buffer_size
+        self._buffer: List[str] = []
+
+    def __call__(self, event: Event):
+        self._buffer.append(json.dumps(event.to_dict(), ensure_ascii=False))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+
+
+class EventCollector:
+    """イベントをメモリ上に溜める"""
+
+    def __init__(self):
+        self.events: List[Event] = []
+
+    def __call__(self, event: Event):
+        self.events.append(event)
+
+    def of_type(self, event_type: Type[Event]) -> List[Event]:
+        """指定した種類のイベント"""
+        return [event for event in self.events if isinstance(event, event_type)]
+
+    def clear(self):
+        self.events = []
@@ -328,6 +328,44 @@ class HandEvaluator {
     }
 }
 
+// Python版の評価サービス（eval_service.py）を使う役判定
+// サービスが起動していない場合は null を返し、上の HandEvaluator で判定する
+class RemoteEvaluator {
+    static baseUrl = 'http://127.0.0.1:8766';
+    static available = true;
+
+    static cardCode(card) {
+        const rank = card.rank.display === '10' ? 'T' : card.rank.display;
+        return rank + card.suit.name[0];
+    }
+
+    // 全員の役と勝者を1回のリクエストで取得
+    static async showdown(hands, communityCards) {
+        if (!this.available) return null;
+        try {
+            const response = await fetch(`${this.baseUrl}/showdown`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    players: hands.map(hand => hand.map(c => this.cardCode(c))),
+                    board: communityCards.map(c => this.cardCode(c))
+                })
+            });
+            if (!response.ok) return null;
+            const result = await response.json();
+            return result.players.map(p => ({
+                handRank: HAND_RANKS[p.rank],
+                kickers: p.kickers,
+                strength: p.strength
+            }));
+        } catch (e) {
+            // 接続できなければ以降はローカルで判定する
+            this.available = false;
+            return null;
+        }
+    }
+}
+
 // ゲームクラス
 class TexasHoldem {
     constructor() {
@@ -565,9 +603,17 @@ class TexasHoldem {
         const activePlayers = this.players.filter(p => !p.folded);
         const playerHands = [];
 
-        for (let player of activePlayers) {
-            const allCards = [...player.hand, ...this.communityCards];
-            const [handRank, kickers] = HandEvaluator.evaluate(allCards);
+        const remote = await RemoteEvaluator.showdown(
+            activePlayers.map(p => p.hand), this.communityCards);
+        for (let i = 0; i < activePlayers.length; i++) {
+            const player = activePlayers[i];
+            let handRank, kickers;
+            if (remote) {
+                ({ handRank, kickers } = remote[i]);
+            } else {
+                const allCards = [...player.hand, ...this.communityCards];
+                [handRank, kickers] = HandEvaluator.evaluate(allCards);
+            }
             playerHands.push({ player, handRank, kickers });
             this.log(`${player.name}: ${handRank.display}`);
         }
@@ -0,0 +1,257 @@
+"""
+探索用の軽量なゲーム状態（1ハンド分）
+
+TexasHoldem は Player や Card のオブジェクトでハンドを進めるので、途中の局面を
+複製するには deepcopy が必要になる。GameState は席ごとの値を int と bool の小さなリストで、
+カードを Card.id の整数で持ち、アクションを apply で進めて undo で1手ずつ戻す。
+apply と undo は1手あたり定数個の値の保存・復元で済み（ストリートが進むときだけ
+席数分のベット額を保存する）、探索は局面を複製せずに同じ状態を進めたり戻したりできる。
+
+相手のホールカードと未公開のカードは見えないので、determinize で残りのカードから
+無作為に決め直してから探索する（見えているのは自分のホールカードとボードだけ）。
+
+ルールは TexasHoldem（BettingRound）と同じ。'raise' の amount はコール額に上乗せする額。
+"""
+import random
+from typing import List, Optional, Sequence, Tuple
+
+from hand_evaluator import strength_from_ids
+from variants import HOLDEM
+
+STREET_CARDS = (0, 3, 1, 1)  # 各ストリートの開始時に配るボードの枚数
+BOARD_STREETS = {0: 0, 3: 1, 4: 2, 5: 3}  # 公開されているボードの枚数 → ストリート
+
+
+class GameState:
+    """探索用の1ハンドの状態"""
+
+    __slots__ = ("num_seats", "big_blind", "dealer", "chips", "bets", "contributed", "folded",
+                 "all_in", "hole", "board", "deck", "deck_pos", "street", "current_bet",
+                 "min_raise", "to_act", "live", "active", "current", "terminal", "acted_at",
+                 "_history")
+
+    def __init__(self, chips: Sequence[int], big_blind: int, dealer: int):
+        n = len(chips)
+        self.num_seats = n
+        self.big_blind = big_blind
+        self.dealer = dealer
+        self.chips = list(chips)
+        self.bets = [0] * n           # このストリートのベット額
+        self.contributed = [0] * n    # このハンドでポットに入れた額
+        self.folded = [False] * n
+        self.all_in = [False] * n
+        self.hole: List[Optional[Tuple[int, int]]] = [None] * n  # 見えていなければ None
+        self.board: List[int] = []
+        self.deck: List[int] = []     # これから配るカード（determinize で決める）
+        self.deck_pos = 0
+        self.street = 0
+        self.current_bet = 0
+        self.min_raise = big_blind
+        self.to_act = 0               # このストリートでまだ行動が必要な人数
+        self.live = n                 # フォールドしていない人数
+        self.active = n               # フォールドもオールインもしていない人数
+        self.current = 0              # 次に行動する席
+        self.terminal = False
+        # 最後に行動したときのベット額（このストリートで行動していなければ -1）
+        self.acted_at = [-1] * n
+        self._history: List[tuple] = []
+
+    @classmethod
+    def from_game(cls, game, player) -> "GameState":
+        """
+        TexasHoldem の進行中のベッティングラウンドから、player の視点の状態を作る
+
+        player 以外のホールカードは None（determinize で決める）。テキサスホールデム専用。
+        """
+        if game.variant is not HOLDEM:
+            raise ValueError(f"{game.variant.display}の局面は探索できません")
+        players = game.players
+        state = cls([p.chips for p in players], game.big_blind,
+                    game.dealer_position % len(players))
+        for seat, p in enumerate(players):
+            state.bets[seat] = p.current_bet
+            state.contributed[seat] = game.ledger.contribution(p)
+            state.folded[seat] = p.folded
+            state.all_in[seat] = p.all_in
+        seat = players.index(player)
+        state.hole[seat] = (player.hand[0].id, player.hand[1].id)
+        state.board = [card.id for card in game.community_cards]
+        state.street = BOARD_STREETS[len(state.board)]
+        state.current_bet = game.current_bet
+        betting = game.betting
+        state.min_raise = betting.min_raise
+        state.to_act = betting.to_act
+        state.live = betting.live
+        state.active = betting.active
+        state.acted_at = list(betting.acted_at)
+        state.current = seat
+        return state
+
+    def copy(self) -> "GameState":
+        """状態の複製（undo の履歴は引き継がない）"""
+        state = GameState.__new__(GameState)
+        for name in ("num_seats", "big_blind", "dealer", "deck_pos", "street", "current_bet",
+                     "min_raise", "to_act", "live", "active", "current", "terminal"):
+            setattr(state, name, getattr(self, name))
+        for name in ("chips", "bets", "contributed", "folded", "all_in", "hole", "board", "deck",
+                     "acted_at"):
+            setattr(state, name, list(getattr(self, name)))
+        state._history = []
+        return state
+
+    @property
+    def pot(self) -> int:
+        return sum(self.contributed)
+
+    def determinize(self, observer: int, rng: random.Random):
+        """observer から見えないカード（相手のホールカードと未公開のカード）を無作為に決め直す"""
+        known = set(self.board)
+        known.update(self.hole[observer])
+        pool = [card_id for card_id in range(52) if card_id not in known]
+        # 使う枚数だけ引けば足りる（相手のホールカードと、残りのボード）
+        cards = rng.sample(pool, 2 * (self.num_seats - 1) + 5 - len(self.board))
+        i = 0
+        for seat in range(self.num_seats):
+            if seat != observer:
+                self.hole[seat] = (cards[i], cards[i + 1])
+                i += 2
+        self.deck = cards[i:]
+        self.deck_pos = 0
+
+    def to_call(self, seat: int) -> int:
+        """コールに必要な額"""
+        return self.current_bet - self.bets[seat]
+
+    def can_raise(self, seat: int) -> bool:
+        """
+        他に行動できる人がいて、コール額より多く出せて、レイズが再開されている
+
+        （BettingRound.raise_open と同じく、最小レイズ額に満たないオールインを受けただけなら
+        行動済みの席はレイズできない）
+        """
+        others = self.active - (0 if self.folded[seat] or self.all_in[seat] else 1)
+        if others <= 0 or self.chips[seat] <= self.to_call(seat):
+            return False
+        acted_at = self.acted_at[seat]
+        return acted_at < 0 or self.current_bet - acted_at >= self.min_raise
+
+    def apply(self, action: str, amount: int = 0):
+        """次に行動する席のアクションを反映（undo で戻せる）"""
+        seat = self.current
+        record = (seat, self.chips[seat], self.bets[seat], self.contributed[seat],
+                  self.folded[seat], self.all_in[seat], self.current_bet, self.min_raise,
+                  self.to_act, self.live, self.active, self.street, len(self.board),
+                  self.deck_pos, self.acted_at[seat])
+
+        if action == 'fold':
+            self.folded[seat] = True
+            self.live -= 1
+            self.active -= 1
+            self.to_act -= 1
+        else:
+            to_call = self.current_bet - self.bets[seat]
+            paid = to_call + amount if action == 'raise' else to_call
+            if paid >= self.chips[seat]:
+                paid = self.chips[seat]
+                self.all_in[seat] = True
+                self.active -= 1
+            self.chips[seat] -= paid
+            self.bets[seat] += paid
+            self.contributed[seat] += paid
+            if self.bets[seat] > self.current_bet:
+                self.min_raise = max(self.min_raise, self.bets[seat] - self.current_bet)
+                self.current_bet = self.bets[seat]
+                self.to_act = self.active - (0 if self.all_in[seat] else 1)
+            else:
+                self.to_act -= 1
+            self.acted_at[seat] = self.current_bet
+
+        street_bets = None
+        if self.to_act <= 0 or self.live <= 1:
+            street_bets = self._end_street()
+        else:
+            self._advance_current()
+        self._history.append(record + (street_bets,))
+
+    def undo(self):
+        """直前の apply を取り消す"""
+        record = self._history.pop()
+        if record[-1] is not None:
+            # ストリートが進んでいた: 前のストリートのベット額と行動の記録に戻してから席の値を戻す
+            bets, acted_at = record[-1]
+            self.bets = list(bets)
+            self.acted_at = list(acted_at)
+        (seat, self.chips[seat], self.bets[seat], self.contributed[seat], self.folded[seat],
+         self.all_in[seat], self.current_bet, self.min_raise, self.to_act, self.live,
+         self.active, self.street, board_size, self.deck_pos, self.acted_at[seat], _) = record
+        del self.board[board_size:]
+        self.current = seat
+        self.terminal = False
+
+    def _advance_current(self):
+        """次に行動できる席へ進む"""
+        n = self.num_seats
+        seat = self.current
+        for _ in range(n):
+            seat = (seat + 1) % n
+            if not self.folded[seat] and not self.all_in[seat]:
+                self.current = seat
+                return
+
+    def _end_street(self) -> Optional[tuple]:
+        """ストリートを終える（次のストリートに進むときは、戻すためのベット額と行動の記録を返す）"""
+        if self.live <= 1:
+            self.terminal = True
+            return None
+        if self.active <= 1 or self.street == 3:
+            # 行動できる人がいない、またはリバーが終わった: ボードを配りきってショーダウン
+            self._deal(5 - len(self.board))
+            self.terminal = True
+            return None
+
+        street_bets = (tuple(self.bets), tuple(self.acted_at))
+        self.street += 1
+        self._deal(STREET_CARDS[self.street])
+        self.bets = [0] * self.num_seats
+        self.acted_at = [-1] * self.num_seats
+        self.current_bet = 0
+        self.min_raise = self.big_blind
+        self.to_act = self.active
+        self.current = self.dealer
+        self._advance_current()
+        return street_bets
+
+    def _deal(self, count: int):
+        for _ in range(count):
+            self.board.append(self.deck[self.deck_pos])
+            self.deck_pos += 1
+
+    def payoffs(self) -> List[float]:
+        """
+        終了した局面での席ごとの損益（ポットからの獲得額 - このハンドで入れた額）
+
+        サイドポットは投入額の層ごとに分け、同じ強さの勝者で均等に分ける
+        （端数も割ったままにして、期待値として扱う）。
+        """
+        n = self.num_seats
+        contributed = self.contributed
+        winnings = [0.0] * n
+        live = [seat for seat in range(n) if not self.folded[seat]]
+        if len(live) == 1:
+            winnings[live[0]] = float(sum(contributed))
+        else:
+            board = self.board
+            strengths = {seat: strength_from_ids(self.hole[seat] + tuple(board)) for seat in live}
+            levels = sorted({contributed[seat] for seat in live})
+            previous = 0
+            for i, level in enumerate(levels):
+                # 最後の層は、フォールドしたプレイヤーが最大の投入額より多く出していた分も含む
+                top = level if i + 1 < len(levels) else max(contributed)
+                layer = sum(min(c, top) - min(c, previous) for c in contributed)
+                eligible = [seat for seat in live if contributed[seat] >= level]
+                best = max(strengths[seat] for seat in eligible)
+                winners = [seat for seat in eligible if strengths[seat] == best]
+                for seat in winners:
+                    winnings[seat] += layer / len(winners)
+                previous = top
+        return [winnings[seat] - contributed[seat] for seat in range(n)]
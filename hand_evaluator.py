@@ -1,7 +1,7 @@
 """
 ポーカーの役を判定するモジュール
 """
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from collections import Counter
 from enum import Enum
 from card import Card, Rank
@@ -21,13 +21,337 @@ class HandRank(Enum):
     ROYAL_FLUSH = (10, "ロイヤルフラッシュ")
 
     def __init__(self, value: int, display: str):
-        self.value = value
+        self._value_ = value
         self.display = display
 
     def __lt__(self, other):
         return self.value < other.value
 
 
+# ---------------------------------------------------------------------------
+# テーブル駆動の評価エンジン
+#
+# カード番号（Card.id）は (ランク - 2) * 4 + スート番号 (0〜51)。
+# 各カードにはキー値を割り当て、手札のキーはカードのキーの総和になる。
+#   - 下位39ビット: ランクごとに3ビットの枚数カウンタ（13ランク）
+#   - 39ビット目以降: スートごとに4ビットの枚数カウンタ（4スート）
+# スートのカウンタは初期値3から始めるので、5枚以上になると各ニブルの
+# 最上位ビットが立ち、1回のAND演算でフラッシュを検出できる。
+#
+# 役の強さは1つの整数で表す: 役のランク << 20 | キッカー（4ビット×5）
+# 整数同士の大小比較がそのまま役の比較になる。
+# ---------------------------------------------------------------------------
+
+_RANK_BITS = 3
+_SUIT_SHIFT = 13 * _RANK_BITS
+_RANK_KEY_MASK = (1 << _SUIT_SHIFT) - 1
+_SUIT_BIAS = sum(3 << (_SUIT_SHIFT + 4 * s) for s in range(4))
+_FLUSH_CHECK = sum(8 << (_SUIT_SHIFT + 4 * s) for s in range(4))
+_FLUSH_SUIT = {8 << (_SUIT_SHIFT + 4 * s): s for s in range(4)}
+
+CARD_KEYS: List[int] = [
+    (1 << (_RANK_BITS * (card_id >> 2))) | (1 << (_SUIT_SHIFT + 4 * (card_id & 3)))
+    for card_id in range(52)
+]
+
+_CATEGORY_SHIFT = 20
+# 役ごとのキッカーの個数（_evaluate_five_cards が返すキッカーと同じ）
+_KICKER_COUNTS = {
+    HandRank.HIGH_CARD: 5,
+    HandRank.ONE_PAIR: 4,
+    HandRank.TWO_PAIR: 3,
+    HandRank.THREE_OF_A_KIND: 3,
+    HandRank.STRAIGHT: 5,
+    HandRank.FLUSH: 5,
+    HandRank.FULL_HOUSE: 2,
+    HandRank.FOUR_OF_A_KIND: 2,
+    HandRank.STRAIGHT_FLUSH: 5,
+    HandRank.ROYAL_FLUSH: 5,
+}
+_HAND_RANKS: Dict[int, HandRank] = {rank.value: rank for rank in HandRank}
+
+
+def _pack(hand_rank: HandRank, kickers: List[int],
+          categories: Optional[Dict[HandRank, int]] = None) -> int:
+    """
+    役のランクとキッカーを1つの整数にまとめる
+
+    categories は役のランクから強さの上位ビットに入れる値への対応
+    （省略すると HandRank.value。役の順位が違うバリアントで使う）。
+    """
+    strength = hand_rank.value if categories is None else categories[hand_rank]
+    for kicker in kickers:
+        strength = (strength << 4) | kicker
+    return strength << (4 * (5 - len(kickers)))
+
+
+def _straight_high(rank_mask: int, wheel_high: int = 5) -> int:
+    """
+    ランクのビットマスク（2=bit0 〜 A=bit12）からストレートの最高ランクを返す（無ければ0）
+
+    wheel_high は A を最も弱いカードとして使うストレート（ホイール）の最高ランク。
+    通常は A-2-3-4-5 の 5、ショートデッキでは A-6-7-8-9 の 9。
+    """
+    for high in range(14, wheel_high, -1):
+        window = 0b11111 << (high - 6)
+        if rank_mask & window == window:
+            return high
+    # ホイール（A と wheel_high 以下の4枚）
+    wheel = (1 << 12) | (0b1111 << (wheel_high - 5))
+    if rank_mask & wheel == wheel:
+        return wheel_high
+    return 0
+
+
+def _straight_kickers(high: int) -> List[int]:
+    """ストレートのキッカー（ホイールでは A を最も低いランクとして扱う）"""
+    return list(range(high, high - 5, -1))
+
+
+_STRAIGHT_HIGH: List[int] = [_straight_high(mask) for mask in range(1 << 13)]
+
+
+def _build_flush_table(straight_high: Sequence[int] = _STRAIGHT_HIGH,
+                       categories: Optional[Dict[HandRank, int]] = None) -> List[int]:
+    """同じスートのランクのビットマスクから強さを引くテーブル"""
+    table = [0] * (1 << 13)
+    for mask in range(1 << 13):
+        if bin(mask).count("1") < 5:
+            continue
+        high = straight_high[mask]
+        if high:
+            hand_rank = HandRank.ROYAL_FLUSH if high == 14 else HandRank.STRAIGHT_FLUSH
+            table[mask] = _pack(hand_rank, _straight_kickers(high), categories)
+        else:
+            ranks = [r + 2 for r in range(12, -1, -1) if mask >> r & 1][:5]
+            table[mask] = _pack(HandRank.FLUSH, ranks, categories)
+    return table
+
+
+def _evaluate_rank_groups(present: List[int], quads: List[int], trips: List[int],
+                          pairs: List[int], rank_mask: int,
+                          straight_high: Sequence[int] = _STRAIGHT_HIGH,
+                          categories: Optional[Dict[HandRank, int]] = None) -> int:
+    """
+    フラッシュ以外の役の強さを求める
+
+    present, quads, trips, pairs はそれぞれ強い順に並んだランクのリスト
+    """
+    if quads:
+        kicker = [r for r in present if r != quads[0]][:1]
+        return _pack(HandRank.FOUR_OF_A_KIND, [quads[0]] + kicker, categories)
+
+    if trips and len(trips) + len(pairs) >= 2:
+        pair = max(trips[1:] + pairs)
+        return _pack(HandRank.FULL_HOUSE, [trips[0], pair], categories)
+
+    high = straight_high[rank_mask]
+    if high:
+        return _pack(HandRank.STRAIGHT, _straight_kickers(high), categories)
+
+    if trips:
+        kickers = [r for r in present if r != trips[0]][:2]
+        return _pack(HandRank.THREE_OF_A_KIND, [trips[0]] + kickers, categories)
+
+    if len(pairs) >= 2:
+        kicker = [r for r in present if r != pairs[0] and r != pairs[1]][:1]
+        return _pack(HandRank.TWO_PAIR, pairs[:2] + kicker, categories)
+
+    if pairs:
+        kickers = [r for r in present if r != pairs[0]][:3]
+        return _pack(HandRank.ONE_PAIR, [pairs[0]] + kickers, categories)
+
+    return _pack(HandRank.HIGH_CARD, present[:5], categories)
+
+
+def _build_rank_table(straight_high: Sequence[int] = _STRAIGHT_HIGH,
+                      categories: Optional[Dict[HandRank, int]] = None,
+                      lowest_rank: int = 2, max_cards: int = 7) -> Dict[int, int]:
+    """
+    5〜max_cards 枚のランクの組み合わせ（キー）から強さを引くテーブル
+
+    lowest_rank より低いランクは含めない（ショートデッキでは 6）。
+    """
+    table: Dict[int, int] = {}
+    groups: List[List[int]] = [[], [], [], [], []]  # 枚数ごとのランク（強い順）
+    present: List[int] = []
+    lowest_index = lowest_rank - 2
+
+    def fill(rank_index: int, remaining: int, key: int, rank_mask: int):
+        if rank_index < lowest_index or remaining == 0:
+            if remaining <= max_cards - 5:
+                table[key] = _evaluate_rank_groups(
+                    present, groups[4], groups[3], groups[2], rank_mask,
+                    straight_high, categories)
+            return
+        fill(rank_index - 1, remaining, key, rank_mask)
+        rank = rank_index + 2
+        present.append(rank)
+        for n in range(1, min(4, remaining) + 1):
+            groups[n].append(rank)
+            fill(rank_index - 1, remaining - n,
+                 key + (n << (_RANK_BITS * rank_index)), rank_mask | (1 << rank_index))
+            groups[n].pop()
+        present.pop()
+
+    fill(12, max_cards, 0, 0)
+    return table
+
+
+_FLUSH_TABLE = _build_flush_table()
+_RANK_TABLE = _build_rank_table()
+
+
+def _flush_strength(suit: int, card_ids: Sequence[int], more_ids: Sequence[int] = ()) -> int:
+    """フラッシュのスートのカードだけでランクのビットマスクを作り、強さを引く"""
+    mask = 0
+    for card_id in card_ids:
+        if card_id & 3 == suit:
+            mask |= 1 << (card_id >> 2)
+    for card_id in more_ids:
+        if card_id & 3 == suit:
+            mask |= 1 << (card_id >> 2)
+    return _FLUSH_TABLE[mask]
+
+
+def strength_from_ids(card_ids: Sequence[int]) -> int:
+    """5〜7枚のカード番号から役の強さ（整数）を求める"""
+    keys = CARD_KEYS
+    key = _SUIT_BIAS
+    for card_id in card_ids:
+        key += keys[card_id]
+
+    flush = key & _FLUSH_CHECK
+    if flush:
+        return _flush_strength(_FLUSH_SUIT[flush], card_ids)
+
+    return _RANK_TABLE[key & _RANK_KEY_MASK]
+
+
+def hand_key(card_ids: Sequence[int]) -> int:
+    """
+    カード番号の集合のキーを求める
+
+    キーはカードを足すだけで更新できるので、途中までのキーを
+    保存しておけば残りのカードを足すだけで評価し直せる。
+    """
+    key = _SUIT_BIAS
+    for card_id in card_ids:
+        key += CARD_KEYS[card_id]
+    return key
+
+
+def strength_from_key(key: int, card_ids: Sequence[int], more_ids: Sequence[int] = ()) -> int:
+    """
+    キー（5〜7枚分）から役の強さを求める
+
+    card_ids と more_ids はキーに含まれるカード番号で、フラッシュのときだけ参照する。
+    """
+    flush = key & _FLUSH_CHECK
+    if flush:
+        return _flush_strength(_FLUSH_SUIT[flush], card_ids, more_ids)
+    return _RANK_TABLE[key & _RANK_KEY_MASK]
+
+
+class IncrementalHand:
+    """
+    カードを1枚ずつ追加しながら評価できる手札の状態
+
+    ホールカードで初期化し、フロップ・ターン・リバーのカードを追加していく。
+    ランクとスートの枚数（キー）、スートごとのランクのビットマスクを保持するので、
+    カードの追加も役の強さの問い合わせも O(1) で済む。
+
+    引くテーブルはクラス属性なので、役の順位が違うバリアントはサブクラスで差し替える。
+    """
+
+    __slots__ = ("key", "suit_masks", "card_mask", "num_cards")
+
+    _flush_table: List[int] = _FLUSH_TABLE
+    _rank_table: Dict[int, int] = _RANK_TABLE
+    _hand_ranks: Optional[Dict[int, HandRank]] = None  # decode_strength に渡す対応
+
+    def __init__(self, cards: Sequence[Card] = ()):
+        self.key = _SUIT_BIAS
+        self.suit_masks = [0, 0, 0, 0]  # スートごとのランクのビットマスク
+        self.card_mask = 0  # 52ビットのカードのマスク
+        self.num_cards = 0
+        for card in cards:
+            self.add_id(card.id)
+
+    def add(self, card: Card):
+        """カードを追加"""
+        self.add_id(card.id)
+
+    def add_id(self, card_id: int):
+        """カード番号でカードを追加"""
+        self.key += CARD_KEYS[card_id]
+        self.suit_masks[card_id & 3] |= 1 << (card_id >> 2)
+        self.card_mask |= 1 << card_id
+        self.num_cards += 1
+
+    def copy(self) -> "IncrementalHand":
+        """状態のコピー"""
+        other = type(self)()
+        other.key = self.key
+        other.suit_masks = self.suit_masks[:]
+        other.card_mask = self.card_mask
+        other.num_cards = self.num_cards
+        return other
+
+    def rank_count(self, rank_value: int) -> int:
+        """ランク（2〜14）の枚数"""
+        return (self.key >> (_RANK_BITS * (rank_value - 2))) & 0b111
+
+    def suit_count(self, suit_index: int) -> int:
+        """スート（Card.suit_index）の枚数"""
+        return ((self.key >> (_SUIT_SHIFT + 4 * suit_index)) & 0xF) - 3
+
+    def strength(self) -> int:
+        """現在のカード（5〜7枚）の役の強さ"""
+        if not 5 <= self.num_cards <= 7:
+            raise ValueError("役の判定にはカードが5〜7枚必要です")
+        flush = self.key & _FLUSH_CHECK
+        if flush:
+            return self._flush_table[self.suit_masks[_FLUSH_SUIT[flush]]]
+        return self._rank_table[self.key & _RANK_KEY_MASK]
+
+    def evaluate(self) -> Tuple[HandRank, List[int]]:
+        """現在のカードの役のランクとキッカー"""
+        return decode_strength(self.strength(), self._hand_ranks)
+
+
+_batch_tables = None
+
+
+def _get_batch_tables():
+    """evaluate_batch 用に評価テーブルを NumPy 配列へ変換（初回のみ）"""
+    global _batch_tables
+    if _batch_tables is None:
+        import numpy as np
+
+        rank_keys = np.array(sorted(_RANK_TABLE), dtype=np.int64)
+        rank_values = np.array([_RANK_TABLE[k] for k in rank_keys.tolist()], dtype=np.int64)
+        _batch_tables = (
+            np.array(CARD_KEYS, dtype=np.int64),
+            rank_keys,
+            rank_values,
+            np.array(_FLUSH_TABLE, dtype=np.int64),
+        )
+    return _batch_tables
+
+
+def decode_strength(strength: int,
+                    hand_ranks: Optional[Dict[int, HandRank]] = None) -> Tuple[HandRank, List[int]]:
+    """
+    役の強さ（整数）を役のランクとキッカーに戻す
+
+    hand_ranks は強さの上位ビットの値から役のランクへの対応（役の順位が違うバリアント用）
+    """
+    hand_rank = (hand_ranks or _HAND_RANKS)[strength >> _CATEGORY_SHIFT]
+    kickers = [(strength >> shift) & 0xF for shift in (16, 12, 8, 4, 0)]
+    return hand_rank, kickers[:_KICKER_COUNTS[hand_rank]]
+
+
 class HandEvaluator:
     """ポーカーの役を評価するクラス"""
 
@@ -42,24 +366,69 @@ class HandEvaluator:
         if len(cards) != 7:
             raise ValueError("カードは7枚必要です")
 
-        # すべての5枚の組み合わせを評価
-        from itertools import combinations
-        best_hand = None
-        best_rank = HandRank.HIGH_CARD
-        best_kickers = []
+        return decode_strength(HandEvaluator.evaluate_strength(cards))
+
+    @staticmethod
+    def evaluate_strength(cards: List[Card]) -> int:
+        """
+        5〜7枚のカードから役の強さを1つの整数で返す
+
+        値が大きいほど強い役。同じ値なら引き分け。
+        """
+        if not 5 <= len(cards) <= 7:
+            raise ValueError("カードは5〜7枚必要です")
+
+        return strength_from_ids([card.id for card in cards])
 
-        for combo in combinations(cards, 5):
-            hand_cards = list(combo)
-            rank, kickers = HandEvaluator._evaluate_five_cards(hand_cards)
+    @staticmethod
+    def evaluate_batch(card_ids, validate: bool = True):
+        """
+        N×7 のカード番号配列をまとめて評価（NumPy が必要）
 
-            if rank.value > best_rank.value or (
-                rank.value == best_rank.value and kickers > best_kickers
-            ):
-                best_rank = rank
-                best_kickers = kickers
-                best_hand = hand_cards
+        Args:
+            card_ids: 形状 (N, 7) の整数配列。各要素は Card.id（0〜51）で、各行に重複は無いこと
+            validate: False ならカード番号の範囲と重複を確認しない（重複の無いデッキから
+                配った行だけを渡す内部のシミュレーション用。確認の分だけ速い）
 
-        return best_rank, best_kickers
+        Returns:
+            numpy.ndarray: 形状 (N,) の int64 配列。evaluate_strength と同じ値
+
+        Raises:
+            ValueError: 形状が違う、0〜51 の範囲外のカード番号がある、または行の中でカードが重複している
+        """
+        import numpy as np
+
+        cards = np.asarray(card_ids, dtype=np.int64)
+        if cards.ndim != 2 or cards.shape[1] != 7:
+            raise ValueError("カード配列の形状は (N, 7) である必要があります")
+        if validate and cards.size:
+            if cards.min() < 0 or cards.max() > 51:
+                raise ValueError("カード番号は0〜51である必要があります")
+            # 各行のカードのビットの総和が論理和と違えば重複がある
+            bits = np.left_shift(1, cards)
+            duplicated = bits.sum(axis=1) != np.bitwise_or.reduce(bits, axis=1)
+            if duplicated.any():
+                row = int(np.argmax(duplicated))
+                raise ValueError(f"{row}行目のカードが重複しています: {cards[row].tolist()}")
+
+        card_keys, rank_keys, rank_values, flush_table = _get_batch_tables()
+
+        keys = card_keys[cards].sum(axis=1) + _SUIT_BIAS
+        strengths = rank_values[np.searchsorted(rank_keys, keys & _RANK_KEY_MASK)]
+
+        # フラッシュがある行だけスート別のランクのビットマスクで引き直す
+        flush_bits = keys & _FLUSH_CHECK
+        flush_rows = np.nonzero(flush_bits)[0]
+        if flush_rows.size:
+            flush_cards = cards[flush_rows]
+            suit_shifts = _SUIT_SHIFT + 3 + 4 * np.arange(4, dtype=np.int64)
+            flush_suit = np.argmax((flush_bits[flush_rows, None] >> suit_shifts) & 1, axis=1)
+            in_suit = (flush_cards & 3) == flush_suit[:, None]
+            # 同じスートのカードはランクが重複しないので、総和がビットORと等しい
+            rank_masks = np.where(in_suit, 1 << (flush_cards >> 2), 0).sum(axis=1)
+            strengths[flush_rows] = flush_table[rank_masks]
+
+        return strengths
 
     @staticmethod
     def _evaluate_five_cards(cards: List[Card]) -> Tuple[HandRank, List[int]]:
@@ -0,0 +1,400 @@
+"""
+ハンド履歴のバイナリ形式（書き出し・読み込み・再生）
+
+TexasHoldem のイベントバスに HandHistoryWriter を登録すると、1ハンドごとに
+席・スタック・ホールカード・ボード・アクションの列を1レコードとして書き出す。
+カードは1バイト（Card.id）、額や番号は可変長整数（LEB128）で書くので、
+1ハンドは数十バイトに収まる。
+
+ファイル形式:
+    ヘッダ 5バイト: マジック "PKHH", バージョン(u8)
+    以降はレコードの並び。各レコードは 可変長整数の長さ + 種類(u8) + 本体
+        種類 0 (名前): プレイヤー番号, 名前の長さ, 名前(UTF-8)
+        種類 1 (ハンド):
+            ハンド番号, スモールブラインド, ビッグブラインド, 席数(u8), ディーラーの席(u8)
+            席ごとに: プレイヤー番号, 開始時のスタック, ホールカード(u8 × 2), 終了時のスタック
+            ボードの枚数(u8), ボード(u8 × 枚数)
+            アクション数, アクションごとに: (席 << 4 | ストリート << 2 | アクション), 額
+    （レコード内の数値は、種類と枚数以外すべて可変長整数）
+
+プレイヤー名は最初に出てきたときに名前レコードで1度だけ書き、ハンドでは番号で参照する。
+
+HandHistoryReader はファイルを mmap で開き、レコードを先頭から1つずつ読む。
+書き込みの途中で止まって最後のレコードが欠けていれば、そこで読むのをやめる（truncated が True）。
+replay はレコードのカードとアクションでゲームを進め直し、結果が一致するか確かめる。
+"""
+import mmap
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from card import CARDS, Card
+from events import (ActionTaken, CardsDealt, EventBus, HandFinished, HandStarted, HoleCardsDealt,
+                    StreetStarted)
+from player import Player
+from variants import HOLDEM
+
+MAGIC = b"PKHH"
+VERSION = 1
+FLUSH_HANDS = 1000  # この件数ごとにまとめてファイルに書く
+
+RECORD_NAME = 0
+RECORD_HAND = 1
+
+STREETS = ("preflop", "flop", "turn", "river")
+ACTIONS = ("fold", "check", "call", "raise")
+_STREET_CODES = {street: i for i, street in enumerate(STREETS)}
+_ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+
+def write_varint(out: bytearray, value: int):
+    """0以上の整数を可変長（7ビットずつ、続きがあれば最上位ビットを立てる）で追加"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos: int) -> Tuple[int, int]:
+    """可変長整数を読み、(値, 次の位置) を返す"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class SeatRecord:
+    """1席分の記録"""
+
+    __slots__ = ("name", "stack", "cards", "final_stack")
+
+    def __init__(self, name: str, stack: int, cards: List[Card], final_stack: int):
+        self.name = name
+        self.stack = stack  # ハンド開始時のチップ
+        self.cards = cards
+        self.final_stack = final_stack  # ハンド終了時のチップ
+
+    def __repr__(self) -> str:
+        return (f"SeatRecord({self.name!r}, {self.stack}, "
+                f"{' '.join(str(c) for c in self.cards)}, {self.final_stack})")
+
+
+class HandRecord:
+    """1ハンド分の記録"""
+
+    __slots__ = ("hand_number", "small_blind", "big_blind", "dealer", "seats", "board", "actions")
+
+    def __init__(self, hand_number: int, small_blind: int, big_blind: int, dealer: int,
+                 seats: List[SeatRecord], board: List[Card],
+                 actions: List[Tuple[str, int, str, int]]):
+        self.hand_number = hand_number
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.dealer = dealer
+        self.seats = seats
+        self.board = board
+        self.actions = actions  # (ストリート, 席, アクション, ポットに入れた額)
+
+    def __repr__(self) -> str:
+        return (f"HandRecord(#{self.hand_number}, seats={len(self.seats)}, "
+                f"board={' '.join(str(c) for c in self.board)}, actions={len(self.actions)})")
+
+
+class HandHistoryWriter:
+    """
+    イベントバスからハンド履歴を組み立てて書き出す購読者
+
+        writer = HandHistoryWriter("hands.pkhh")
+        writer.attach(game)
+        ...
+        writer.close()
+    """
+
+    event_types = (HandStarted, StreetStarted, HoleCardsDealt, CardsDealt, ActionTaken,
+                   HandFinished)
+
+    def __init__(self, path: str, flush_hands: int = FLUSH_HANDS):
+        self._names: Dict[str, int] = {}
+        self.hands_written = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # 追記するときは、名前の番号とハンド番号を既存のレコードから引き継ぐ
+            with HandHistoryReader(path) as reader:
+                for _ in reader:
+                    pass
+                self._names = {name: i for i, name in enumerate(reader.names)}
+                self.hands_written = reader.hands_read
+                truncated, complete_end = reader.truncated, reader.complete_end
+            if truncated:
+                # 途中で切れた最後のレコードを捨ててから追記する
+                os.truncate(path, complete_end)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC + bytes([VERSION]))
+        self.flush_hands = flush_hands
+        self._buffer = bytearray()
+        self._pending = 0
+        self._handlers = {
+            HandStarted: self._hand_started,
+            StreetStarted: self._street_started,
+            HoleCardsDealt: self._hole_cards_dealt,
+            CardsDealt: self._cards_dealt,
+            ActionTaken: self._action_taken,
+            HandFinished: self._hand_finished,
+        }
+        self._game = None
+        self._hand: Optional[Dict] = None
+
+    def attach(self, game) -> "HandHistoryWriter":
+        """ゲームのイベントバスに登録（記録できるのはアンティの無いテキサスホールデムのゲームだけ）"""
+        if game.variant is not HOLDEM:
+            raise ValueError(f"{game.variant.display}のハンド履歴は記録できません")
+        if game.ante:
+            raise ValueError("アンティのあるゲームのハンド履歴は記録できません")
+        self._game = game
+        game.events.subscribe(self, self.event_types)
+        return self
+
+    def __call__(self, event):
+        self._handlers[type(event)](event)
+
+    def _hand_started(self, event: HandStarted):
+        game = self._game
+        players = event.players
+        self._hand = {
+            "players": players,
+            "seat": {p: i for i, p in enumerate(players)},
+            "stacks": [p.chips for p in players],
+            "dealer": players.index(event.dealer),
+            "blinds": (game.small_blind, game.big_blind) if game is not None else (0, 0),
+            "cards": [b"\0\0"] * len(players),
+            "board": bytearray(),
+            "actions": bytearray(),
+            "num_actions": 0,
+            "street": 0,
+        }
+
+    def _street_started(self, event: StreetStarted):
+        self._hand["street"] = _STREET_CODES[event.street]
+
+    def _hole_cards_dealt(self, event: HoleCardsDealt):
+        hand = self._hand
+        hand["cards"][hand["seat"][event.player]] = bytes(card.id for card in event.cards)
+
+    def _cards_dealt(self, event: CardsDealt):
+        self._hand["board"].extend(card.id for card in event.cards)
+
+    def _action_taken(self, event: ActionTaken):
+        hand = self._hand
+        seat = hand["seat"][event.player]
+        write_varint(hand["actions"],
+                     seat << 4 | hand["street"] << 2 | _ACTION_CODES[event.action])
+        write_varint(hand["actions"], event.amount)
+        hand["num_actions"] += 1
+
+    def _hand_finished(self, event: HandFinished):
+        hand = self._hand
+        self._hand = None
+        out = self._buffer
+        body = bytearray([RECORD_HAND])
+        write_varint(body, self.hands_written)
+        write_varint(body, hand["blinds"][0])
+        write_varint(body, hand["blinds"][1])
+        body.append(len(hand["players"]))
+        body.append(hand["dealer"])
+        for i, player in enumerate(hand["players"]):
+            write_varint(body, self._name_id(player.name))
+            write_varint(body, hand["stacks"][i])
+            body.extend(hand["cards"][i])
+            write_varint(body, event.chips.get(player, player.chips))
+        body.append(len(hand["board"]))
+        body.extend(hand["board"])
+        write_varint(body, hand["num_actions"])
+        body.extend(hand["actions"])
+
+        write_varint(out, len(body))
+        out.extend(body)
+        self.hands_written += 1
+        self._pending += 1
+        if self._pending >= self.flush_hands:
+            self.flush()
+
+    def _name_id(self, name: str) -> int:
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            encoded = name.encode("utf-8")
+            body = bytearray([RECORD_NAME])
+            write_varint(body, name_id)
+            write_varint(body, len(encoded))
+            body.extend(encoded)
+            write_varint(self._buffer, len(body))
+            self._buffer.extend(body)
+        return name_id
+
+    def flush(self):
+        """溜めたレコードをファイルに書く"""
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class HandHistoryReader:
+    """mmap で開いたハンド履歴のファイルから、レコードを順に読む"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:4] != MAGIC or self._mmap[4] != VERSION:
+            self._mmap.close()
+            raise ValueError(f"ハンド履歴の形式が違います: {path}")
+        self.names: List[str] = []
+        self.hands_read = 0
+        self.truncated = False  # 最後のレコードが途中で切れていた
+        self.complete_end = len(MAGIC) + 1  # 最後まで読めたレコードの終わりの位置
+
+    def __enter__(self) -> "HandHistoryReader":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mmap.close()
+
+    def __iter__(self) -> Iterator[HandRecord]:
+        """
+        ハンドのレコードを先頭から順に返す（名前のレコードは names に反映する）
+
+        最後のレコードが途中で切れていれば（書き込み中に異常終了したファイル）、
+        そのレコードは返さずに truncated を True にして終える。
+        """
+        data = self._mmap
+        end = len(data)
+        pos = len(MAGIC) + 1
+        self.names = []
+        self.hands_read = 0
+        self.truncated = False
+        self.complete_end = pos
+        while pos < end:
+            try:
+                length, pos = read_varint(data, pos)
+            except IndexError:  # レコード長の途中で切れている
+                length, pos = 0, end + 1
+            record_end = pos + length
+            if length == 0 or record_end > end:
+                self.truncated = True
+                return
+            kind = data[pos]
+            if kind == RECORD_NAME:
+                name_id, p = read_varint(data, pos + 1)
+                size, p = read_varint(data, p)
+                name = data[p:p + size].decode("utf-8")
+                self.names.extend([""] * (name_id + 1 - len(self.names)))
+                self.names[name_id] = name
+            elif kind == RECORD_HAND:
+                self.hands_read += 1
+                yield self._parse_hand(data, pos + 1)
+            pos = self.complete_end = record_end
+
+    def _parse_hand(self, data, pos: int) -> HandRecord:
+        hand_number, pos = read_varint(data, pos)
+        small_blind, pos = read_varint(data, pos)
+        big_blind, pos = read_varint(data, pos)
+        num_seats, dealer = data[pos], data[pos + 1]
+        pos += 2
+        seats = []
+        for _ in range(num_seats):
+            name_id, pos = read_varint(data, pos)
+            stack, pos = read_varint(data, pos)
+            cards = [CARDS[data[pos]], CARDS[data[pos + 1]]]
+            final_stack, pos = read_varint(data, pos + 2)
+            seats.append(SeatRecord(self.names[name_id], stack, cards, final_stack))
+        board_size = data[pos]
+        board = [CARDS[card_id] for card_id in data[pos + 1:pos + 1 + board_size]]
+        pos += 1 + board_size
+        num_actions, pos = read_varint(data, pos)
+        actions = []
+        for _ in range(num_actions):
+            code, pos = read_varint(data, pos)
+            amount, pos = read_varint(data, pos)
+            actions.append((STREETS[code >> 2 & 3], code >> 4, ACTIONS[code & 3], amount))
+        return HandRecord(hand_number, small_blind, big_blind, dealer, seats, board, actions)
+
+
+# ---------------------------------------------------------------------------
+# 再生
+# ---------------------------------------------------------------------------
+
+class _RecordedDeck:
+    """記録されたカードをゲームが引く順番（ホールカードを席順に2枚ずつ、次にボード）で返すデッキ"""
+
+    def __init__(self, record: HandRecord):
+        self._cards = [card for seat in record.seats for card in seat.cards] + record.board
+        self._next = 0
+
+    def reset(self):
+        self._next = 0
+
+    def shuffle(self):
+        pass
+
+    def draw(self) -> Card:
+        card = self._cards[self._next]
+        self._next += 1
+        return card
+
+
+class ReplayPlayer(Player):
+    """記録されたアクションを順に返すプレイヤー"""
+
+    def __init__(self, name: str, chips: int):
+        super().__init__(name, chips)
+        self.recorded: List[Tuple[str, int]] = []  # (アクション, ポットに入れた額)
+
+    def decide_action(self, current_bet: int, min_raise: int, pot: int) -> Tuple[str, int]:
+        action, paid = self.recorded.pop(0)
+        if action == 'raise':
+            # 記録はポットに入れた額なので、コール額への上乗せ分に戻す
+            return (action, paid - (current_bet - self.current_bet))
+        return (action, paid)
+
+
+def replay(record: HandRecord, events: Optional[EventBus] = None, verify: bool = True):
+    """
+    レコードのカードとアクションで TexasHoldem を進め直す
+
+    Args:
+        events: 再生中のイベントを受け取るイベントバス（表示や別形式への変換用）
+        verify: True なら、終了時のチップが記録と違うときに ValueError を送出する
+
+    Returns:
+        TexasHoldem: 再生を終えたゲーム
+    """
+    from texas_holdem import TexasHoldem
+
+    players = [ReplayPlayer(seat.name, seat.stack) for seat in record.seats]
+    for street, seat, action, amount in record.actions:
+        players[seat].recorded.append((action, amount))
+
+    game = TexasHoldem(players, record.small_blind, record.big_blind, headless=True,
+                       events=events)
+    game.deck = _RecordedDeck(record)
+    game.dealer_position = record.dealer
+    game.play_hand()
+
+    if verify:
+        for player, seat in zip(players, record.seats):
+            if player.chips != seat.final_stack:
+                raise ValueError(f"再生結果が記録と一致しません（ハンド #{record.hand_number}, "
+                                 f"{player.name}: {player.chips} != {seat.final_stack}）")
+    return game
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+ハンド履歴の列指向インデックスと、相手の傾向の集計（NumPy が必要）
+
+hand_history.py のレコードを、アクション1回ごとの行と、ハンドの参加者1人ごとの行に分けて
+列（NumPy 配列）として保存する。集計は列をまとめて走査する（np.bincount など）だけで済み、
+ハンド履歴を読み直さない。
+
+    アクションの列: hand, player, position, street, action, amount
+    参加者の列:     hand, player, position, reached, strength, net, big_blind
+
+position はディーラーからの席の距離（0 がディーラー、1 がスモールブラインド ...）、
+reached はフォールドしたストリート（フォールドしていなければ最後に進んだストリート）、
+strength はショーダウンでの役の強さ（ショーダウンに参加していなければ -1）、
+net はそのハンドでのチップの増減。
+
+追加するたびに新しいセグメント（ディレクトリ）を作り、既存の列は書き換えない。
+1つのセグメントは SEGMENT_HANDS ハンドまでで、大きなファイルはその単位で分けて書き出すので、
+追加中のメモリはファイルの大きさによらない。
+セグメント内の行はプレイヤー番号順に並べてあり、プレイヤーごとの開始位置（offsets）で
+特定のプレイヤーの行だけを切り出せる。列は np.load(mmap_mode="r") で開く。
+
+    インデックス/
+        index.json           プレイヤー名、aggression、ハンド数、セグメントの一覧
+        seg_000000/
+            actions_<列>.npy, actions_offsets.npy
+            seats_<列>.npy, seats_offsets.npy
+
+実行例:
+    python3 hand_index.py hands_index --add hands.pkhh --aggression AI_1=0.3 AI_2=0.7
+"""
+import argparse
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from hand_evaluator import HandEvaluator
+from hand_history import ACTIONS, STREETS, HandHistoryReader, HandRecord
+
+INDEX_VERSION = 1
+SEGMENT_HANDS = 50_000  # 1つのセグメントに入れるハンド数の上限
+
+FOLD, CHECK, CALL, RAISE = range(len(ACTIONS))
+_STREET_CODES = {street: i for i, street in enumerate(STREETS)}
+_ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+_BOARD_STREETS = {0: 0, 3: 1, 4: 2, 5: 3}  # ボードの枚数 → 最後に進んだストリート
+
+ACTION_COLUMNS = {
+    "hand": np.int64,
+    "player": np.uint32,
+    "position": np.uint8,
+    "street": np.uint8,
+    "action": np.uint8,
+    "amount": np.uint32,
+}
+SEAT_COLUMNS = {
+    "hand": np.int64,
+    "player": np.uint32,
+    "position": np.uint8,
+    "reached": np.uint8,
+    "strength": np.int32,
+    "net": np.int64,
+    "big_blind": np.uint32,
+}
+TABLES = {"actions": ACTION_COLUMNS, "seats": SEAT_COLUMNS}
+
+
+class PlayerStats:
+    """プレイヤー（または aggression の設定）ごとの集計"""
+
+    def __init__(self, hands: int = 0, vpip_hands: int = 0, pfr_hands: int = 0,
+                 postflop_raises: int = 0, postflop_calls: int = 0, saw_flop: int = 0,
+                 showdowns: int = 0, showdowns_won: int = 0, net_big_blinds: float = 0.0):
+        self.hands = hands
+        self.vpip_hands = vpip_hands
+        self.pfr_hands = pfr_hands
+        self.postflop_raises = postflop_raises
+        self.postflop_calls = postflop_calls
+        self.saw_flop = saw_flop
+        self.showdowns = showdowns
+        self.showdowns_won = showdowns_won
+        self.net_big_blinds = net_big_blinds
+
+    @property
+    def vpip(self) -> float:
+        """プリフロップに自分からチップを入れた（コールかレイズした）ハンドの割合"""
+        return self.vpip_hands / self.hands if self.hands else 0.0
+
+    @property
+    def pfr(self) -> float:
+        """プリフロップにレイズしたハンドの割合"""
+        return self.pfr_hands / self.hands if self.hands else 0.0
+
+    @property
+    def aggression_factor(self) -> float:
+        """フロップ以降の レイズ回数 / コール回数（コールが無ければ inf）"""
+        if not self.postflop_calls:
+            return float("inf") if self.postflop_raises else 0.0
+        return self.postflop_raises / self.postflop_calls
+
+    @property
+    def wtsd(self) -> float:
+        """フロップを見たハンドのうちショーダウンまで進んだ割合"""
+        return self.showdowns / self.saw_flop if self.saw_flop else 0.0
+
+    @property
+    def won_at_showdown(self) -> float:
+        """ショーダウンでチップを増やした割合"""
+        return self.showdowns_won / self.showdowns if self.showdowns else 0.0
+
+    @property
+    def big_blinds_per_100(self) -> float:
+        """100ハンドあたりの損益（ビッグブラインド単位）"""
+        return 100 * self.net_big_blinds / self.hands if self.hands else 0.0
+
+    def __repr__(self) -> str:
+        return (f"PlayerStats(hands={self.hands}, vpip={self.vpip:.3f}, pfr={self.pfr:.3f}, "
+                f"af={self.aggression_factor:.2f}, wtsd={self.wtsd:.3f}, "
+                f"bb/100={self.big_blinds_per_100:.2f})")
+
+
+_COUNT_FIELDS = ("hands", "vpip_hands", "pfr_hands", "postflop_raises", "postflop_calls",
+                 "saw_flop", "showdowns", "showdowns_won", "net_big_blinds")
+
+
+def _distinct_hands(player: np.ndarray, hand: np.ndarray, mask: np.ndarray, size: int):
+    """mask の行について、プレイヤーごとに異なるハンドの数（行はプレイヤー、ハンドの順に並んでいる）"""
+    player, hand = player[mask], hand[mask]
+    first = np.ones(player.size, dtype=bool)
+    first[1:] = (player[1:] != player[:-1]) | (hand[1:] != hand[:-1])
+    return np.bincount(player[first], minlength=size)
+
+
+def _scan(actions: Dict[str, np.ndarray], seats: Dict[str, np.ndarray], size: int) -> np.ndarray:
+    """列を走査して、プレイヤー番号ごとの集計（_COUNT_FIELDS の順）を返す"""
+    counts = np.zeros((len(_COUNT_FIELDS), size), dtype=np.float64)
+
+    player, hand = actions["player"], actions["hand"]
+    street, action = actions["street"], actions["action"]
+    preflop = street == 0
+    raised = action == RAISE
+    called = action == CALL
+    counts[1] = _distinct_hands(player, hand, preflop & (raised | called), size)
+    counts[2] = _distinct_hands(player, hand, preflop & raised, size)
+    counts[3] = np.bincount(player[~preflop & raised], minlength=size)
+    counts[4] = np.bincount(player[~preflop & called], minlength=size)
+
+    player = seats["player"]
+    showdown = seats["strength"] >= 0
+    net = seats["net"]
+    counts[0] = np.bincount(player, minlength=size)
+    counts[5] = np.bincount(player[seats["reached"] >= 1], minlength=size)
+    counts[6] = np.bincount(player[showdown], minlength=size)
+    counts[7] = np.bincount(player[showdown & (net > 0)], minlength=size)
+    counts[8] = np.bincount(player, weights=net / seats["big_blind"], minlength=size)
+    return counts
+
+
+def _to_stats(counts: np.ndarray) -> PlayerStats:
+    values = [int(v) for v in counts[:-1]] + [float(counts[-1])]
+    return PlayerStats(*values)
+
+
+class _Segment:
+    """1回の追加で作られた列の組（mmap で開く）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: Dict[str, Dict[str, np.ndarray]] = {}
+        self.offsets: Dict[str, np.ndarray] = {}
+        for table, columns in TABLES.items():
+            self.columns[table] = {name: np.load(os.path.join(path, f"{table}_{name}.npy"),
+                                                 mmap_mode="r")
+                                   for name in columns}
+            self.offsets[table] = np.load(os.path.join(path, f"{table}_offsets.npy"))
+
+    def player_slice(self, table: str, player_id: int) -> slice:
+        """このセグメントでのプレイヤーの行の範囲"""
+        offsets = self.offsets[table]
+        if player_id + 1 >= offsets.size:  # このセグメントより後に加わったプレイヤー
+            return slice(0, 0)
+        return slice(int(offsets[player_id]), int(offsets[player_id + 1]))
+
+
+class HandIndex:
+    """ハンド履歴の列指向インデックス"""
+
+    def __init__(self, path: str):
+        self.path = path
+        meta_path = os.path.join(path, "index.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                raise ValueError(f"インデックスの形式が違います: {path}")
+        else:
+            os.makedirs(path, exist_ok=True)
+            meta = {"version": INDEX_VERSION, "hands": 0, "players": [], "aggression": {},
+                    "segments": []}
+        self.players: List[str] = meta["players"]
+        self.aggression: Dict[str, float] = meta["aggression"]
+        self.hands: int = meta["hands"]
+        self._segment_names: List[str] = meta["segments"]
+        self._player_ids = {name: i for i, name in enumerate(self.players)}
+        self._segments: Optional[List[_Segment]] = None
+
+    @property
+    def segments(self) -> List[_Segment]:
+        if self._segments is None:
+            self._segments = [_Segment(os.path.join(self.path, name))
+                              for name in self._segment_names]
+        return self._segments
+
+    def player_id(self, name: str) -> int:
+        """プレイヤー名の番号（未登録なら KeyError）"""
+        return self._player_ids[name]
+
+    # -----------------------------------------------------------------------
+    # 追加
+    # -----------------------------------------------------------------------
+
+    def add_file(self, history_path: str, aggression: Optional[Dict[str, float]] = None) -> int:
+        """ハンド履歴のファイルを追加して、追加したハンド数を返す"""
+        with HandHistoryReader(history_path) as reader:
+            return self.add(reader, aggression)
+
+    def add(self, records: Iterable[HandRecord],
+            aggression: Optional[Dict[str, float]] = None,
+            segment_hands: int = SEGMENT_HANDS) -> int:
+        """
+        レコードを新しいセグメントとして追加して、追加したハンド数を返す
+
+        Args:
+            records: ハンドのレコード
+            aggression: プレイヤー名 → AIPlayer.aggression（aggression ごとの集計に使う）
+            segment_hands: 1つのセグメントに入れるハンド数の上限（これごとに書き出す）
+        """
+        records = iter(records)
+        added = 0
+        while True:
+            count = self._add_segment(islice(records, segment_hands))
+            if not count:
+                break
+            added += count
+        if added and aggression:
+            self.aggression.update(aggression)
+            self._write_meta()
+        return added
+
+    def _add_segment(self, records: Iterable[HandRecord]) -> int:
+        """レコードを1つのセグメントに書き出して、追加したハンド数を返す"""
+        actions = {name: [] for name in ACTION_COLUMNS}
+        seats = {name: [] for name in SEAT_COLUMNS}
+        showdown_rows: List[int] = []
+        showdown_cards: List[List[int]] = []
+        hand = self.hands
+
+        for record in records:
+            num_seats = len(record.seats)
+            ids = [self._register(seat.name) for seat in record.seats]
+            positions = [(i - record.dealer) % num_seats for i in range(num_seats)]
+            folded_at = [None] * num_seats
+            for street, seat, action, amount in record.actions:
+                actions["hand"].append(hand)
+                actions["player"].append(ids[seat])
+                actions["position"].append(positions[seat])
+                actions["street"].append(_STREET_CODES[street])
+                actions["action"].append(_ACTION_CODES[action])
+                actions["amount"].append(amount)
+                if action == 'fold':
+                    folded_at[seat] = _STREET_CODES[street]
+
+            last_street = _BOARD_STREETS[len(record.board)]
+            showdown = folded_at.count(None) > 1
+            board_ids = [card.id for card in record.board]
+            for i, seat in enumerate(record.seats):
+                if showdown and folded_at[i] is None:
+                    showdown_rows.append(len(seats["hand"]))
+                    showdown_cards.append([card.id for card in seat.cards] + board_ids)
+                seats["hand"].append(hand)
+                seats["player"].append(ids[i])
+                seats["position"].append(positions[i])
+                seats["reached"].append(last_street if folded_at[i] is None else folded_at[i])
+                seats["strength"].append(-1)
+                seats["net"].append(seat.final_stack - seat.stack)
+                seats["big_blind"].append(record.big_blind)
+            hand += 1
+
+        added = hand - self.hands
+        if not added:
+            return 0
+
+        columns = {"actions": {name: np.array(actions[name], dtype=dtype)
+                               for name, dtype in ACTION_COLUMNS.items()},
+                   "seats": {name: np.array(seats[name], dtype=dtype)
+                             for name, dtype in SEAT_COLUMNS.items()}}
+        if showdown_rows:
+            columns["seats"]["strength"][showdown_rows] = \
+                HandEvaluator.evaluate_batch(showdown_cards)
+
+        name = f"seg_{len(self._segment_names):06d}"
+        self._write_segment(name, columns)
+        self.hands = hand
+        self._segment_names.append(name)
+        self._write_meta()
+        if self._segments is not None:
+            self._segments.append(_Segment(os.path.join(self.path, name)))
+        return added
+
+    def _register(self, name: str) -> int:
+        player_id = self._player_ids.get(name)
+        if player_id is None:
+            player_id = self._player_ids[name] = len(self.players)
+            self.players.append(name)
+        return player_id
+
+    def _write_segment(self, name: str, columns: Dict[str, Dict[str, np.ndarray]]):
+        """行をプレイヤー番号順に並べ替えて、列とプレイヤーごとの開始位置を書き出す"""
+        segment_path = os.path.join(self.path, name)
+        os.makedirs(segment_path, exist_ok=True)
+        for table, table_columns in columns.items():
+            # 安定ソートなので、同じプレイヤーの行はハンド・アクションの順のまま
+            order = np.argsort(table_columns["player"], kind="stable")
+            for column, values in table_columns.items():
+                np.save(os.path.join(segment_path, f"{table}_{column}.npy"), values[order])
+            offsets = np.searchsorted(table_columns["player"][order],
+                                      np.arange(len(self.players) + 1))
+            np.save(os.path.join(segment_path, f"{table}_offsets.npy"), offsets.astype(np.int64))
+
+    def _write_meta(self):
+        meta = {"version": INDEX_VERSION, "hands": self.hands, "players": self.players,
+                "aggression": self.aggression, "segments": self._segment_names}
+        meta_path = os.path.join(self.path, "index.json")
+        temp_path = meta_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_path, meta_path)
+
+    # -----------------------------------------------------------------------
+    # 集計
+    # -----------------------------------------------------------------------
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """全セグメントの列をつないだ配列（'actions' か 'seats' の列）"""
+        parts = [segment.columns[table][name] for segment in self.segments]
+        if not parts:
+            return np.zeros(0, dtype=TABLES[table][name])
+        return np.concatenate(parts)
+
+    def player_rows(self, name: str, table: str = "actions") -> Dict[str, np.ndarray]:
+        """プレイヤーの行だけを、開始位置から切り出して列ごとにつなぐ"""
+        player_id = self.player_id(name)
+        slices = [(segment, segment.player_slice(table, player_id)) for segment in self.segments]
+        return {column: np.concatenate([np.zeros(0, dtype=dtype)] +
+                                       [segment.columns[table][column][rows]
+                                        for segment, rows in slices])
+                for column, dtype in TABLES[table].items()}
+
+    def _counts(self) -> np.ndarray:
+        size = len(self.players)
+        counts = np.zeros((len(_COUNT_FIELDS), size), dtype=np.float64)
+        for segment in self.segments:
+            counts += _scan(segment.columns["actions"], segment.columns["seats"], size)
+        return counts
+
+    def stats(self) -> Dict[str, PlayerStats]:
+        """全プレイヤーの集計"""
+        counts = self._counts()
+        return {name: _to_stats(counts[:, i]) for i, name in enumerate(self.players)}
+
+    def player_stats(self, name: str) -> PlayerStats:
+        """1人の集計（そのプレイヤーの行だけを読む）"""
+        player_id = self.player_id(name)
+        counts = _scan(self.player_rows(name, "actions"), self.player_rows(name, "seats"),
+                       player_id + 1)
+        return _to_stats(counts[:, player_id])
+
+    def stats_by_aggression(self) -> Dict[float, PlayerStats]:
+        """AIPlayer.aggression の設定ごとの集計（aggression が登録されたプレイヤーのみ）"""
+        counts = self._counts()
+        levels: Dict[float, np.ndarray] = {}
+        for i, name in enumerate(self.players):
+            level = self.aggression.get(name)
+            if level is None:
+                continue
+            if level in levels:
+                levels[level] += counts[:, i]
+            else:
+                levels[level] = counts[:, i].copy()
+        return {level: _to_stats(levels[level]) for level in sorted(levels)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ハンド履歴のインデックスを作成・集計します")
+    parser.add_argument("index", help="インデックスのディレクトリ")
+    parser.add_argument("--add", nargs="*", default=[], help="追加するハンド履歴のファイル")
+    parser.add_argument("--aggression", nargs="*", default=[],
+                        help="プレイヤーの aggression（名前=値）")
+    args = parser.parse_args()
+
+    aggression = {}
+    for item in args.aggression:
+        name, _, value = item.rpartition("=")
+        aggression[name] = float(value)
+
+    index = HandIndex(args.index)
+    for path in args.add:
+        print(f"{path}: {index.add_file(path, aggression)}ハンドを追加")
+
+    print(f"\nハンド数: {index.hands}")
+    print(f"{'プレイヤー':<12} {'ハンド':>8} {'VPIP':>6} {'PFR':>6} {'AF':>6} {'WTSD':>6} {'bb/100':>8}")
+    for name, stats in index.stats().items():
+        print(f"{name:<12} {stats.hands:>8} {stats.vpip:>6.1%} {stats.pfr:>6.1%} "
+              f"{stats.aggression_factor:>6.2f} {stats.wtsd:>6.1%} {stats.big_blinds_per_100:>8.2f}")
+
+    by_level = index.stats_by_aggression()
+    if by_level:
+        print(f"\n{'aggression':>10} {'ハンド':>8} {'VPIP':>6} {'PFR':>6} {'bb/100':>8}")
+        for level, stats in by_level.items():
+            print(f"{level:>10.2f} {stats.hands:>8} {stats.vpip:>6.1%} {stats.pfr:>6.1%} "
+                  f"{stats.big_blinds_per_100:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+スートの入れ替えで同じになるハンドをまとめるモジュール（スートの同型性）
+
+ホールカードとボードは、スートを入れ替えても戦略上は同じ局面になる。
+たとえば A♥K♥ と A♠K♠ は同じ。このモジュールは、こうした局面の集合に
+0 から始まる連番（正規インデックス）を付け、インデックスから代表のカードに戻す。
+
+    ストリート   組み合わせ          正規インデックスの数
+    プリフロップ 1,326                169
+    フロップ     25,989,600           1,286,792
+    ターン       1,221,511,200        55,190,538
+    リバー       56,189,515,200       2,428,287,420
+
+エクイティのキャッシュや AI の参照表、ハンド履歴の集計はこのインデックスをキーにできる。
+
+カードは配られたラウンド（ホールカード、フロップ、ターン、リバー）ごとに区別し、
+ラウンド内の順番は区別しない。各スートについて「ラウンドごとのランクの集合」を求め、
+スートの並べ替えで一致するものを同じ局面とみなす。
+IsomorphicHand を使うと、ストリートが進むたびに新しいラウンドの分だけ計算し直す。
+"""
+from bisect import bisect_right
+from itertools import product
+from math import comb
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+NUM_SUITS = 4
+NUM_RANKS = 13
+HOLDEM_ROUNDS = (2, 3, 1, 1)  # ホールカード、フロップ、ターン、リバー
+
+_BOARD_ROUND = {0: 0, 3: 1, 4: 2, 5: 3}  # ボードの枚数 → ラウンド番号
+
+
+def _card_id(card) -> int:
+    return card if isinstance(card, int) else card.id
+
+
+def _rank_set_index(ranks: int, used: int) -> int:
+    """
+    ランクの集合（13ビット）のインデックス
+
+    それまでのラウンドで使ったランク used を除いて詰め直し、
+    組み合わせの colex 順で番号を付ける（0 〜 C(13 - |used|, |ranks|) - 1）。
+    """
+    index = 0
+    j = 1
+    while ranks:
+        low = ranks & -ranks
+        rank = low.bit_length() - 1
+        compressed = rank - bin(used & (low - 1)).count("1")
+        index += comb(compressed, j)
+        j += 1
+        ranks ^= low
+    return index
+
+
+def _unrank_rank_set(index: int, count: int, used: int) -> int:
+    """_rank_set_index の逆変換"""
+    free = [rank for rank in range(NUM_RANKS) if not used >> rank & 1]
+    ranks = 0
+    x = len(free)
+    for j in range(count, 0, -1):
+        x -= 1
+        while comb(x, j) > index:
+            x -= 1
+        index -= comb(x, j)
+        ranks |= 1 << free[x]
+    return ranks
+
+
+def _multiset_index(values: Sequence[int]) -> int:
+    """重複を許す組み合わせ（昇順の values）の colex 順の番号"""
+    return sum(comb(value + i, i + 1) for i, value in enumerate(values))
+
+
+def _unrank_multiset(index: int, k: int) -> List[int]:
+    """_multiset_index の逆変換（昇順のリスト）"""
+    values = [0] * k
+    for i in range(k, 0, -1):
+        # comb(x, i) <= index となる最大の x を二分探索
+        low, high = i - 1, i
+        while comb(high, i) <= index:
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if comb(mid, i) <= index:
+                low = mid
+            else:
+                high = mid
+        index -= comb(low, i)
+        values[i - 1] = low - (i - 1)
+    return values
+
+
+def _suit_size(counts: Tuple[int, ...]) -> int:
+    """1つのスートがラウンドごとに counts 枚ずつ持つときの、ランクの選び方の数"""
+    size = 1
+    used = 0
+    for count in counts:
+        size *= comb(NUM_RANKS - used, count)
+        used += count
+    return size
+
+
+class _Configuration:
+    """
+    スートごとの枚数の組（配置）
+
+    counts はスートごとの「ラウンドごとの枚数」を降順に並べたもの。
+    同じ枚数のスート同士は入れ替えられるので、重複を許す組み合わせで番号を付ける。
+    """
+
+    def __init__(self, counts: Tuple[Tuple[int, ...], ...], offset: int):
+        self.counts = counts
+        self.offset = offset
+        # 同じ枚数のスートのまとまり: (先頭の位置, スート数, 1スートあたりの選び方の数)
+        self.groups: List[Tuple[int, int, int]] = []
+        start = 0
+        while start < NUM_SUITS:
+            end = start + 1
+            while end < NUM_SUITS and counts[end] == counts[start]:
+                end += 1
+            k = end - start
+            self.groups.append((start, k, _suit_size(counts[start])))
+            start = end
+        self.size = 1
+        for _, k, suit_size in self.groups:
+            self.size *= comb(suit_size + k - 1, k)
+
+
+class HandIndexer:
+    """
+    ラウンドごとの枚数（ホールデムなら (2, 3, 1, 1)）を指定して、
+    各ラウンドまでのカードと正規インデックスを相互に変換する
+    """
+
+    def __init__(self, cards_per_round: Sequence[int] = HOLDEM_ROUNDS):
+        if sum(cards_per_round) > NUM_SUITS * NUM_RANKS:
+            raise ValueError("カードの枚数が多すぎます")
+        self.cards_per_round = tuple(cards_per_round)
+        self.rounds = len(self.cards_per_round)
+        # ラウンドごとの配置の一覧と、枚数の組 → 配置 の辞書
+        self._configurations: List[List[_Configuration]] = []
+        self._configuration_map: List[Dict[Tuple, _Configuration]] = []
+        self._offsets: List[List[int]] = []
+        for round_ in range(self.rounds):
+            configurations = self._enumerate_configurations(self.cards_per_round[:round_ + 1])
+            self._configurations.append(configurations)
+            self._configuration_map.append({c.counts: c for c in configurations})
+            self._offsets.append([c.offset for c in configurations])
+
+    @staticmethod
+    def _enumerate_configurations(cards_per_round: Sequence[int]) -> List[_Configuration]:
+        per_suit = [()] * NUM_SUITS
+        candidates = {tuple(per_suit)}
+        for cards in cards_per_round:
+            next_candidates = set()
+            for suits in candidates:
+                for split in product(range(cards + 1), repeat=NUM_SUITS):
+                    if sum(split) != cards:
+                        continue
+                    counts = [suits[s] + (split[s],) for s in range(NUM_SUITS)]
+                    if all(sum(c) <= NUM_RANKS for c in counts):
+                        next_candidates.add(tuple(sorted(counts, reverse=True)))
+            candidates = next_candidates
+
+        configurations = []
+        offset = 0
+        for counts in sorted(candidates, reverse=True):
+            configuration = _Configuration(counts, offset)
+            configurations.append(configuration)
+            offset += configuration.size
+        return configurations
+
+    def size(self, round_: int) -> int:
+        """round_ 番目のラウンドまでの正規インデックスの数"""
+        last = self._configurations[round_][-1]
+        return last.offset + last.size
+
+    def start(self) -> "IsomorphicHand":
+        """ラウンドごとにカードを加えていく IsomorphicHand を作る"""
+        return IsomorphicHand(self)
+
+    def index(self, rounds: Sequence[Iterable]) -> int:
+        """
+        ラウンドごとのカード（Card またはカード番号）から、最後のラウンドの正規インデックスを求める
+
+        Args:
+            rounds: [[ホールカード], [フロップ], ...] のようにラウンドごとに分けたカード
+        """
+        hand = IsomorphicHand(self)
+        for cards in rounds:
+            hand.deal(cards)
+        return hand.index
+
+    def unindex(self, round_: int, index: int) -> List[List[int]]:
+        """
+        正規インデックスから代表のカード（ラウンドごとのカード番号のリスト）を求める
+
+        代表のカードは、index で同じインデックスになるハンドのうちの1つ。
+        """
+        if not 0 <= index < self.size(round_):
+            raise ValueError(f"インデックスが範囲外です: {index}")
+        offsets = self._offsets[round_]
+        configuration = self._configurations[round_][bisect_right(offsets, index) - 1]
+        index -= configuration.offset
+
+        # 配置の中の番号をスートのまとまりごとに分解（後ろのまとまりほど下位の桁）
+        values = [0] * NUM_SUITS
+        for start, k, suit_size in reversed(configuration.groups):
+            index, group_index = divmod(index, comb(suit_size + k - 1, k))
+            # index() と同じく、まとまりの中では値の大きいスートを先にする
+            for i, value in enumerate(reversed(_unrank_multiset(group_index, k))):
+                values[start + i] = value
+
+        cards: List[List[int]] = [[] for _ in range(round_ + 1)]
+        for suit in range(NUM_SUITS):
+            counts = configuration.counts[suit]
+            sizes = []
+            used = 0
+            for count in counts:
+                sizes.append(comb(NUM_RANKS - used, count))
+                used += count
+            value = values[suit]
+            rank_indexes = []
+            for size in reversed(sizes):
+                value, rank_index = divmod(value, size)
+                rank_indexes.append(rank_index)
+            rank_indexes.reverse()
+
+            used = 0
+            for r, (count, rank_index) in enumerate(zip(counts, rank_indexes)):
+                ranks = _unrank_rank_set(rank_index, count, used)
+                used |= ranks
+                cards[r].extend(rank * 4 + suit for rank in range(NUM_RANKS) if ranks >> rank & 1)
+        return [sorted(round_cards) for round_cards in cards]
+
+    def canonicalize(self, rounds: Sequence[Iterable]) -> List[List[int]]:
+        """ハンドを代表のカードに変換（スートの入れ替えで同じハンドは同じ結果になる）"""
+        hand = IsomorphicHand(self)
+        for cards in rounds:
+            hand.deal(cards)
+        return self.unindex(hand.round, hand.index)
+
+
+class IsomorphicHand:
+    """
+    ラウンドごとにカードを加えながら正規インデックスを求める状態
+
+    スートごとに「ラウンドごとの枚数」と「ランクの選び方の番号」を保持しておき、
+    新しいラウンドでは加わったカードの分だけ計算する。
+    """
+
+    __slots__ = ("indexer", "round", "_counts", "_values", "_used", "index")
+
+    def __init__(self, indexer: HandIndexer):
+        self.indexer = indexer
+        self.round = -1  # 最後に加えたラウンド
+        self._counts: List[Tuple[int, ...]] = [()] * NUM_SUITS
+        self._values = [0] * NUM_SUITS
+        self._used = [0] * NUM_SUITS  # スートごとの使用済みランク（13ビット）
+        self.index = 0
+
+    def copy(self) -> "IsomorphicHand":
+        """同じ状態のコピー（ボードの候補を試すときに使う）"""
+        hand = IsomorphicHand.__new__(IsomorphicHand)
+        hand.indexer = self.indexer
+        hand.round = self.round
+        hand._counts = list(self._counts)
+        hand._values = list(self._values)
+        hand._used = list(self._used)
+        hand.index = self.index
+        return hand
+
+    def deal(self, cards: Iterable) -> int:
+        """次のラウンドのカードを加えて、そのラウンドの正規インデックスを返す"""
+        round_ = self.round + 1
+        indexer = self.indexer
+        if round_ >= indexer.rounds:
+            raise ValueError("すべてのラウンドが配り終わっています")
+
+        ranks = [0] * NUM_SUITS
+        total = 0
+        for card in cards:
+            card_id = _card_id(card)
+            suit, bit = card_id & 3, 1 << (card_id >> 2)
+            if (ranks[suit] | self._used[suit]) & bit:
+                raise ValueError("同じカードが含まれています")
+            ranks[suit] |= bit
+            total += 1
+        if total != indexer.cards_per_round[round_]:
+            raise ValueError(
+                f"{round_ + 1}番目のラウンドのカードは{indexer.cards_per_round[round_]}枚必要です")
+
+        counts, values, used = self._counts, self._values, self._used
+        for suit in range(NUM_SUITS):
+            count = bin(ranks[suit]).count("1")
+            # ラウンドを下位の桁として値を伸ばす
+            values[suit] = (values[suit] * comb(NUM_RANKS - bin(used[suit]).count("1"), count)
+                            + _rank_set_index(ranks[suit], used[suit]))
+            counts[suit] = counts[suit] + (count,)
+            used[suit] |= ranks[suit]
+        self.round = round_
+        self.index = self._compute_index()
+        return self.index
+
+    def _compute_index(self) -> int:
+        # スートを (枚数の組, 値) の降順に並べたものが正規形
+        order = sorted(zip(self._counts, self._values), reverse=True)
+        configuration = self.indexer._configuration_map[self.round][tuple(c for c, _ in order)]
+        index = 0
+        for start, k, suit_size in configuration.groups:
+            group_values = sorted(value for _, value in order[start:start + k])
+            index = index * comb(suit_size + k - 1, k) + _multiset_index(group_values)
+        return configuration.offset + index
+
+
+HOLDEM = HandIndexer(HOLDEM_ROUNDS)
+
+
+def _split_rounds(hole_cards: Sequence, board: Sequence) -> List[Sequence]:
+    if len(board) not in _BOARD_ROUND:
+        raise ValueError("ボードは0・3・4・5枚のいずれかで指定してください")
+    rounds = [hole_cards]
+    if board:
+        rounds.append(board[:3])
+        rounds.extend([card] for card in board[3:])
+    return rounds
+
+
+def canonical_index(hole_cards: Sequence, board: Sequence = ()) -> int:
+    """ホールカード2枚とボード（0・3・4・5枚）の正規インデックス（ストリートごとに別の連番）"""
+    return HOLDEM.index(_split_rounds(hole_cards, board))
+
+
+def canonical_key(hole_cards: Sequence, board: Sequence = ()) -> Tuple[int, int]:
+    """キャッシュのキーに使う (ボードの枚数, 正規インデックス)"""
+    return len(board), canonical_index(hole_cards, board)
+
+
+def canonical_cards(index: int, board_size: int = 0) -> Tuple[List[int], List[int]]:
+    """正規インデックスから代表の (ホールカード, ボード) をカード番号で求める"""
+    if board_size not in _BOARD_ROUND:
+        raise ValueError("ボードは0・3・4・5枚のいずれかで指定してください")
+    rounds = HOLDEM.unindex(_BOARD_ROUND[board_size], index)
+    return rounds[0], [card_id for cards in rounds[1:] for card_id in cards]
@@ -0,0 +1,129 @@
+"""
+モンテカルロ木探索（MCTS）によるアクションの選択
+
+GameState を determinize（相手のホールカードと未公開のカードを無作為に決め直す）してから
+木をたどり、まだ試していないアクションを1つ展開して、残りを軽いロールアウトで最後まで進める。
+終局の損益を、たどったノードに「そのアクションを選んだ席」の視点で加える。
+木はアクションの列だけで分岐する（配られるカードは反復ごとに違ってよい）。
+
+局面は複製せず、1回の反復で apply した手数だけ undo して根の状態に戻す。
+アクションは fold / check・call / 数種類の額の raise（最小、ポットの半分、ポット、オールイン）に絞る。
+"""
+import math
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from game_state import GameState
+
+Action = Tuple[str, int]
+
+
+class Node:
+    """探索木のノード（seat はこのノードに進むアクションを選んだ席）"""
+
+    __slots__ = ("seat", "visits", "value", "children")
+
+    def __init__(self, seat: Optional[int]):
+        self.seat = seat
+        self.visits = 0
+        self.value = 0.0  # seat から見た損益の合計（平均的なスタックを1とした値）
+        self.children: Dict[Action, "Node"] = {}
+
+
+def candidate_actions(state: GameState) -> List[Action]:
+    """探索で試すアクション（'raise' の額はコール額への上乗せ分）"""
+    seat = state.current
+    to_call = state.to_call(seat)
+    if to_call > 0:
+        actions = [('fold', 0), ('call', to_call)]
+    else:
+        actions = [('check', 0)]
+    if state.can_raise(seat):
+        available = state.chips[seat] - to_call
+        low = min(state.min_raise, available)
+        pot = state.pot + to_call
+        amounts = {low, available, max(low, min(pot // 2, available)), max(low, min(pot, available))}
+        actions.extend(('raise', amount) for amount in sorted(amounts))
+    return actions
+
+
+def rollout_action(state: GameState, rng: random.Random) -> Action:
+    """ロールアウトのアクション（軽さを優先した無作為な方策）"""
+    seat = state.current
+    to_call = state.to_call(seat)
+    decision = rng.random()
+    if to_call > 0 and decision < 0.25:
+        return ('fold', 0)
+    if decision < 0.9 or not state.can_raise(seat):
+        return ('call', to_call) if to_call > 0 else ('check', 0)
+    return ('raise', min(state.min_raise, state.chips[seat] - to_call))
+
+
+def search(state: GameState, observer: int, time_budget: Optional[float] = 0.05,
+           max_iterations: Optional[int] = None, exploration: float = 1.0,
+           rng: Optional[random.Random] = None) -> Node:
+    """
+    observer の視点で探索して、根のノードを返す
+
+    Args:
+        state: 探索する局面（observer の手番。探索後も同じ局面に戻る）
+        time_budget: 探索を打ち切る秒数（None なら max_iterations まで）
+        max_iterations: 反復回数の上限（None なら time_budget まで）
+        exploration: UCB1 の探索の重み
+    """
+    if time_budget is None and max_iterations is None:
+        raise ValueError("time_budget か max_iterations を指定してください")
+    rng = rng or random.Random()
+    # 損益は平均的なスタックを1として UCB1 に渡す
+    scale = (state.pot + sum(state.chips)) / state.num_seats
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+    root = Node(None)
+
+    while max_iterations is None or root.visits < max_iterations:
+        if deadline is not None and root.visits and time.perf_counter() >= deadline:
+            break
+        state.determinize(observer, rng)
+        node = root
+        path: List[Node] = []
+        depth = 0
+
+        # 選択と展開
+        while not state.terminal:
+            actions = candidate_actions(state)
+            untried = [action for action in actions if action not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                child = node.children[action] = Node(state.current)
+                state.apply(*action)
+                depth += 1
+                path.append(child)
+                break
+            log_visits = math.log(node.visits)
+            children = node.children
+            action = max(actions, key=lambda a: children[a].value / children[a].visits +
+                         exploration * math.sqrt(log_visits / children[a].visits))
+            node = children[action]
+            state.apply(*action)
+            depth += 1
+            path.append(node)
+
+        # ロールアウト
+        while not state.terminal:
+            state.apply(*rollout_action(state, rng))
+            depth += 1
+
+        payoffs = state.payoffs()
+        root.visits += 1
+        for node in path:
+            node.visits += 1
+            node.value += payoffs[node.seat] / scale
+        for _ in range(depth):
+            state.undo()
+
+    return root
+
+
+def most_visited(root: Node) -> Action:
+    """最も多く試されたアクション"""
+    return max(root.children, key=lambda action: root.children[action].visits)
@@ -2,29 +2,70 @@
 プレイヤーを管理するモジュール
 """
 from typing import List, Optional
-from card import Card
+from card import Card, mask_to_cards
+from equity import EquityCache, equity_vs_random
+from hand_evaluator import IncrementalHand
+import isomorphism
+from isomorphism import canonical_key
+from game_state import GameState
+from mcts import most_visited, search
+from variants import HOLDEM
 import random
 
 
 class Player:
     """ポーカープレイヤーの基底クラス"""
 
+    # 対応しているバリアント（None ならすべて）
+    supported_variants: Optional[tuple] = None
+
     def __init__(self, name: str, chips: int = 1000):
         self.name = name
         self.chips = chips
         self.hand: List[Card] = []
+        # ホールカードとコミュニティカードの評価状態（ゲームとAIで共有する）
+        self.hand_state: Optional[IncrementalHand] = None
+        # フォールドしていない相手の人数（アクションを求める前にゲームが設定する）
+        self.live_opponents = 0
+        # 参加しているゲーム（ハンドの開始時にゲームが設定する。局面全体を見るAIが使う）
+        self.game = None
         self.current_bet = 0
         self.folded = False
         self.all_in = False
 
-    def receive_cards(self, cards: List[Card]):
-        """カードを受け取る"""
+    def decision_rng(self):
+        """AIの判断に使う乱数（ゲームに参加していればテーブルの乱数、いなければグローバルな乱数）"""
+        return self.game.rng if self.game is not None else random
+
+    def can_raise(self) -> bool:
+        """いまレイズできる（進行中のベッティングラウンドの legal_actions に 'raise' がある）"""
+        betting = self.game.betting if self.game is not None else None
+        return betting is None or 'raise' in betting.legal_actions(self)
+
+    def check_variant(self, variant):
+        """バリアントに対応していなければ ValueError"""
+        if self.supported_variants is not None and variant not in self.supported_variants:
+            raise ValueError(f"{self.name}（{type(self).__name__}）は"
+                             f"{variant.display}に対応していません")
+
+    def receive_cards(self, cards: List[Card], hand_state=None):
+        """
+        カードを受け取る
+
+        hand_state はバリアントの評価状態（省略するとテキサスホールデムの IncrementalHand）
+        """
         self.hand = cards
+        self.hand_state = hand_state if hand_state is not None else IncrementalHand(cards)
+
+    def see_community_card(self, card: Card):
+        """公開されたコミュニティカードを評価状態に加える"""
+        if self.hand_state is not None:
+            self.hand_state.add(card)
 
     def bet(self, amount: int) -> int:
         """ベットする"""
-        if amount > self.chips:
-            # オールイン
+        if amount >= self.chips:
+            # オールイン（ちょうど全額を出した場合も含む）
             actual_bet = self.chips
             self.chips = 0
             self.all_in = True
@@ -42,6 +83,7 @@ class Player:
     def reset_for_new_hand(self):
         """新しいハンドのためにリセット"""
         self.hand = []
+        self.hand_state = None
         self.current_bet = 0
         self.folded = False
         self.all_in = False
@@ -75,53 +117,64 @@ class HumanPlayer(Player):
         print(f"現在のベット: {self.current_bet}")
         print(f"ポット: {pot}")
 
+        can_raise = self.can_raise()
+        raise_choice = ", [r]aise" if can_raise else ""
         while True:
             if to_call == 0:
-                print("\n選択肢: [c]heck, [r]aise, [f]old")
+                print(f"\n選択肢: [c]heck{raise_choice}, [f]old")
                 action = input("アクションを選択してください: ").lower().strip()
 
                 if action == 'c':
                     return ('check', 0)
                 elif action == 'f':
                     return ('fold', 0)
-                elif action == 'r':
-                    try:
-                        amount = int(input(f"レイズ額を入力してください (最小: {min_raise}): "))
-                        if amount < min_raise:
-                            print(f"最小レイズ額は{min_raise}です")
-                            continue
-                        if amount > self.chips:
-                            print(f"チップが足りません。最大: {self.chips}")
-                            continue
-                        return ('raise', amount)
-                    except ValueError:
-                        print("有効な数字を入力してください")
+                elif action == 'r' and can_raise:
+                    amount = self._ask_raise(to_call, min_raise)
+                    if amount is None:
                         continue
+                    return ('raise', amount)
             else:
                 print(f"\nコール額: {to_call}")
-                print("選択肢: [c]all, [r]aise, [f]old")
+                print(f"選択肢: [c]all{raise_choice}, [f]old")
                 action = input("アクションを選択してください: ").lower().strip()
 
                 if action == 'c':
                     return ('call', to_call)
                 elif action == 'f':
                     return ('fold', 0)
-                elif action == 'r':
-                    try:
-                        amount = int(input(f"レイズ額を入力してください (最小: {min_raise}): "))
-                        if amount < min_raise:
-                            print(f"最小レイズ額は{min_raise}です")
-                            continue
-                        if amount + to_call > self.chips:
-                            print(f"チップが足りません。最大: {self.chips}")
-                            continue
-                        return ('raise', amount)
-                    except ValueError:
-                        print("有効な数字を入力してください")
+                elif action == 'r' and can_raise:
+                    amount = self._ask_raise(to_call, min_raise)
+                    if amount is None:
                         continue
+                    return ('raise', amount)
 
             print("無効な入力です。もう一度試してください。")
 
+    def _ask_raise(self, to_call: int, min_raise: int) -> Optional[int]:
+        """
+        レイズ額（コール額への上乗せ分）を入力させる
+
+        ポットリミットではゲームの上限（max_raise）も表示して検証する。
+        範囲外や数字でない入力なら None を返す。
+        """
+        max_raise = self.game.max_raise(self) if self.game is not None else None
+        limit = f"最小: {min_raise}" if max_raise is None else f"最小: {min_raise}, 最大: {max_raise}"
+        try:
+            amount = int(input(f"レイズ額を入力してください ({limit}): "))
+        except ValueError:
+            print("有効な数字を入力してください")
+            return None
+        if amount < min_raise:
+            print(f"最小レイズ額は{min_raise}です")
+            return None
+        if max_raise is not None and amount > max_raise:
+            print(f"ポットリミットの最大レイズ額は{max_raise}です")
+            return None
+        if amount + to_call > self.chips:
+            print(f"チップが足りません。最大: {self.chips}")
+            return None
+        return amount
+
 
 class AIPlayer(Player):
     """コンピューター（AI）プレイヤー"""
@@ -140,15 +193,16 @@ class AIPlayer(Player):
         to_call = current_bet - self.current_bet
 
         # 簡易的な確率ベースの判断
-        decision = random.random()
+        rng = self.decision_rng()
+        decision = rng.random()
 
         if to_call == 0:
             # チェック可能な場合
             if decision < 0.7:
                 return ('check', 0)
-            elif decision < 0.85:
+            elif decision < 0.85 and self.chips >= min_raise and self.can_raise():
                 # レイズ
-                raise_amount = random.randint(min_raise, min(min_raise * 3, self.chips))
+                raise_amount = rng.randint(min_raise, min(min_raise * 3, self.chips))
                 return ('raise', raise_amount)
             else:
                 return ('check', 0)
@@ -162,8 +216,8 @@ class AIPlayer(Player):
                     return ('call', to_call)
                 else:
                     # レイズ
-                    if self.chips > to_call + min_raise:
-                        raise_amount = random.randint(min_raise, min(min_raise * 2, self.chips - to_call))
+                    if self.chips > to_call + min_raise and self.can_raise():
+                        raise_amount = rng.randint(min_raise, min(min_raise * 2, self.chips - to_call))
                         return ('raise', raise_amount)
                     else:
                         return ('call', to_call)
@@ -175,8 +229,184 @@ class AIPlayer(Player):
                     return ('call', to_call)
                 else:
                     # レイズ
-                    if self.chips > to_call + min_raise:
-                        raise_amount = random.randint(min_raise, min(min_raise * 3, self.chips - to_call))
+                    if self.chips > to_call + min_raise and self.can_raise():
+                        raise_amount = rng.randint(min_raise, min(min_raise * 3, self.chips - to_call))
                         return ('raise', raise_amount)
                     else:
                         return ('call', to_call)
+
+
+# 全ての EquityAIPlayer で共有するエクイティのキャッシュ
+EQUITY_CACHE = EquityCache()
+
+
+class EquityAIPlayer(Player):
+    """
+    自分のハンドとボードのエクイティで判断するAIプレイヤー
+
+    フォールドしていない相手の人数に対するエクイティを求め、ポットオッズと比べて
+    フォールド・コール・レイズを決め、エクイティに応じてレイズ額を決める。
+    エクイティはスートの入れ替えで同じ局面をまとめたキーで EQUITY_CACHE に保存するので、
+    同じ局面の2回目以降は辞書を1回引くだけで済む。キーの正規インデックスは
+    カードが配られるたびに IsomorphicHand で差分だけ更新しておく。
+    キーには trials と seed も含めるので、設定の違うプレイヤーの推定値は混ざらない。
+    キャッシュに無い局面も trials 回または time_budget 秒で計算を打ち切る。
+    seed を指定すると局面ごとのシードで trials 回すべて計算し（time_budget は使わない）、
+    同じ局面には同じ推定値を返す。
+    エクイティの計算がテキサスホールデム専用なので、他のバリアントでは使えない。
+    """
+
+    supported_variants = (HOLDEM,)
+
+    def __init__(self, name: str, chips: int = 1000, aggression: float = 0.5,
+                 trials: int = 500, time_budget: Optional[float] = 0.005,
+                 cache: Optional[EquityCache] = None, seed: Optional[int] = None):
+        if trials <= 0:
+            raise ValueError("試行回数は1以上である必要があります")
+        super().__init__(name, chips)
+        self.aggression = aggression  # 0.0(消極的) ~ 1.0(攻撃的)
+        self.trials = trials
+        self.time_budget = time_budget
+        self.cache = cache if cache is not None else EQUITY_CACHE
+        self.seed = seed
+        # ホールカードと配られたボードの正規インデックス（ストリートごとに差分で更新）
+        self.iso_hand: Optional[isomorphism.IsomorphicHand] = None
+        self._iso_board = 0  # iso_hand に加えたボードの枚数
+        self._pending_board: List[Card] = []  # ストリートのカードがそろうまで待つカード
+
+    def receive_cards(self, cards: List[Card], hand_state=None):
+        super().receive_cards(cards, hand_state)
+        self.iso_hand = isomorphism.HOLDEM.start()
+        self.iso_hand.deal(cards)
+        self._iso_board = 0
+        self._pending_board = []
+
+    def see_community_card(self, card: Card):
+        super().see_community_card(card)
+        if self.iso_hand is None:
+            return
+        self._pending_board.append(card)
+        # フロップは3枚そろってから、ターンとリバーは1枚ずつ加える
+        if len(self._pending_board) == (3 if self._iso_board == 0 else 1):
+            self.iso_hand.deal(self._pending_board)
+            self._iso_board += len(self._pending_board)
+            self._pending_board = []
+
+    def reset_for_new_hand(self):
+        super().reset_for_new_hand()
+        self.iso_hand = None
+        self._pending_board = []
+
+    def position_key(self, board: List[Card]) -> tuple:
+        """スートの入れ替えで同じ局面をまとめたキー（canonical_key と同じ値）"""
+        if self.iso_hand is not None and self._iso_board == len(board) and not self._pending_board:
+            return len(board), self.iso_hand.index
+        # 評価状態とボードが合わない（ゲームの外で呼ばれた）ときは最初から求める
+        return canonical_key(self.hand, board)
+
+    def board(self) -> List[Card]:
+        """
+        公開されているコミュニティカード（配られた順）
+
+        キャッシュのキーはフロップ・ターン・リバーを区別するので、配られた順が必要になる。
+        """
+        if self.game is not None:
+            return list(self.game.community_cards)
+        if self.hand_state is None:
+            return []
+        # ゲームの外では配られた順が分からないので、カード番号順で代用する
+        hole_mask = self.hand[0].bit | self.hand[1].bit
+        return mask_to_cards(self.hand_state.card_mask & ~hole_mask)
+
+    def estimate_equity(self) -> float:
+        """フォールドしていない相手全員に対するエクイティ（キャッシュを優先）"""
+        board = self.board()
+        opponents = max(self.live_opponents, 1)
+        key = (self.position_key(board), opponents, self.trials, self.seed)
+        equity = self.cache.get(key)
+        if equity is None:
+            # シードがあれば局面から決めて、同じ局面には同じ推定値を返す
+            seed = None if self.seed is None else hash((self.seed, key))
+            equity = equity_vs_random(self.hand, board, opponents, self.trials,
+                                      seed=seed, time_budget=self.time_budget)
+            self.cache.put(key, equity)
+        return equity
+
+    def decide_action(self, current_bet: int, min_raise: int, pot: int) -> tuple[str, int]:
+        """
+        エクイティとポットオッズからアクションを決定
+
+        Returns:
+            tuple[str, int]: (action, amount)
+        """
+        to_call = current_bet - self.current_bet
+        equity = self.estimate_equity()
+        # 全員が同じ強さのときの取り分（これを上回れば有利）
+        fair_share = 1.0 / (max(self.live_opponents, 1) + 1)
+        # 攻撃的なほど低いエクイティでもレイズする
+        raise_threshold = fair_share + (1.0 - fair_share) * (0.45 - 0.3 * self.aggression)
+
+        if to_call == 0:
+            if equity >= raise_threshold:
+                return self._raise(equity, 0, min_raise, pot)
+            return ('check', 0)
+
+        pot_odds = to_call / (pot + to_call)
+        if equity < pot_odds:
+            # ブラフのレイズ（攻撃的なほど多い）
+            if (self.decision_rng().random() < 0.05 * self.aggression
+                    and self.chips > to_call + min_raise and self.can_raise()):
+                return ('raise', min_raise)
+            return ('fold', 0)
+        if equity >= raise_threshold:
+            return self._raise(equity, to_call, min_raise, pot)
+        return ('call', to_call)
+
+    def _raise(self, equity: float, to_call: int, min_raise: int, pot: int) -> tuple[str, int]:
+        """エクイティが高いほど大きくレイズ（チップが足りなければコールかチェック）"""
+        available = self.chips - to_call
+        if available < min_raise or not self.can_raise():
+            return ('call', to_call) if to_call else ('check', 0)
+        # ポットの 1/3 〜 1倍（エクイティ 1.0 でポット1倍）
+        amount = int((pot + to_call) * (0.33 + 0.67 * equity))
+        return ('raise', min(max(amount, min_raise), available))
+
+
+class MCTSPlayer(Player):
+    """
+    モンテカルロ木探索で判断するAIプレイヤー
+
+    ゲームの局面を GameState に写し、相手のカードを決め直しながら time_budget 秒
+    （または max_iterations 回）探索して、最も多く試されたアクションを選ぶ。
+    GameState がテキサスホールデム専用なので、他のバリアントでは使えない。
+    """
+
+    supported_variants = (HOLDEM,)
+
+    def __init__(self, name: str, chips: int = 1000, time_budget: Optional[float] = 0.05,
+                 max_iterations: Optional[int] = None, exploration: float = 1.0,
+                 seed: Optional[int] = None):
+        super().__init__(name, chips)
+        self.time_budget = time_budget
+        self.max_iterations = max_iterations
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.last_iterations = 0  # 直前の判断での探索の反復回数
+
+    def decide_action(self, current_bet: int, min_raise: int, pot: int) -> tuple[str, int]:
+        """
+        探索でアクションを決定
+
+        Returns:
+            tuple[str, int]: (action, amount)
+        """
+        to_call = current_bet - self.current_bet
+        if self.game is None or self.game.betting is None:
+            # 局面が分からなければチェックかコール
+            return ('call', to_call) if to_call > 0 else ('check', 0)
+
+        state = GameState.from_game(self.game, self)
+        root = search(state, state.current, self.time_budget, self.max_iterations,
+                      self.exploration, self.rng)
+        self.last_iterations = root.visits
+        return most_visited(root)
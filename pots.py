@@ -0,0 +1,100 @@
+"""
+ポットの記録と分配（サイドポット）
+
+ハンド中に各プレイヤーがポットに入れた額を記録し、ショーダウンでは
+投入額の順に1度だけ並べ替えてメインポットとサイドポットに分ける。
+各ポットは、そのポットに資格のある（フォールドしておらず、その額まで出している）
+プレイヤーのうち役の強さ（整数）が最大のプレイヤーで分ける。
+割り切れない端数のチップは、ディーラーボタンの次の席から時計回りに数えて
+最初の勝者から順に1枚ずつ配る。
+"""
+from typing import Dict, List, Sequence
+
+from player import Player
+
+
+class Pot:
+    """メインポットまたはサイドポット"""
+
+    def __init__(self, amount: int, eligible: List[Player]):
+        self.amount = amount
+        self.eligible = eligible  # このポットを獲得できるプレイヤー
+
+    def __repr__(self) -> str:
+        return f"Pot({self.amount}, {[p.name for p in self.eligible]})"
+
+
+class PotLedger:
+    """1ハンドの間の、プレイヤーごとのポットへの投入額"""
+
+    def __init__(self, players: Sequence[Player]):
+        self.players = list(players)
+        self._seat = {p: i for i, p in enumerate(self.players)}
+        self.contributions = [0] * len(self.players)
+        self.total = 0
+
+    def add(self, player: Player, amount: int):
+        """ポットに入れた額を記録"""
+        self.contributions[self._seat[player]] += amount
+        self.total += amount
+
+    def contribution(self, player: Player) -> int:
+        """このハンドでポットに入れた額"""
+        return self.contributions[self._seat[player]]
+
+    def build_pots(self) -> List[Pot]:
+        """
+        メインポットとサイドポットを作る（最初がメインポット）
+
+        投入額の少ない順に並べ、フォールドしていないプレイヤーの投入額ごとに区切る。
+        フォールドしたプレイヤーの投入額は、届いている範囲のポットに含める。
+        """
+        contributions = self.contributions
+        order = sorted(range(len(self.players)), key=contributions.__getitem__)
+        live = [seat for seat in order if not self.players[seat].folded]
+
+        pots: List[Pot] = []
+        pending = 0  # まだどのポットにも入れていない額
+        previous = 0
+        live_index = 0
+        for position, seat in enumerate(order):
+            level = contributions[seat]
+            # previous から level までの層は、ここから後ろの全員が出している
+            pending += (level - previous) * (len(order) - position)
+            previous = level
+            if self.players[seat].folded:
+                continue
+            if pending:
+                pots.append(Pot(pending, [self.players[s] for s in live[live_index:]]))
+                pending = 0
+            live_index += 1
+
+        # フォールドしたプレイヤーが、残ったプレイヤーの誰よりも多く出していた分
+        if pending:
+            if pots:
+                pots[-1].amount += pending
+            else:
+                pots.append(Pot(pending, [self.players[s] for s in live]))
+        return pots
+
+    def award(self, strengths: Dict[Player, int], button: int) -> Dict[Player, int]:
+        """
+        各ポットを分配して、プレイヤーごとの獲得額を返す（チップは動かさない）
+
+        Args:
+            strengths: ショーダウンに参加したプレイヤーの役の強さ
+            button: ディーラーボタンの席（端数のチップを配る順番の基準）
+        """
+        num_seats = len(self.players)
+        winnings: Dict[Player, int] = {}
+        for pot in self.build_pots():
+            best = max(strengths[p] for p in pot.eligible)
+            winners = [p for p in pot.eligible if strengths[p] == best]
+            share, odd = divmod(pot.amount, len(winners))
+            for player in winners:
+                winnings[player] = winnings.get(player, 0) + share
+            if odd:
+                winners.sort(key=lambda p: (self._seat[p] - button - 1) % num_seats)
+                for player in winners[:odd]:
+                    winnings[player] += 1
+        return winnings
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+プリフロップのエクイティ表を生成・参照するモジュール
+
+169種類のスターティングハンド（AA, AKs, AKo ...）同士のヘッズアップの勝率・引き分け率と、
+各ハンドが N 人のランダムな相手に対して持つエクイティを事前に計算してファイルに保存する。
+保存したファイルは mmap で開くので、プロセスごとの起動コストやメモリ消費はほぼ無い。
+
+生成（NumPy が必要）:
+    python3 preflop.py --trials 2000 --opponents 9
+
+ファイル形式（リトルエンディアン）:
+    ヘッダ 16バイト: マジック "PFEQ", バージョン(u16), クラス数(u16),
+                     相手人数の上限(u16), 予約(u16), 1組あたりの試行数(u32)
+    float32[169 * 169]            ヘッズアップの勝率
+    float32[169 * 169]            ヘッズアップの引き分け率
+    float32[169 * 相手人数の上限]  N人のランダムな相手に対するエクイティ
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from card import Card
+from hand_evaluator import HandEvaluator
+
+NUM_CLASSES = 169
+TABLE_VERSION = 1
+TABLE_MAGIC = b"PFEQ"
+_HEADER = struct.Struct("<4sHHHHI")
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_equity.bin")
+
+_RANK_CHARS = "23456789TJQKA"
+
+
+# ---------------------------------------------------------------------------
+# スターティングハンドのクラス
+#
+# 13×13 のグリッドで表す（AA が 0、22 が 168）。
+# 対角線がペア、右上がスーテッド、左下がオフスート。
+# ---------------------------------------------------------------------------
+
+def class_index(high: int, low: int, suited: bool) -> int:
+    """ランク番号（0=2 〜 12=A、high >= low）とスーテッドかどうかからクラス番号を求める"""
+    if suited:
+        return (12 - high) * 13 + (12 - low)
+    return (12 - low) * 13 + (12 - high)
+
+
+def hand_class(card1: Card, card2: Card) -> int:
+    """ホールカード2枚のクラス番号（0〜168）"""
+    return hand_class_from_ids(card1.id, card2.id)
+
+
+def hand_class_from_ids(card_id1: int, card_id2: int) -> int:
+    """カード番号2つのクラス番号（0〜168）"""
+    rank1, rank2 = card_id1 >> 2, card_id2 >> 2
+    if rank1 < rank2:
+        rank1, rank2 = rank2, rank1
+    return class_index(rank1, rank2, (card_id1 & 3) == (card_id2 & 3))
+
+
+def class_name(index: int) -> str:
+    """クラス番号を "AKs" のような表記に変換"""
+    row, col = divmod(index, 13)
+    if row == col:
+        return _RANK_CHARS[12 - row] * 2
+    if row < col:
+        return _RANK_CHARS[12 - row] + _RANK_CHARS[12 - col] + "s"
+    return _RANK_CHARS[12 - col] + _RANK_CHARS[12 - row] + "o"
+
+
+def class_combos(index: int) -> List[Tuple[int, int]]:
+    """クラスに属する具体的なホールカード（カード番号の組）を列挙"""
+    row, col = divmod(index, 13)
+    high, low = 12 - min(row, col), 12 - max(row, col)
+    combos = []
+    for suit1 in range(4):
+        for suit2 in range(4):
+            card1, card2 = high * 4 + suit1, low * 4 + suit2
+            if row == col:
+                if suit1 < suit2:
+                    combos.append((card1, card2))
+            elif (suit1 == suit2) == (row < col):
+                combos.append((card1, card2))
+    return combos
+
+
+# ---------------------------------------------------------------------------
+# 表の生成（NumPy で多数の試行をまとめて評価する）
+# ---------------------------------------------------------------------------
+
+def draw_cards(np, rng, used, count: int):
+    """
+    各行で使用済み（used のビット）以外のカードを count 枚ずつ引く
+
+    Args:
+        np: numpy モジュール（NumPy を必要なときだけ読み込むため引数で渡す）
+        rng: numpy.random.Generator
+        used: 行ごとの使用済みカードのビットマスク（int64 配列）。引いたカードのビットも加える
+        count: 1行あたりに引く枚数
+
+    Returns:
+        形状 (行数, count) のカード番号の配列
+    """
+    out = np.empty((len(used), count), dtype=np.int64)
+    for j in range(count):
+        cards = rng.integers(0, 52, size=len(used))
+        clash = ((used >> cards) & 1).astype(bool)
+        while clash.any():
+            cards[clash] = rng.integers(0, 52, size=int(clash.sum()))
+            clash = ((used >> cards) & 1).astype(bool)
+        used |= np.left_shift(1, cards)
+        out[:, j] = cards
+    return out
+
+
+def _pick_combos(np, rng, combos, counts, classes):
+    """各行のクラスからホールカードをランダムに1組選ぶ"""
+    picks = (rng.random(len(classes)) * counts[classes]).astype(np.int64)
+    return combos[classes, picks]
+
+
+def _padded_combos(np):
+    combos = np.zeros((NUM_CLASSES, 12, 2), dtype=np.int64)
+    counts = np.zeros(NUM_CLASSES, dtype=np.int64)
+    for index in range(NUM_CLASSES):
+        class_list = class_combos(index)
+        combos[index, :len(class_list)] = class_list
+        counts[index] = len(class_list)
+    return combos, counts
+
+
+def _heads_up_row(hero: int, trials: int, seed: int):
+    """hero クラスと、hero 以降の各クラスとのヘッズアップの勝率・引き分け率"""
+    import numpy as np
+
+    rng = np.random.default_rng([seed, hero])
+    combos, counts = _padded_combos(np)
+    villains = np.repeat(np.arange(hero, NUM_CLASSES), trials)
+    rows = len(villains)
+
+    hero_cards = _pick_combos(np, rng, combos, counts, np.full(rows, hero))
+    villain_cards = _pick_combos(np, rng, combos, counts, villains)
+    # カードが重なった行は相手のホールカードを選び直す
+    clash = ((hero_cards[:, :, None] == villain_cards[:, None, :]).any(axis=(1, 2)))
+    while clash.any():
+        villain_cards[clash] = _pick_combos(np, rng, combos, counts, villains[clash])
+        clash = ((hero_cards[:, :, None] == villain_cards[:, None, :]).any(axis=(1, 2)))
+
+    used = np.zeros(rows, dtype=np.int64)
+    for cards in (hero_cards, villain_cards):
+        used |= np.left_shift(1, cards[:, 0]) | np.left_shift(1, cards[:, 1])
+    board = draw_cards(np, rng, used, 5)
+
+    # 使用済みのカードを除いて配っているので、重複の確認は省く
+    hero_strength = HandEvaluator.evaluate_batch(np.concatenate([hero_cards, board], axis=1),
+                                                 validate=False)
+    villain_strength = HandEvaluator.evaluate_batch(np.concatenate([villain_cards, board], axis=1),
+                                                    validate=False)
+    wins = (hero_strength > villain_strength).reshape(-1, trials).mean(axis=1)
+    ties = (hero_strength == villain_strength).reshape(-1, trials).mean(axis=1)
+    return hero, wins, ties
+
+
+def _vs_random_row(hero: int, max_opponents: int, trials: int, seed: int):
+    """hero クラスが 1〜max_opponents 人のランダムな相手に対して持つエクイティ"""
+    import numpy as np
+
+    rng = np.random.default_rng([seed, NUM_CLASSES + hero])
+    combos, counts = _padded_combos(np)
+    hero_cards = _pick_combos(np, rng, combos, counts, np.full(trials, hero))
+    used = np.left_shift(1, hero_cards[:, 0]) | np.left_shift(1, hero_cards[:, 1])
+    board = draw_cards(np, rng, used, 5)
+    opponents = draw_cards(np, rng, used, 2 * max_opponents)
+
+    # 使用済みのカードを除いて配っているので、重複の確認は省く
+    hero_strength = HandEvaluator.evaluate_batch(np.concatenate([hero_cards, board], axis=1),
+                                                 validate=False)
+    equities = np.empty(max_opponents, dtype=np.float64)
+    best_other = np.zeros(trials, dtype=np.int64)  # 相手の中で最も強い役
+    num_best = np.zeros(trials, dtype=np.int64)  # その役を持つ相手の人数
+    for n in range(max_opponents):
+        strength = HandEvaluator.evaluate_batch(
+            np.concatenate([opponents[:, 2 * n:2 * n + 2], board], axis=1), validate=False)
+        num_best = np.where(strength > best_other, 1, num_best + (strength == best_other))
+        best_other = np.maximum(best_other, strength)
+        share = np.where(hero_strength > best_other, 1.0,
+                         np.where(hero_strength == best_other, 1.0 / (num_best + 1), 0.0))
+        equities[n] = share.mean()
+    return hero, equities
+
+
+def build_table(path: str = DEFAULT_TABLE_PATH, trials: int = 2000, max_opponents: int = 9,
+                seed: int = 0, workers: Optional[int] = None):
+    """
+    プリフロップのエクイティ表を生成してファイルに書き込む（NumPy が必要）
+
+    Args:
+        path: 出力ファイル
+        trials: クラスの組ごとの試行数
+        max_opponents: ランダムな相手の人数の上限（0 ならヘッズアップ表のみ）
+        seed: 乱数シード
+        workers: プロセス数（None でCPU数）
+    """
+    import numpy as np
+
+    wins = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.float32)
+    ties = np.zeros((NUM_CLASSES, NUM_CLASSES), dtype=np.float32)
+    vs_random = np.zeros((NUM_CLASSES, max_opponents), dtype=np.float32)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_heads_up_row, hero, trials, seed)
+                   for hero in range(NUM_CLASSES)]
+        if max_opponents:
+            futures += [executor.submit(_vs_random_row, hero, max_opponents, trials, seed)
+                        for hero in range(NUM_CLASSES)]
+        for future in futures:
+            result = future.result()
+            if len(result) == 3:
+                hero, row_wins, row_ties = result
+                wins[hero, hero:] = row_wins
+                ties[hero, hero:] = row_ties
+                # 逆向きの対戦は勝ちと負けを入れ替えるだけ
+                wins[hero + 1:, hero] = 1.0 - row_wins[1:] - row_ties[1:]
+                ties[hero + 1:, hero] = row_ties[1:]
+            else:
+                hero, equities = result
+                vs_random[hero] = equities
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, NUM_CLASSES, max_opponents, 0, trials))
+        f.write(wins.astype("<f4").tobytes())
+        f.write(ties.astype("<f4").tobytes())
+        f.write(vs_random.astype("<f4").tobytes())
+    os.replace(temp_path, path)
+
+
+# ---------------------------------------------------------------------------
+# 表の参照
+# ---------------------------------------------------------------------------
+
+class PreflopTable:
+    """mmap で開いたプリフロップのエクイティ表"""
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, num_classes, max_opponents, _, trials = _HEADER.unpack_from(self._mmap)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or num_classes != NUM_CLASSES:
+            self._mmap.close()
+            raise ValueError(f"プリフロップ表の形式が違います: {path}")
+        if sys.byteorder != "little":
+            self._mmap.close()
+            raise ValueError("プリフロップ表はリトルエンディアン環境でのみ読み込めます")
+
+        self.max_opponents = max_opponents
+        self.trials = trials
+        size = NUM_CLASSES * NUM_CLASSES
+        self._view = memoryview(self._mmap)
+        values = self._view[_HEADER.size:].cast("f")
+        self._values = values
+        self._wins = values[:size]
+        self._ties = values[size:2 * size]
+        self._vs_random = values[2 * size:2 * size + NUM_CLASSES * max_opponents]
+
+    def heads_up(self, hero: int, villain: int) -> Tuple[float, float]:
+        """クラス同士のヘッズアップの (勝率, 引き分け率)"""
+        index = hero * NUM_CLASSES + villain
+        return self._wins[index], self._ties[index]
+
+    def heads_up_equity(self, hero: int, villain: int) -> float:
+        """クラス同士のヘッズアップのエクイティ（引き分けは半分）"""
+        win, tie = self.heads_up(hero, villain)
+        return win + tie / 2
+
+    def vs_random(self, hero: int, num_opponents: int) -> float:
+        """num_opponents 人のランダムなハンドに対するエクイティ"""
+        if not 1 <= num_opponents <= self.max_opponents:
+            raise ValueError(f"相手の人数は1〜{self.max_opponents}人で指定してください")
+        return self._vs_random[hero * self.max_opponents + num_opponents - 1]
+
+    def close(self):
+        """ファイルを閉じる"""
+        self._wins.release()
+        self._ties.release()
+        self._vs_random.release()
+        self._values.release()
+        self._view.release()
+        self._mmap.close()
+
+
+_tables: Dict[str, PreflopTable] = {}
+
+
+def load_table(path: str = DEFAULT_TABLE_PATH) -> Optional[PreflopTable]:
+    """
+    表を開く（開いた表はプロセス内で使い回す）。ファイルが無ければ None
+
+    ファイルが無かったことは覚えないので、後から生成した表も次の呼び出しで開ける。
+    """
+    table = _tables.get(path)
+    if table is None and os.path.exists(path):
+        table = _tables[path] = PreflopTable(path)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="プリフロップのエクイティ表を生成します")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH, help="出力ファイル")
+    parser.add_argument("--trials", type=int, default=2000, help="クラスの組ごとの試行数")
+    parser.add_argument("--opponents", type=int, default=9, help="ランダムな相手の人数の上限")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数")
+    args = parser.parse_args()
+
+    build_table(args.output, args.trials, args.opponents, args.seed, args.workers)
+    print(f"プリフロップ表を書き込みました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""
+ハンドレンジ同士のエクイティ（NumPy が必要）
+
+レンジは "QQ+, AKs, 76s-54s, AhKh, KQo:0.5" のような表記で書き、具体的なホールカード
+（コンボ）と重みの集合に展開する。表記のクラス名（AA, AKs, AKo ...）は preflop.py と同じ。
+
+    QQ+        QQ, KK, AA                 99-66      99, 88, 77, 66
+    ATs+       ATs, AJs, AQs, AKs         KTs-K7s    KTs, K9s, K8s, K7s
+    76s-54s    76s, 65s, 54s              AK         AKs と AKo
+    AhKh       コンボ1つ                  表記:重み  重み（省略すると 1）
+
+range_equity はボード（ランアウト）ごとに、両方のレンジに出てくるコンボの役の強さを
+まとめて1度だけ評価し、全ての組み合わせで共有する。カードの重なりは 52ビットのマスクで判定し、
+「相手のコンボのうち自分より弱いものの重み」は、相手のコンボを強さの順に並べた累積和から、
+自分のカードを含むコンボの分（カードごとの累積和）を引いて求める。
+1つのボードあたりの計算量はコンボ数の積ではなく (コンボ数) × log(コンボ数) になる。
+"""
+import random
+import re
+from itertools import combinations
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from card import Card, parse_card
+from equity import EXACT_ENUMERATION_LIMIT
+from hand_evaluator import HandEvaluator
+from preflop import class_combos, class_index
+
+Combo = Tuple[int, int]  # カード番号の組（大きい方が先）
+
+_RANKS = "23456789TJQKA"
+_COMBO_PATTERN = re.compile(r"^([2-9TJQKA][hdcs♥♦♣♠]){2}$", re.IGNORECASE)
+_HAND_PATTERN = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([so]?)(\+?)$", re.IGNORECASE)
+
+_STRENGTH_BITS = 25  # 役の強さ（category << 20 | キッカー）が収まるビット数
+BOARD_BATCH_ROWS = 100_000  # 1回にまとめて評価する (ボード × コンボ) の行数の目安
+
+
+def _combo(card_id1: int, card_id2: int) -> Combo:
+    return (card_id1, card_id2) if card_id1 > card_id2 else (card_id2, card_id1)
+
+
+class HandRange:
+    """重み付きのハンドレンジ（コンボ → 重み）"""
+
+    def __init__(self, weights: Optional[Dict[Combo, float]] = None):
+        self.weights: Dict[Combo, float] = {}
+        for (card_id1, card_id2), weight in (weights or {}).items():
+            self.weights[_combo(card_id1, card_id2)] = weight
+
+    @classmethod
+    def parse(cls, text: str) -> "HandRange":
+        """"QQ+, AKs, 76s-54s" のような表記からレンジを作る"""
+        hand_range = cls()
+        for token in text.split(","):
+            token = token.strip()
+            if not token:
+                continue
+            weight = 1.0
+            if ":" in token:
+                token, weight_text = token.rsplit(":", 1)
+                weight = float(weight_text)
+            for combo in _expand(token.strip()):
+                hand_range.weights[combo] = weight
+        return hand_range
+
+    @property
+    def combos(self) -> List[Combo]:
+        return list(self.weights)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def __contains__(self, combo: Combo) -> bool:
+        return _combo(*combo) in self.weights
+
+    def __repr__(self) -> str:
+        return f"HandRange({len(self)} combos)"
+
+
+def parse_range(text: str) -> HandRange:
+    """レンジの表記を展開（HandRange.parse と同じ）"""
+    return HandRange.parse(text)
+
+
+def _class_combos(high: int, low: int, suffix: str) -> List[Combo]:
+    """ランク番号（0=2 〜 12=A）とスーテッドの指定（'s', 'o', ''）のコンボ"""
+    if high == low:
+        return [_combo(*c) for c in class_combos(class_index(high, low, False))]
+    combos = []
+    if suffix in ("s", ""):
+        combos += [_combo(*c) for c in class_combos(class_index(high, low, True))]
+    if suffix in ("o", ""):
+        combos += [_combo(*c) for c in class_combos(class_index(high, low, False))]
+    return combos
+
+
+def _parse_hand(text: str) -> Tuple[int, int, str, bool]:
+    match = _HAND_PATTERN.match(text)
+    if match is None:
+        raise ValueError(f"レンジの表記が正しくありません: {text}")
+    first, second = _RANKS.index(match.group(1).upper()), _RANKS.index(match.group(2).upper())
+    suffix, plus = match.group(3).lower(), bool(match.group(4))
+    if first < second:
+        first, second = second, first
+    if first == second and suffix:
+        raise ValueError(f"ペアに s / o は付けられません: {text}")
+    return first, second, suffix, plus
+
+
+def _expand(token: str) -> List[Combo]:
+    """表記1つ分のコンボ"""
+    if _COMBO_PATTERN.match(token):
+        card1, card2 = parse_card(token[:2]), parse_card(token[2:])
+        if card1 == card2:
+            raise ValueError(f"同じカードが2枚あります: {token}")
+        return [_combo(card1.id, card2.id)]
+
+    if "-" in token:
+        start_text, end_text = token.split("-", 1)
+        high1, low1, suffix1, plus1 = _parse_hand(start_text.strip())
+        high2, low2, suffix2, plus2 = _parse_hand(end_text.strip())
+        if plus1 or plus2 or suffix1 != suffix2:
+            raise ValueError(f"レンジの表記が正しくありません: {token}")
+        if high1 == low1 and high2 == low2:  # 99-66
+            ranks = range(min(high1, high2), max(high1, high2) + 1)
+            return [c for rank in ranks for c in _class_combos(rank, rank, "")]
+        if high1 == high2:  # KTs-K7s
+            lows = range(min(low1, low2), max(low1, low2) + 1)
+            return [c for low in lows for c in _class_combos(high1, low, suffix1)]
+        if high1 - low1 == high2 - low2:  # 76s-54s
+            gap = high1 - low1
+            highs = range(min(high1, high2), max(high1, high2) + 1)
+            return [c for high in highs for c in _class_combos(high, high - gap, suffix1)]
+        raise ValueError(f"レンジの両端の形がそろっていません: {token}")
+
+    high, low, suffix, plus = _parse_hand(token)
+    if not plus:
+        return _class_combos(high, low, suffix)
+    if high == low:  # QQ+
+        return [c for rank in range(high, 13) for c in _class_combos(rank, rank, "")]
+    # ATs+: キッカーを high の1つ下まで上げる
+    return [c for kicker in range(low, high) for c in _class_combos(high, kicker, suffix)]
+
+
+# ---------------------------------------------------------------------------
+# レンジ同士のエクイティ
+# ---------------------------------------------------------------------------
+
+class RangeEquity:
+    """レンジ同士のエクイティの結果（自分のレンジから見た値）"""
+
+    def __init__(self, win: float, tie: float, total: float, combo_totals: Dict[Combo, tuple],
+                 boards: int, exact: bool):
+        self._win = win
+        self._tie = tie
+        self._total = total
+        self._combo_totals = combo_totals
+        self.boards = boards  # 評価したボードの数
+        self.exact = exact  # 全てのボードを列挙した厳密な値ならTrue
+
+    @property
+    def win(self) -> float:
+        return self._win / self._total if self._total else 0.0
+
+    @property
+    def tie(self) -> float:
+        return self._tie / self._total if self._total else 0.0
+
+    @property
+    def lose(self) -> float:
+        return 1.0 - self.win - self.tie if self._total else 0.0
+
+    @property
+    def equity(self) -> float:
+        """ポットの取り分の期待値（引き分けは半分）"""
+        return self.win + self.tie / 2
+
+    def combo_equity(self) -> Dict[Combo, float]:
+        """自分のレンジのコンボごとの、相手のレンジ全体に対するエクイティ"""
+        return {combo: (win + tie / 2) / total
+                for combo, (win, tie, total) in self._combo_totals.items() if total}
+
+    def __str__(self) -> str:
+        return (f"勝ち {self.win:.1%} / 引き分け {self.tie:.1%} / "
+                f"負け {self.lose:.1%} (エクイティ {self.equity:.1%})")
+
+
+def _to_range(value: Union[str, HandRange]) -> HandRange:
+    return HandRange.parse(value) if isinstance(value, str) else value
+
+
+def _to_card_ids(cards: Union[str, Sequence[Card]]) -> List[int]:
+    if isinstance(cards, str):
+        text = cards.replace(" ", "")
+        return [parse_card(text[i:i + 2]).id for i in range(0, len(text), 2)]
+    return [card.id for card in cards]
+
+
+def _masks(combos: np.ndarray) -> np.ndarray:
+    return np.left_shift(1, combos[:, 0]) | np.left_shift(1, combos[:, 1])
+
+
+def range_equity(hero: Union[str, HandRange], villain: Union[str, HandRange],
+                 board: Union[str, Sequence[Card]] = (),
+                 dead_cards: Union[str, Sequence[Card]] = (),
+                 trials: int = 2_000, seed: Optional[int] = None,
+                 max_enumerations: int = EXACT_ENUMERATION_LIMIT) -> RangeEquity:
+    """
+    hero のレンジが villain のレンジに対して持つエクイティ
+
+    コンボの組は、重みの積に比例し、互いにもボードとも重ならないものだけを数える。
+    残りのボードの配り方が max_enumerations 以下なら全て列挙し、多ければ trials 通りを無作為に配る。
+
+    Args:
+        hero, villain: レンジ（表記の文字列か HandRange）
+        board: 公開済みのコミュニティカード（0〜5枚、Card のリストか "AhKd7c" のような文字列）
+        dead_cards: 山札に無いことが分かっているカード
+    """
+    hero, villain = _to_range(hero), _to_range(villain)
+    board_ids, dead_ids = _to_card_ids(board), _to_card_ids(dead_cards)
+    if len(board_ids) not in (0, 3, 4, 5):
+        raise ValueError("ボードは0・3・4・5枚のいずれかで指定してください")
+    known = 0
+    for card_id in board_ids + dead_ids:
+        if known >> card_id & 1:
+            raise ValueError("同じカードが2回指定されています")
+        known |= 1 << card_id
+
+    # ボードとデッドカードに重なるコンボは最初に除く
+    hero_combos = [c for c, w in hero.weights.items() if w > 0 and not _overlaps(c, known)]
+    villain_combos = [c for c, w in villain.weights.items() if w > 0 and not _overlaps(c, known)]
+    if not hero_combos or not villain_combos:
+        raise ValueError("ボードとデッドカードに重ならないコンボがレンジにありません")
+
+    # 両方のレンジに出てくるコンボは1度だけ評価する
+    union = list(dict.fromkeys(hero_combos + villain_combos))
+    position = {combo: i for i, combo in enumerate(union)}
+    union_cards = np.array(union, dtype=np.int64)
+    hero_index = np.array([position[c] for c in hero_combos], dtype=np.int64)
+    villain_index = np.array([position[c] for c in villain_combos], dtype=np.int64)
+    villain_position = {combo: i for i, combo in enumerate(villain_combos)}
+    hero_same = np.array([villain_position.get(c, -1) for c in hero_combos], dtype=np.int64)
+
+    hero_cards, villain_cards = union_cards[hero_index], union_cards[villain_index]
+    hero_weights = np.array([hero.weights[c] for c in hero_combos], dtype=np.float64)
+    villain_weights = np.array([villain.weights[c] for c in villain_combos], dtype=np.float64)
+
+    deck = [card_id for card_id in range(52) if not known >> card_id & 1]
+    missing = 5 - len(board_ids)
+    exact = comb(len(deck), missing) <= max_enumerations
+    if exact:
+        runouts = np.array(list(combinations(deck, missing)), dtype=np.int64).reshape(-1, missing)
+    else:
+        rng = np.random.default_rng(seed if seed is not None
+                                    else random.SystemRandom().randrange(1 << 32))
+        runouts = np.array([rng.choice(deck, missing, replace=False) for _ in range(trials)],
+                           dtype=np.int64).reshape(-1, missing)
+    boards = np.concatenate([np.tile(np.array(board_ids, dtype=np.int64), (len(runouts), 1)),
+                             runouts], axis=1)
+
+    totals = np.zeros((3, len(hero_combos)), dtype=np.float64)  # 勝ち, 引き分け, 合計
+    batch = max(1, BOARD_BATCH_ROWS // len(union))
+    for start in range(0, len(boards), batch):
+        totals += _board_batch(boards[start:start + batch], union_cards, hero_index,
+                               villain_index, hero_cards, villain_cards, hero_weights,
+                               villain_weights, hero_same)
+
+    combo_totals = {combo: tuple(totals[:, i].tolist()) for i, combo in enumerate(hero_combos)}
+    win, tie, total = totals.sum(axis=1).tolist()
+    return RangeEquity(win, tie, total, combo_totals, len(boards), exact)
+
+
+def _overlaps(combo: Combo, mask: int) -> bool:
+    return bool((mask >> combo[0] & 1) or (mask >> combo[1] & 1))
+
+
+def _board_batch(boards, union_cards, hero_index, villain_index, hero_cards, villain_cards,
+                 hero_weights, villain_weights, hero_same) -> np.ndarray:
+    """
+    ボード B 枚分の、自分のコンボごとの (勝ち, 引き分け, 合計) の重み
+
+    相手のコンボをボードごとに強さの順に並べ、「ボード番号 << 25 | 強さ」のキーで
+    全ボードを1本の配列につなぐので、自分のコンボの位置は searchsorted 1回で求まる。
+    """
+    num_boards, num_union = len(boards), len(union_cards)
+    num_villains = len(villain_index)
+
+    board_masks = np.zeros(num_boards, dtype=np.int64)
+    for j in range(boards.shape[1]):
+        board_masks |= np.left_shift(1, boards[:, j])
+
+    # 役の強さ: ボードごとに、両方のレンジのコンボをまとめて1度だけ評価
+    # （ボードと重なるコンボは重みが 0 になるので、ボードに無いカード2枚で代わりに評価する）
+    hole = np.repeat(union_cards[None], num_boards, axis=0)
+    blocked = (_masks(union_cards)[None] & board_masks[:, None]) != 0
+    free = (board_masks[:, None] >> np.arange(7)) & 1 == 0  # 0〜6 のうち2枚は必ずボードに無い
+    filler = np.argsort(~free, axis=1, kind="stable")[:, :2]
+    hole = np.where(blocked[:, :, None], filler[:, None, :], hole)
+    rows = np.concatenate([hole, np.repeat(boards[:, None], num_union, axis=1)], axis=2)
+    strengths = HandEvaluator.evaluate_batch(rows.reshape(-1, 7)).reshape(num_boards, num_union)
+    hero_live = (_masks(hero_cards)[None] & board_masks[:, None]) == 0
+    villain_live = (_masks(villain_cards)[None] & board_masks[:, None]) == 0
+    hero_w = hero_weights[None] * hero_live               # (B, H)
+    villain_w = villain_weights[None] * villain_live      # (B, V)
+
+    # 相手のコンボを強さの順に並べ、全ボードを1本につなぐ
+    villain_strength = strengths[:, villain_index]
+    order = np.argsort(villain_strength, axis=1, kind="stable")
+    sorted_strength = np.take_along_axis(villain_strength, order, axis=1)
+    sorted_weight = np.take_along_axis(villain_w, order, axis=1).ravel()
+    board_numbers = np.arange(num_boards, dtype=np.int64)[:, None]
+    keys = ((board_numbers << _STRENGTH_BITS) | sorted_strength).ravel()
+
+    # 重みの累積和（全体と、カードごと）
+    total_prefix = np.concatenate([[0.0], np.cumsum(sorted_weight)])
+    card_weight = np.zeros((len(keys), 52), dtype=np.float64)
+    sorted_cards = villain_cards[order.ravel()]
+    flat_rows = np.arange(len(keys))
+    card_weight[flat_rows, sorted_cards[:, 0]] = sorted_weight
+    card_weight[flat_rows, sorted_cards[:, 1]] = sorted_weight
+    card_prefix = np.concatenate([np.zeros((1, 52)), np.cumsum(card_weight, axis=0)])
+
+    hero_strength = strengths[:, hero_index]
+    hero_keys = (board_numbers << _STRENGTH_BITS) | hero_strength
+    lower = np.searchsorted(keys, hero_keys, side="left")     # 自分より弱い相手の終わり
+    upper = np.searchsorted(keys, hero_keys, side="right")    # 自分以下の相手の終わり
+    begin = np.broadcast_to(board_numbers * num_villains, hero_keys.shape)
+    end = begin + num_villains
+    card1, card2 = hero_cards[:, 0][None], hero_cards[:, 1][None]
+
+    def weight_before(position):
+        """ボードの先頭から position までの、自分のカードと重ならない相手の重み"""
+        return (total_prefix[position] - total_prefix[begin]
+                - (card_prefix[position, card1] - card_prefix[begin, card1])
+                - (card_prefix[position, card2] - card_prefix[begin, card2]))
+
+    # 自分と同じコンボは両方のカードの分で2回引かれるので1回足し戻す
+    # （同じコンボは同じ強さなので、弱い側には入らず、同じ強さの側にだけ入る）
+    same = np.where(hero_same >= 0, villain_w[:, np.maximum(hero_same, 0)], 0.0)
+    weaker = weight_before(lower)
+    not_stronger = weight_before(upper) + same
+    total = weight_before(end) + same
+
+    return np.stack([(hero_w * weaker).sum(axis=0),
+                     (hero_w * (not_stronger - weaker)).sum(axis=0),
+                     (hero_w * total).sum(axis=0)])
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+AI同士のセッションを多数のプロセスで並列に実行するバッチランナー
+
+各セッションは AIPlayer だけのテーブルで、1人になるか max_hands に達するまでプレイする。
+セッションのシードはマスターシードとセッション番号から決まるので、同じ条件なら結果は再現される。
+ワーカーは1セッションごとに結果を返し、メインプロセスは受け取った順に集計へ加えていく
+（全セッションの結果をメモリに溜めない）。
+
+実行例:
+    python3 runner.py --sessions 10000 --seed 42 --aggression 0.3 0.5 0.7 --output results
+"""
+import argparse
+import json
+import os
+import random
+from multiprocessing import Pool
+from typing import Dict, Iterator, Optional, Sequence
+
+from player import AIPlayer
+from texas_holdem import TexasHoldem
+
+
+class SessionConfig:
+    """1セッションの設定"""
+
+    def __init__(self, aggressions: Sequence[float], chips: int = 1000,
+                 small_blind: int = 10, big_blind: int = 20, max_hands: int = 1000):
+        if len(aggressions) < 2:
+            raise ValueError("プレイヤーは2人以上必要です")
+        self.aggressions = list(aggressions)
+        self.chips = chips
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.max_hands = max_hands
+
+
+def session_seed(master_seed: int, index: int) -> int:
+    """マスターシードとセッション番号から、セッションごとのシードを作る"""
+    return (master_seed << 32) | index
+
+
+def run_session(config: SessionConfig, index: int, seed: int) -> Dict:
+    """
+    1セッションを実行して結果を返す（ワーカープロセスで実行される）
+
+    Returns:
+        Dict: セッション番号、シード、ハンド数と、席ごとの
+              aggression・順位・脱落したハンド・チップの増減
+    """
+    # 席順による有利不利が出ないように、席順もシードから決める
+    seats = list(range(len(config.aggressions)))
+    random.Random(seed).shuffle(seats)
+    players = [
+        AIPlayer(f"AI_{seat}", chips=config.chips, aggression=config.aggressions[seat])
+        for seat in seats
+    ]
+    game = TexasHoldem(players, config.small_blind, config.big_blind, headless=True)
+    result = game.simulate(config.max_hands, seed=seed)
+
+    # 残ったプレイヤーはチップの多い順、脱落したプレイヤーは後に脱落したほど上位
+    survivors = sorted(game.players, key=lambda p: p.chips, reverse=True)
+    busted = sorted((p for p in players if p.name in result.eliminated_at),
+                    key=lambda p: result.eliminated_at[p.name], reverse=True)
+    positions = {p.name: i for i, p in enumerate(survivors + busted, 1)}
+
+    return {
+        "session": index,
+        "seed": seed,
+        "hands": result.hands_played,
+        "players": [
+            {
+                "aggression": p.aggression,
+                "position": positions[p.name],
+                "eliminated_at": result.eliminated_at.get(p.name),
+                "chip_delta": result.chip_deltas[p.name],
+            }
+            for p in players
+        ],
+    }
+
+
+def _run_task(task) -> Dict:
+    return run_session(*task)
+
+
+class AggressionStats:
+    """aggression の設定ごとの集計"""
+
+    def __init__(self):
+        self.entries = 0
+        self.position_sum = 0
+        self.first_places = 0
+        self.eliminations = 0
+        self.elimination_hand_sum = 0
+        self.chip_delta_sum = 0
+        self.hands_sum = 0
+
+    def add(self, player: Dict, hands: int):
+        self.entries += 1
+        self.position_sum += player["position"]
+        self.first_places += player["position"] == 1
+        if player["eliminated_at"] is not None:
+            self.eliminations += 1
+            self.elimination_hand_sum += player["eliminated_at"]
+        self.chip_delta_sum += player["chip_delta"]
+        self.hands_sum += player["eliminated_at"] or hands
+
+    @property
+    def average_position(self) -> float:
+        """平均順位"""
+        return self.position_sum / self.entries if self.entries else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        """1位になった割合"""
+        return self.first_places / self.entries if self.entries else 0.0
+
+    @property
+    def average_hands_to_elimination(self) -> Optional[float]:
+        """脱落したセッションでの、脱落までの平均ハンド数"""
+        if not self.eliminations:
+            return None
+        return self.elimination_hand_sum / self.eliminations
+
+    @property
+    def chips_per_100_hands(self) -> float:
+        """参加したハンド100回あたりのチップの増減"""
+        return 100 * self.chip_delta_sum / self.hands_sum if self.hands_sum else 0.0
+
+
+class RunSummary:
+    """全セッションの集計結果"""
+
+    def __init__(self):
+        self.sessions = 0
+        self.hands = 0
+        self.by_aggression: Dict[float, AggressionStats] = {}
+
+    def add(self, session: Dict):
+        """1セッション分の結果を加える"""
+        self.sessions += 1
+        self.hands += session["hands"]
+        for player in session["players"]:
+            stats = self.by_aggression.setdefault(player["aggression"], AggressionStats())
+            stats.add(player, session["hands"])
+
+    def __str__(self) -> str:
+        lines = [f"セッション数: {self.sessions} / 総ハンド数: {self.hands}"]
+        for aggression in sorted(self.by_aggression):
+            stats = self.by_aggression[aggression]
+            hands_to_elimination = stats.average_hands_to_elimination
+            elimination_text = "-" if hands_to_elimination is None else f"{hands_to_elimination:.1f}"
+            lines.append(
+                f"  aggression {aggression:.2f}: 平均順位 {stats.average_position:.2f} / "
+                f"1位 {stats.win_rate:.1%} / 脱落まで {elimination_text}ハンド / "
+                f"{stats.chips_per_100_hands:+.1f}チップ/100ハンド"
+            )
+        return "\n".join(lines)
+
+
+class _ShardWriter:
+    """セッションの結果を shard_size 件ずつ JSON Lines のファイルに書き出す"""
+
+    def __init__(self, directory: str, shard_size: int):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self._file = None
+        self._count = 0
+        self._shard = 0
+
+    def write(self, session: Dict):
+        if self._file is None or self._count == self.shard_size:
+            self.close()
+            path = os.path.join(self.directory, f"sessions-{self._shard:05d}.jsonl")
+            self._file = open(path, "w", encoding="utf-8")
+            self._shard += 1
+            self._count = 0
+        self._file.write(json.dumps(session) + "\n")
+        self._count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iter_sessions(config: SessionConfig, sessions: int, master_seed: int = 0,
+                  workers: Optional[int] = None, chunksize: int = 16) -> Iterator[Dict]:
+    """セッションを並列に実行し、終わったものから結果を返す（順不同）"""
+    tasks = ((config, index, session_seed(master_seed, index)) for index in range(sessions))
+    if workers == 1:
+        for task in tasks:
+            yield _run_task(task)
+        return
+
+    with Pool(processes=workers) as pool:
+        yield from pool.imap_unordered(_run_task, tasks, chunksize=chunksize)
+
+
+def run_batch(config: SessionConfig, sessions: int, master_seed: int = 0,
+              workers: Optional[int] = None, output_dir: Optional[str] = None,
+              shard_size: int = 10_000) -> RunSummary:
+    """
+    セッションをまとめて実行して集計する
+
+    Args:
+        config: セッションの設定
+        sessions: セッション数
+        master_seed: マスターシード
+        workers: プロセス数（None でCPU数、1 でこのプロセス内で実行）
+        output_dir: 指定するとセッションごとの結果を JSON Lines のシャードに書き出す
+        shard_size: 1シャードあたりのセッション数
+    """
+    summary = RunSummary()
+    writer = _ShardWriter(output_dir, shard_size) if output_dir else None
+    try:
+        for session in iter_sessions(config, sessions, master_seed, workers):
+            summary.add(session)
+            if writer is not None:
+                writer.write(session)
+    finally:
+        if writer is not None:
+            writer.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI同士のセッションを並列に実行して集計します")
+    parser.add_argument("--sessions", type=int, default=1000, help="セッション数")
+    parser.add_argument("--seed", type=int, default=0, help="マスターシード")
+    parser.add_argument("--aggression", type=float, nargs="+", default=[0.3, 0.5, 0.7],
+                        help="各席のAIの攻撃性")
+    parser.add_argument("--chips", type=int, default=1000, help="初期チップ")
+    parser.add_argument("--small-blind", type=int, default=10, help="スモールブラインド")
+    parser.add_argument("--big-blind", type=int, default=20, help="ビッグブラインド")
+    parser.add_argument("--max-hands", type=int, default=1000, help="1セッションのハンド数の上限")
+    parser.add_argument("--workers", type=int, default=None, help="プロセス数")
+    parser.add_argument("--output", default=None, help="セッションごとの結果を書き出すディレクトリ")
+    args = parser.parse_args()
+
+    config = SessionConfig(args.aggression, args.chips, args.small_blind, args.big_blind,
+                           args.max_hands)
+    summary = run_batch(config, args.sessions, args.seed, args.workers, args.output)
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
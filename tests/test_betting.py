@@ -0,0 +1,159 @@
+"""ベッティングラウンド（行動順・最小レイズ額・オールイン・不正なアクション）のテスト"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from betting import BettingRound  # noqa: E402
+from player import Player  # noqa: E402
+from texas_holdem import TexasHoldem  # noqa: E402
+
+
+class PassivePlayer(Player):
+    """常にチェックかコールするプレイヤー"""
+
+    def decide_action(self, current_bet: int, min_raise: int, pot: int):
+        to_call = current_bet - self.current_bet
+        return ('call', to_call) if to_call > 0 else ('check', 0)
+
+
+def _players(*chips):
+    return [PassivePlayer(f"P{i}", c) for i, c in enumerate(chips)]
+
+
+def _round(players, first_to_act=0, current_bet=0, big_blind=20):
+    return BettingRound(players, first_to_act, current_bet, big_blind)
+
+
+def test_min_raise_follows_last_raise():
+    players = _players(1000, 1000, 1000)
+    betting = _round(players)
+    assert betting.next_player() is players[0]
+    betting.apply(players[0], 'raise', 20)   # ベット 20
+    assert betting.next_player() is players[1]
+    betting.apply(players[1], 'raise', 50)   # 70 にレイズ（上げ幅 50）
+    assert betting.min_raise == 50
+    assert betting.min_raise_amount(players[2]) == 50
+
+    with pytest.raises(ValueError):
+        betting.apply(players[2], 'raise', 30)
+    assert betting.next_player() is players[2]
+    betting.apply(players[2], 'raise', 80)   # 150 にリレイズ（上げ幅 80）
+    assert betting.current_bet == 150
+    assert betting.min_raise == 80
+    assert betting.to_act == 2
+
+
+def test_short_all_in_does_not_reopen_raising():
+    players = _players(1000, 150, 1000)
+    betting = _round(players)
+    betting.next_player()
+    betting.apply(players[0], 'raise', 100)  # ベット 100
+    betting.next_player()
+    # 残りのチップが最小レイズ額に満たないので、上げ幅 50 のオールインができる
+    assert betting.min_raise_amount(players[1]) == 50
+    betting.apply(players[1], 'raise', 50)
+    assert players[1].all_in
+    assert betting.current_bet == 150
+    assert betting.min_raise == 100
+
+    # まだ行動していない席はレイズできる
+    assert betting.next_player() is players[2]
+    assert 'raise' in betting.legal_actions(players[2])
+    betting.apply(players[2], 'call', 150)
+
+    # 行動済みの席は差額をコールするかフォールドするだけ
+    assert betting.next_player() is players[0]
+    assert betting.legal_actions(players[0]) == ['fold', 'call']
+    with pytest.raises(ValueError):
+        betting.apply(players[0], 'raise', 100)
+    betting.apply(players[0], 'call', 50)
+    assert betting.finished
+    assert [p.current_bet for p in players] == [150, 150, 150]
+
+
+def test_short_all_ins_adding_up_to_a_full_raise_reopen_raising():
+    players = _players(1000, 150, 220, 1000)
+    betting = _round(players)
+    betting.next_player()
+    betting.apply(players[0], 'raise', 100)  # ベット 100
+    betting.next_player()
+    betting.apply(players[1], 'raise', 50)   # 150 にオールイン
+    betting.next_player()
+    betting.apply(players[2], 'raise', 70)   # 220 にオールイン（100 からは 120 上がった）
+    betting.next_player()
+    betting.apply(players[3], 'call', 220)
+    assert betting.next_player() is players[0]
+    assert 'raise' in betting.legal_actions(players[0])
+
+
+def _action_order(num_players: int, dealer: int):
+    players = _players(*[1000] * num_players)
+    game = TexasHoldem(players, 10, 20, headless=True, seed=0)
+    game.dealer_position = dealer
+    order = {}
+    steps = game.hand_steps()
+    decision = None
+    try:
+        while True:
+            player = steps.send(decision)
+            street = len(game.community_cards)
+            order.setdefault(street, []).append(players.index(player))
+            decision = player.decide_action(game.current_bet, game.min_raise, game.pot)
+    except StopIteration:
+        pass
+    return order
+
+
+def test_first_to_act():
+    order = _action_order(4, dealer=1)
+    # プリフロップはビッグブラインド（3番）の次の席から、ビッグブラインドが最後
+    assert order[0] == [0, 1, 2, 3]
+    # フロップ以降はディーラーの次の席（スモールブラインド）から
+    assert order[3] == [2, 3, 0, 1]
+    assert order[4] == [2, 3, 0, 1]
+    assert order[5] == [2, 3, 0, 1]
+
+
+def test_big_blind_can_raise_after_limps():
+    players = _players(1000, 1000, 1000)
+    game = TexasHoldem(players, 10, 20, headless=True, seed=0)
+    game.dealer_position = 0
+    steps = game.hand_steps()
+    player = steps.send(None)
+    while player is not players[2]:
+        player = steps.send(player.decide_action(game.current_bet, game.min_raise, game.pot))
+    assert game.betting.legal_actions(player) == ['fold', 'check', 'raise']
+    steps.close()
+
+
+def test_illegal_actions_are_rejected():
+    players = _players(1000, 1000)
+    betting = _round(players)
+    betting.next_player()
+    betting.apply(players[0], 'raise', 40)
+    betting.next_player()
+    with pytest.raises(ValueError):
+        betting.apply(players[1], 'check', 0)    # コールが必要なのにチェック
+    with pytest.raises(ValueError):
+        betting.apply(players[1], 'raise', 10)   # 最小レイズ額未満
+    with pytest.raises(ValueError):
+        betting.apply(players[1], 'bet', 40)     # 不明なアクション
+    # 拒否したアクションは状態を変えない
+    assert players[1].chips == 1000
+    assert betting.to_act == 1
+
+
+def test_raise_rejected_when_nobody_else_can_act():
+    players = _players(1000, 100)
+    betting = _round(players)
+    betting.next_player()
+    betting.apply(players[0], 'check', 0)
+    betting.next_player()
+    betting.apply(players[1], 'raise', 100)      # オールイン
+    assert betting.next_player() is players[0]
+    assert betting.legal_actions(players[0]) == ['fold', 'call']
+    with pytest.raises(ValueError):
+        betting.apply(players[0], 'raise', 200)
@@ -0,0 +1,73 @@
+"""メインポット・サイドポットの分け方と分配（端数のチップ）のテスト"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from player import Player  # noqa: E402
+from pots import PotLedger  # noqa: E402
+
+
+def _ledger(*contributions, folded=()):
+    players = [Player(f"P{i}", 0) for i in range(len(contributions))]
+    ledger = PotLedger(players)
+    for player, amount in zip(players, contributions):
+        ledger.add(player, amount)
+    for seat in folded:
+        players[seat].fold()
+    return players, ledger
+
+
+def _layout(pots, players):
+    return [(pot.amount, sorted(players.index(p) for p in pot.eligible)) for pot in pots]
+
+
+def test_three_all_in_amounts():
+    players, ledger = _ledger(100, 300, 600, 1000)
+    assert _layout(ledger.build_pots(), players) == [
+        (400, [0, 1, 2, 3]),
+        (600, [1, 2, 3]),
+        (600, [2, 3]),
+        (400, [3]),  # 誰もコールしていない分は本人だけのポット
+    ]
+    assert sum(pot.amount for pot in ledger.build_pots()) == ledger.total
+
+
+def test_folded_contributor_funds_pots_but_is_not_eligible():
+    # 1番は 200 出してフォールド、0番は 100 でオールイン
+    players, ledger = _ledger(100, 200, 300, 300, folded=(1,))
+    assert _layout(ledger.build_pots(), players) == [
+        (400, [0, 2, 3]),
+        (500, [2, 3]),
+    ]
+
+
+def test_folded_contributor_above_every_live_player():
+    # フォールドした 2番が残ったプレイヤーより多く出した分は最後のポットに入る
+    players, ledger = _ledger(100, 100, 250, folded=(2,))
+    assert _layout(ledger.build_pots(), players) == [(450, [0, 1])]
+
+
+def test_side_pots_awarded_to_best_eligible_hand():
+    players, ledger = _ledger(100, 300, 600, 600)
+    # 一番短い 0番が最強、次に 1番、2番と 3番は同じ強さ
+    strengths = {players[0]: 40, players[1]: 30, players[2]: 10, players[3]: 10}
+    winnings = ledger.award(strengths, button=0)
+    assert winnings == {players[0]: 400, players[1]: 600, players[2]: 300, players[3]: 300}
+    assert sum(winnings.values()) == ledger.total
+
+
+def test_odd_chip_goes_to_first_winner_left_of_button():
+    players, ledger = _ledger(5, 5, 5)
+    strengths = {players[0]: 10, players[1]: 5, players[2]: 10}
+    # ボタンが 0番なら 1番 → 2番 の順に数えるので、2番が端数を受け取る
+    assert ledger.award(strengths, button=0) == {players[0]: 7, players[2]: 8}
+    # ボタンが 2番なら 0番から数える
+    assert ledger.award(strengths, button=2) == {players[0]: 8, players[2]: 7}
+
+
+def test_odd_chips_in_three_way_split():
+    players, ledger = _ledger(11, 11, 11, 11, folded=(3,))
+    strengths = {players[0]: 10, players[1]: 10, players[2]: 10}
+    # 44 を3人で分けると 14 ずつで端数 2。ボタン（1番）の次の 2番、0番 の順に1枚ずつ
+    assert ledger.award(strengths, button=1) == {players[0]: 15, players[1]: 14, players[2]: 15}
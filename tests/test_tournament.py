@@ -0,0 +1,37 @@
+"""トーナメントの進行（テーブルの解散と移動）の回帰テスト"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from player import AIPlayer  # noqa: E402
+from tournament import BlindSchedule, TournamentDirector  # noqa: E402
+
+TIMEOUT = 30.0  # 止まった場合に失敗させるまでの秒数
+
+
+def _play(entrants: int, seats: int, seed: int):
+    players = [AIPlayer(f"AI_{i}", 1500) for i in range(entrants)]
+    director = TournamentDirector(players, seats=seats,
+                                  schedule=BlindSchedule.geometric(10, 5), seed=seed)
+
+    async def run():
+        return await asyncio.wait_for(director.run(), TIMEOUT)
+
+    return players, asyncio.run(run())
+
+
+def test_small_tables_finish():
+    """席数が少ないと解散の待ちが起きやすい（以前は解散待ちのテーブルが止まったままになった）"""
+    for seats in (2, 3):
+        for seed in range(32):
+            entrants = 5 + seed % 40
+            players, result = _play(entrants, seats, seed)
+            assert sorted(result.places.values()) == list(range(1, entrants + 1))
+            assert sum(p.chips for p in players) == 1500 * entrants
+
+
+def test_reported_deadlock():
+    players, result = _play(23, 2, 3)
+    assert result.winner is not None
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+多数のテーブルで進行するトーナメント（テーブルの移動と統合、ブラインドの上昇）
+
+エントリーしたプレイヤーを seats 人ずつのテーブルに分け、1つのイベントループで
+すべてのテーブルを同時に進行する。各テーブルはハンドが終わるたびにイベントループへ
+処理を譲るので、テーブル同士は1ハンドずつ交互に進み、判断を await で待つ
+プレイヤー（async_server の RemotePlayer など）がいても他のテーブルは止まらない。
+
+ブラインドとアンティは BlindSchedule に従って、各テーブルのハンド数で上がっていく。
+
+ハンドが終わったテーブルだけで、次の順に調整する（他のテーブルはハンドの途中でもよい）:
+    1. チップが無くなったプレイヤーを脱落させ、順位を付ける
+    2. 残りの人数に対してテーブルが多ければ、最も人数の少ないテーブルを解散して
+       そのプレイヤーを人数の少ないテーブルから順に座らせる
+       （解散するテーブルがハンドの途中なら、そのハンドが終わったときに解散する）
+    3. このテーブルの人数が最も少ないテーブルより2人以上多ければ、
+       最も少ないテーブルへ1人ずつ移す
+移動したプレイヤーは移動先の待ち行列に入り、移動先の次のハンドから参加する。
+
+最も人数の少ないテーブルは、(人数, テーブル番号) をキーにした優先度付きキュー（ヒープ）で
+求める。人数が変わるたびに新しい要素を追加し、古くなった要素は取り出したときに捨てるので、
+1人の移動もテーブルの解散の判断も O(log テーブル数) で済み、全テーブルを走査しない。
+
+実行例:
+    python3 tournament.py --entrants 2000 --seats 9 --chips 1500 --seed 1
+"""
+import argparse
+import asyncio
+import heapq
+import random
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence
+
+from async_server import AsyncTexasHoldem
+from player import AIPlayer, Player
+from variants import HOLDEM, VARIANTS, Variant
+
+
+class BlindLevel:
+    """ブラインドのレベル（hands はこのレベルが続くハンド数）"""
+
+    __slots__ = ("small_blind", "big_blind", "ante", "hands")
+
+    def __init__(self, small_blind: int, big_blind: int, ante: int = 0, hands: int = 10):
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.ante = ante
+        self.hands = hands
+
+    def __repr__(self) -> str:
+        ante = f" (アンティ {self.ante})" if self.ante else ""
+        return f"BlindLevel({self.small_blind}/{self.big_blind}{ante}, {self.hands}ハンド)"
+
+
+class BlindSchedule:
+    """ブラインドのレベルの一覧（最後のレベルは終わらずに続く）"""
+
+    def __init__(self, levels: Sequence[BlindLevel]):
+        if not levels:
+            raise ValueError("ブラインドのレベルが必要です")
+        self.levels = list(levels)
+        # 各レベルが終わるハンド数（ハンド数からレベルを二分探索で引く）
+        self._ends = list(accumulate(level.hands for level in self.levels))
+
+    def level_index(self, hands_played: int) -> int:
+        """hands_played ハンドを終えたテーブルの、次のハンドのレベルの番号"""
+        return min(bisect_right(self._ends, hands_played), len(self.levels) - 1)
+
+    def level(self, hands_played: int) -> BlindLevel:
+        """hands_played ハンドを終えたテーブルの、次のハンドのレベル"""
+        return self.levels[self.level_index(hands_played)]
+
+    @classmethod
+    def geometric(cls, small_blind: int = 10, hands_per_level: int = 10, levels: int = 40,
+                  growth: float = 1.5, ante_from: int = 4, ante_ratio: float = 0.125
+                  ) -> "BlindSchedule":
+        """
+        スモールブラインドを growth 倍ずつ上げていくスケジュール
+
+        額は上から2桁に丸める。ante_from 番目（0から数える）のレベルから、
+        ビッグブラインドの ante_ratio 倍のアンティを加える。
+        """
+        result = []
+        value = float(small_blind)
+        for index in range(levels):
+            sb = _round_chips(value)
+            ante = _round_chips(2 * sb * ante_ratio) if index >= ante_from else 0
+            result.append(BlindLevel(sb, 2 * sb, ante, hands_per_level))
+            value *= growth
+        return cls(result)
+
+
+def _round_chips(value: float) -> int:
+    """チップの額を上から2桁に丸める（1以上）"""
+    value = max(1, int(round(value)))
+    magnitude = 10 ** max(0, len(str(value)) - 2)
+    return round(value / magnitude) * magnitude
+
+
+class TournamentTable:
+    """トーナメントの1テーブル（ハンドの合間に待ち行列のプレイヤーを着席させる）"""
+
+    def __init__(self, table_id: int, game: AsyncTexasHoldem):
+        self.table_id = table_id
+        self.game = game
+        self.waiting: List[Player] = []  # 移動してきて次のハンドから参加するプレイヤー
+        self.hands_played = 0
+        self.in_hand = False    # ハンドの途中（プレイヤーを動かせない）
+        self.idle = False       # 人数が足りず、プレイヤーが来るのを待っている
+        self.breaking = False   # 解散が決まっている（プレイヤーを受け入れない）
+        self.broken = False
+        self.wakeup = asyncio.Event()
+
+    @property
+    def size(self) -> int:
+        """着席しているプレイヤーと待ち行列のプレイヤーの人数"""
+        return len(self.game.players) + len(self.waiting)
+
+    def seat_waiting_players(self):
+        self.game.players.extend(self.waiting)
+        self.waiting = []
+
+    def take_player(self) -> Player:
+        """
+        別のテーブルへ移すプレイヤーを1人外す
+
+        待ち行列にいればその人を、いなければ次のハンドでビッグブラインドになる人を移す。
+        """
+        if self.waiting:
+            return self.waiting.pop()
+        game = self.game
+        player = game.players[(game.dealer_position + 2) % len(game.players)]
+        game.remove_player(player)
+        return player
+
+
+class TournamentResult:
+    """トーナメントの結果"""
+
+    def __init__(self, entrants: int):
+        self.entrants = entrants
+        self.places: Dict[str, int] = {}  # プレイヤー名 → 順位（1が優勝）
+        self.hands_played = 0             # 全テーブルのハンド数の合計
+        self.moves = 0                    # テーブルを移動したプレイヤーの延べ人数
+        self.tables_broken = 0
+        self.max_level = 0                # 到達したブラインドのレベルの番号
+        self.elapsed = 0.0
+
+    @property
+    def winner(self) -> Optional[str]:
+        return next((name for name, place in self.places.items() if place == 1), None)
+
+    def finish_order(self) -> List[str]:
+        """順位の順のプレイヤー名"""
+        return sorted(self.places, key=self.places.get)
+
+    def __str__(self) -> str:
+        lines = [
+            f"エントリー: {self.entrants}人  ハンド数: {self.hands_played}  "
+            f"到達レベル: {self.max_level + 1}  経過時間: {self.elapsed:.1f}秒",
+            f"テーブルの移動: {self.moves}人  解散したテーブル: {self.tables_broken}",
+        ]
+        for name in self.finish_order()[:10]:
+            lines.append(f"  {self.places[name]}位: {name}")
+        return "\n".join(lines)
+
+
+class TournamentDirector:
+    """多数のテーブルを同時に進行し、テーブルの移動と統合を行うトーナメントの進行役"""
+
+    def __init__(self, players: Sequence[Player], seats: int = 9,
+                 schedule: Optional[BlindSchedule] = None, seed: Optional[int] = None,
+                 variant: Variant = HOLDEM):
+        """
+        Args:
+            players: エントリーしたプレイヤー（名前は一意であること）
+            seats: 1テーブルの席数
+            schedule: ブラインドのスケジュール（省略すると BlindSchedule.geometric()）
+            seed: 席順と各テーブルのデッキ・AIの判断のシード
+        """
+        if len(players) < 2:
+            raise ValueError("プレイヤーは2人以上必要です")
+        if seats < 2:
+            raise ValueError("席数は2以上必要です")
+        self.seats = seats
+        self.schedule = schedule or BlindSchedule.geometric()
+        self.result = TournamentResult(len(players))
+        self.remaining = len(players)
+        self.tables: Dict[int, TournamentTable] = {}
+        self._heap: List[tuple] = []  # (人数, テーブル番号)。古い要素は取り出すときに捨てる
+        self._pending_breaks = 0      # 解散が決まっていて、ハンドの終了を待っているテーブル数
+
+        rng = random.Random(seed)
+        order = list(players)
+        rng.shuffle(order)
+        num_tables = -(-len(order) // seats)
+        first = self.schedule.level(0)
+        for table_id in range(num_tables):
+            # 人数がなるべく均等になるように配る
+            game = AsyncTexasHoldem(order[table_id::num_tables], first.small_blind,
+                                    first.big_blind, ante=first.ante, variant=variant,
+                                    rng=random.Random(rng.getrandbits(64)))
+            game.rng.seed(rng.getrandbits(64))  # AIの判断もテーブルごとの乱数で再現する
+            table = TournamentTable(table_id, game)
+            self.tables[table_id] = table
+            self._push(table)
+
+    def play(self) -> TournamentResult:
+        """トーナメントを最後まで進行して結果を返す"""
+        return asyncio.run(self.run())
+
+    async def run(self) -> TournamentResult:
+        """トーナメントを最後まで進行して結果を返す（実行中のイベントループで使う）"""
+        started = time.perf_counter()
+        await asyncio.gather(*(self._run_table(table) for table in list(self.tables.values())))
+        self.result.elapsed = time.perf_counter() - started
+        return self.result
+
+    @property
+    def finished(self) -> bool:
+        return self.remaining <= 1
+
+    async def _run_table(self, table: TournamentTable):
+        """テーブルのゲームループ（解散するかトーナメントが終わるまで）"""
+        game = table.game
+        while not table.broken and not self.finished:
+            if table.breaking:
+                # ハンドの合間に解散が決まった
+                self._break_table(table)
+                return
+            table.seat_waiting_players()
+            if len(game.players) < 2:
+                table.idle = True
+                table.wakeup.clear()
+                await table.wakeup.wait()
+                table.idle = False
+                continue
+
+            index = self.schedule.level_index(table.hands_played)
+            level = self.schedule.levels[index]
+            game.small_blind, game.big_blind, game.ante = (
+                level.small_blind, level.big_blind, level.ante)
+            self.result.max_level = max(self.result.max_level, index)
+
+            start_chips = {p: p.chips for p in game.players}
+            table.in_hand = True
+            # ハンドの途中では譲らず、ハンドの区切りでまとめて譲る
+            await game.play_hand_async(yield_each_action=False)
+            table.in_hand = False
+            table.hands_played += 1
+            self.result.hands_played += 1
+            self._after_hand(table, start_chips)
+            # 他のテーブルに処理を譲る
+            await asyncio.sleep(0)
+
+    def _after_hand(self, table: TournamentTable, start_chips: Dict[Player, int]):
+        """ハンドが終わったテーブルで、脱落・テーブルの解散・人数の調整を行う"""
+        game = table.game
+        busted = [p for p in game.players if p.chips <= 0]
+        if busted:
+            # 同じハンドで脱落したら、ハンドの開始時のチップが多い方が上位
+            busted.sort(key=lambda p: start_chips[p])
+            for player in busted:
+                self.result.places[player.name] = self.remaining
+                self.remaining -= 1
+            game.eliminate_broke_players()
+            self._push(table)
+
+        if self.finished:
+            for player in game.players:
+                self.result.places[player.name] = 1
+            for other in self.tables.values():
+                other.wakeup.set()
+            return
+
+        if table.breaking:
+            self._break_table(table)
+            return
+
+        # 残りの人数に必要なテーブル数まで、人数の少ないテーブルから解散する
+        needed = -(-self.remaining // self.seats)
+        while len(self.tables) - self._pending_breaks > needed:
+            smallest = self._smallest()
+            if smallest is table or not smallest.in_hand:
+                self._break_table(smallest)
+                if smallest is table:
+                    return
+            else:
+                smallest.breaking = True
+                self._pending_breaks += 1
+
+        # このテーブルが最も少ないテーブルより2人以上多ければ移す
+        while True:
+            smallest = self._smallest()
+            if smallest is None or table.size <= smallest.size + 1:
+                break
+            self._move(table.take_player(), smallest)
+            self._push(table)
+
+    def _break_table(self, table: TournamentTable):
+        """テーブルを解散して、プレイヤーを人数の少ないテーブルから順に座らせる"""
+        if table.breaking:
+            self._pending_breaks -= 1
+        table.breaking = True
+        players = table.game.players + table.waiting
+        table.game.players = []
+        table.waiting = []
+        del self.tables[table.table_id]
+        table.broken = True
+        table.wakeup.set()
+        self.result.tables_broken += 1
+        for player in players:
+            self._move(player, self._smallest())
+
+    def _move(self, player: Player, destination: TournamentTable):
+        """プレイヤーを移動先の待ち行列に入れる"""
+        destination.waiting.append(player)
+        self._push(destination)
+        self.result.moves += 1
+        if destination.idle:
+            destination.wakeup.set()
+
+    def _push(self, table: TournamentTable):
+        heapq.heappush(self._heap, (table.size, table.table_id))
+
+    def _smallest(self) -> Optional[TournamentTable]:
+        """最も人数の少ない（解散が決まっていない）テーブル"""
+        heap = self._heap
+        while heap:
+            size, table_id = heap[0]
+            table = self.tables.get(table_id)
+            if table is None or table.breaking or table.size != size:
+                heapq.heappop(heap)  # 古い要素
+                continue
+            return table
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI同士のマルチテーブルトーナメントを実行")
+    parser.add_argument("--entrants", type=int, default=1000, help="エントリー人数")
+    parser.add_argument("--seats", type=int, default=9, help="1テーブルの席数")
+    parser.add_argument("--chips", type=int, default=1500, help="初期チップ")
+    parser.add_argument("--small-blind", type=int, default=10, help="最初のスモールブラインド")
+    parser.add_argument("--hands-per-level", type=int, default=10, help="1レベルのハンド数")
+    parser.add_argument("--variant", choices=sorted(VARIANTS), default="holdem", help="ゲームの種類")
+    parser.add_argument("--seed", type=int, default=None, help="乱数シード")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    players = [AIPlayer(f"AI_{i}", chips=args.chips, aggression=rng.random())
+               for i in range(args.entrants)]
+    schedule = BlindSchedule.geometric(args.small_blind, args.hands_per_level)
+    director = TournamentDirector(players, args.seats, schedule, seed=args.seed,
+                                  variant=VARIANTS[args.variant])
+    print(director.play())
+
+
+if __name__ == "__main__":
+    main()
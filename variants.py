@@ -0,0 +1,259 @@
+"""
+ゲームのバリアント（テキサスホールデム、ショートデッキ、ポットリミットオマハ）
+
+TexasHoldem はバリアントから、配るホールカードの枚数、デッキに入れるカード、
+プレイヤーの評価状態（ストリートごとにカードを追加し、ショーダウンで strength を問い合わせる）、
+役の強さの復元方法、ポットリミットかどうかを受け取る。
+役の強さの整数は同じバリアントの中でだけ比較できる。
+
+- HOLDEM: 通常のテキサスホールデム（hand_evaluator のテーブルをそのまま使う）
+- SHORT_DECK: 2〜5 を抜いた36枚で遊ぶ 6+ ホールデム。フラッシュがフルハウスより強く、
+  A-6-7-8-9 がストレート（最も弱いストレート）になる。役の順位とホイールを変えた
+  専用のテーブルを、6〜A の9ランクの組み合わせだけで作る
+- OMAHA: ポットリミットオマハ。ホールカード4枚から必ず2枚、ボードから必ず3枚を使う
+  （6 × 10 = 60通り）。ランクの2枚組 × 3枚組 の5枚用の専用テーブルから、ホールカード4枚の
+  ランクの組み合わせごとに「2枚組の選び方で最も強い値」を3枚組ごとに並べた行を作っておき、
+  ショーダウンではボードの3枚組（最大10通り）でその行を引くだけで済む
+
+エクイティ計算（equity、ranges）、EquityAIPlayer、MCTSPlayer、ハンド履歴は
+テキサスホールデム専用。
+"""
+from itertools import combinations, combinations_with_replacement
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from card import Card, Deck
+from hand_evaluator import (HandRank, IncrementalHand, _FLUSH_TABLE, _build_flush_table,
+                            _build_rank_table, _straight_high, decode_strength)
+
+# ---------------------------------------------------------------------------
+# ショートデッキ（6+）
+# ---------------------------------------------------------------------------
+
+SHORT_DECK_LOWEST_RANK = 6
+SHORT_DECK_CARD_IDS = tuple(range((SHORT_DECK_LOWEST_RANK - 2) * 4, 52))
+
+# フラッシュとフルハウスの順位を入れ替える
+_SHORT_DECK_CATEGORIES: Dict[HandRank, int] = {rank: rank.value for rank in HandRank}
+_SHORT_DECK_CATEGORIES[HandRank.FLUSH] = HandRank.FULL_HOUSE.value
+_SHORT_DECK_CATEGORIES[HandRank.FULL_HOUSE] = HandRank.FLUSH.value
+_SHORT_DECK_RANKS: Dict[int, HandRank] = {
+    value: rank for rank, value in _SHORT_DECK_CATEGORIES.items()}
+
+_SHORT_DECK_STRAIGHT_HIGH = [_straight_high(mask, wheel_high=9) for mask in range(1 << 13)]
+_SHORT_DECK_FLUSH_TABLE = _build_flush_table(_SHORT_DECK_STRAIGHT_HIGH, _SHORT_DECK_CATEGORIES)
+_SHORT_DECK_RANK_TABLE = _build_rank_table(_SHORT_DECK_STRAIGHT_HIGH, _SHORT_DECK_CATEGORIES,
+                                           lowest_rank=SHORT_DECK_LOWEST_RANK)
+
+
+class ShortDeckHand(IncrementalHand):
+    """ショートデッキの評価状態（キーの持ち方は IncrementalHand と同じで、引くテーブルだけが違う）"""
+
+    __slots__ = ()
+
+    _flush_table = _SHORT_DECK_FLUSH_TABLE
+    _rank_table = _SHORT_DECK_RANK_TABLE
+    _hand_ranks = _SHORT_DECK_RANKS
+
+
+# ---------------------------------------------------------------------------
+# オマハ
+# ---------------------------------------------------------------------------
+
+OMAHA_HOLE_CARDS = 4
+
+
+def _omaha_tables() -> Tuple[List[List[int]], List[List[int]], Dict[Tuple[int, ...], int]]:
+    """
+    オマハの5枚用のテーブル
+
+    ランク（0〜12）の2枚組の番号 × 3枚組の番号 から強さを引く2次元のリストと、
+    2枚組の番号、3枚組の番号（ランクを昇順に並べたタプルから引く）を返す。
+    同じランクが5枚になる組み合わせは 0。
+    """
+    rank_table = _build_rank_table(max_cards=5)
+    pair_index = [[0] * 13 for _ in range(13)]
+    pair_keys = []
+    for i, (a, b) in enumerate(combinations_with_replacement(range(13), 2)):
+        pair_index[a][b] = pair_index[b][a] = i
+        pair_keys.append((1 << (3 * a)) + (1 << (3 * b)))
+    triple_index = {}
+    triple_keys = []
+    for i, ranks in enumerate(combinations_with_replacement(range(13), 3)):
+        triple_index[ranks] = i
+        triple_keys.append(sum(1 << (3 * r) for r in ranks))
+    rows = [[rank_table.get(pair + triple, 0) for triple in triple_keys] for pair in pair_keys]
+    return rows, pair_index, triple_index
+
+
+_OMAHA_ROWS, _PAIR_INDEX, _TRIPLE_INDEX = _omaha_tables()
+_HOLE_ROWS: Dict[Tuple[int, ...], List[int]] = {}
+
+
+def _hole_row(ranks: Tuple[int, ...]) -> List[int]:
+    """
+    ホールカード4枚のランク（昇順）ごとに、ボードの3枚組の番号から
+    2枚組の選び方で最も強い強さを引く行（初めて使うときに作って保存する。最大1820通り）
+    """
+    row = _HOLE_ROWS.get(ranks)
+    if row is None:
+        pairs = {_PAIR_INDEX[a][b] for a, b in combinations(ranks, 2)}
+        rows = [_OMAHA_ROWS[pair] for pair in pairs]
+        # 2枚組が1通り（4枚とも同じランク）でも max に2つ以上渡るように 0 の行を足す
+        rows.append([0] * len(rows[0]))
+        row = _HOLE_ROWS[ranks] = list(map(max, *rows))
+    return row
+
+
+def _best_flush(hole: Sequence[int], board: Sequence[int]) -> int:
+    """同じスートのホールカードとボードのカードで作れる最も強いフラッシュ"""
+    hole_masks = {(1 << (a >> 2)) | (1 << (b >> 2)) for a, b in combinations(hole, 2)}
+    board_masks = {(1 << (a >> 2)) | (1 << (b >> 2)) | (1 << (c >> 2))
+                   for a, b, c in combinations(board, 3)}
+    table = _FLUSH_TABLE
+    return max([table[h | b] for h in hole_masks for b in board_masks])
+
+
+class OmahaHand:
+    """
+    オマハの評価状態
+
+    最初の4枚がホールカード、それ以降がボード。ホールカードが揃ったときに
+    そのランクの組み合わせの行（2枚組の選び方の最大値を3枚組の番号ごとに並べたもの）を取り、
+    ボードのカードが増えるたびにボードのランクの3枚組（最大10通り）の番号を増やしていく。
+    strength はその行を3枚組の番号で引いた最大値（表引き最大10回）で、
+    フラッシュはボードに同じスートが3枚以上あり、そのスートのホールカードが
+    2枚以上あるときだけ調べる。
+    """
+
+    __slots__ = ("hole", "board", "card_mask", "num_cards", "flush_suit",
+                 "_row", "_triples", "_suit_counts")
+
+    def __init__(self, cards: Sequence[Card] = ()):
+        self.hole: List[int] = []
+        self.board: List[int] = []
+        self.card_mask = 0
+        self.num_cards = 0
+        self.flush_suit = -1  # ボードに3枚以上あるスート（無ければ -1）
+        self._row: Optional[List[int]] = None  # ホールカードのランクの組み合わせの行
+        self._triples: List[int] = []  # ボードのランクの3枚組の番号（重複なし）
+        self._suit_counts = [0, 0, 0, 0]  # ボードのスートごとの枚数
+        for card in cards:
+            self.add_id(card.id)
+
+    def add(self, card: Card):
+        """カードを追加"""
+        self.add_id(card.id)
+
+    def add_id(self, card_id: int):
+        """カード番号でカードを追加"""
+        rank = card_id >> 2
+        hole = self.hole
+        if len(hole) < OMAHA_HOLE_CARDS:
+            hole.append(card_id)
+            if len(hole) == OMAHA_HOLE_CARDS:
+                self._row = _hole_row(tuple(sorted(other >> 2 for other in hole)))
+        else:
+            board = self.board
+            for i in range(len(board)):
+                for j in range(i):
+                    triple = _TRIPLE_INDEX[tuple(sorted((board[i] >> 2, board[j] >> 2, rank)))]
+                    if triple not in self._triples:
+                        self._triples.append(triple)
+            board.append(card_id)
+            suit = card_id & 3
+            self._suit_counts[suit] += 1
+            if self._suit_counts[suit] == 3:
+                self.flush_suit = suit
+        self.card_mask |= 1 << card_id
+        self.num_cards += 1
+
+    def copy(self) -> "OmahaHand":
+        """状態のコピー"""
+        other = OmahaHand()
+        other.hole = self.hole[:]
+        other.board = self.board[:]
+        other.card_mask = self.card_mask
+        other.num_cards = self.num_cards
+        other.flush_suit = self.flush_suit
+        other._row = self._row  # 行は共有（書き換えない）
+        other._triples = self._triples[:]
+        other._suit_counts = self._suit_counts[:]
+        return other
+
+    def strength(self) -> int:
+        """ホールカード2枚とボード3枚で作れる最も強い役の強さ"""
+        if len(self.hole) != OMAHA_HOLE_CARDS or len(self.board) < 3:
+            raise ValueError("オマハの役の判定にはホールカード4枚とボード3枚以上が必要です")
+        best = max(map(self._row.__getitem__, self._triples))
+
+        suit = self.flush_suit
+        if suit >= 0:
+            hole_suited = [card_id for card_id in self.hole if card_id & 3 == suit]
+            if len(hole_suited) >= 2:
+                board_suited = [card_id for card_id in self.board if card_id & 3 == suit]
+                best = max(best, _best_flush(hole_suited, board_suited))
+        return best
+
+    def evaluate(self) -> Tuple[HandRank, List[int]]:
+        """現在のカードの役のランクとキッカー"""
+        return decode_strength(self.strength())
+
+
+# ---------------------------------------------------------------------------
+# バリアント
+# ---------------------------------------------------------------------------
+
+
+class Variant:
+    """ゲームのバリアント"""
+
+    def __init__(self, name: str, display: str, hole_cards: int, hand_type,
+                 card_ids: Optional[Iterable[int]] = None,
+                 hand_ranks: Optional[Dict[int, HandRank]] = None, pot_limit: bool = False):
+        """
+        Args:
+            hole_cards: 1人に配るホールカードの枚数
+            hand_type: プレイヤーの評価状態のクラス（ホールカードで初期化し add でボードを追加）
+            card_ids: デッキに入れるカード番号（省略すると52枚）
+            hand_ranks: 役の強さの上位ビットの値から役のランクへの対応（省略すると通常の順位）
+            pot_limit: レイズ額の上限をポットの額にする
+        """
+        self.name = name
+        self.display = display
+        self.hole_cards = hole_cards
+        self.hand_type = hand_type
+        self.card_ids = tuple(card_ids) if card_ids is not None else None
+        self.hand_ranks = hand_ranks
+        self.pot_limit = pot_limit
+
+    def new_deck(self, rng=None, seed: Optional[int] = None) -> Deck:
+        """このバリアントのデッキ"""
+        return Deck(rng=rng, seed=seed, card_ids=self.card_ids)
+
+    def hand_state(self, cards: Sequence[Card]):
+        """ホールカードからプレイヤーの評価状態を作る"""
+        return self.hand_type(cards)
+
+    def strength(self, hole_ids: Sequence[int], board_ids: Sequence[int]) -> int:
+        """ホールカードとボードのカード番号から役の強さを求める"""
+        state = self.hand_type()
+        for card_id in hole_ids:
+            state.add_id(card_id)
+        for card_id in board_ids:
+            state.add_id(card_id)
+        return state.strength()
+
+    def decode(self, strength: int) -> Tuple[HandRank, List[int]]:
+        """役の強さ（整数）を役のランクとキッカーに戻す"""
+        return decode_strength(strength, self.hand_ranks)
+
+    def __repr__(self) -> str:
+        return f"Variant({self.name})"
+
+
+HOLDEM = Variant("holdem", "テキサスホールデム", 2, IncrementalHand)
+SHORT_DECK = Variant("short_deck", "ショートデッキ（6+）ホールデム", 2, ShortDeckHand,
+                     card_ids=SHORT_DECK_CARD_IDS, hand_ranks=_SHORT_DECK_RANKS)
+OMAHA = Variant("omaha", "ポットリミットオマハ", OMAHA_HOLE_CARDS, OmahaHand, pot_limit=True)
+
+VARIANTS: Dict[str, Variant] = {variant.name: variant for variant in (HOLDEM, SHORT_DECK, OMAHA)}
@@ -0,0 +1,354 @@
+"""
+多数のテーブルを NumPy の配列で同時に進行するエンジン（NumPy が必要）
+
+TexasHoldem が Player オブジェクトを1人ずつ扱うのに対し、このエンジンは
+チップ・ベット額・フォールド/オールインのフラグ・カードを (テーブル, 席) の配列で持ち、
+ブラインド、配札、各ストリートのベッティング、ショーダウンを全テーブル分まとめて進める。
+Python に戻るのは判断（ポリシー）の呼び出しだけで、それも1手番ごとに
+全テーブル分をまとめて1回（席ごとのポリシーなら席ごとに1回）になる。
+
+ポリシーは policy(engine, tables, seats) の形の関数で、判断が必要なテーブル番号と
+席番号の配列を受け取り、(actions, amounts) の配列を返す。
+actions は FOLD / CALL（チェックを含む）/ RAISE、amounts はコール額に上乗せするレイズ額。
+
+行動順は TexasHoldem と同じく、プリフロップはビッグブラインドの次の席から、
+フロップ以降はディーラーの次の席から。ポットはサイドポットに分けて分配する。
+ベッティングの規則は次の2点で TexasHoldem（BettingRound）と異なる:
+    - 最小レイズ額は常にビッグブラインド（TexasHoldem は直前のレイズの上げ幅）
+    - 1ストリートのレイズは MAX_RAISES 回までで、それ以上のレイズはコールとして扱う
+      （TexasHoldem にはレイズ回数の上限が無い）
+
+実行例:
+    engine = VectorEngine(num_tables=10000, num_seats=6, seed=1)
+    engine.play_hands(100, SimplePolicy(aggression=0.5))
+"""
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from hand_evaluator import HandEvaluator
+
+FOLD = 0
+CALL = 1  # to_call が 0 ならチェック
+RAISE = 2
+
+MAX_RAISES = 4  # 1ストリートのレイズ回数の上限
+BOARD_SIZES = (0, 3, 4, 5)  # 各ストリートで公開されているボードの枚数
+
+Policy = Callable[["VectorEngine", np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class VectorEngine:
+    """
+    num_tables 個のテーブル（各 num_seats 席）の状態を配列で持つエンジン
+
+    配列はすべて1次元目がテーブル、2次元目が席:
+        chips, bets（このストリートのベット額）, contributed（このハンドの投入額）,
+        folded, all_in, hole_cards (T, S, 2), board (T, 5)
+    """
+
+    def __init__(self, num_tables: int, num_seats: int, chips: int = 1000,
+                 small_blind: int = 10, big_blind: int = 20, seed: Optional[int] = None):
+        if num_seats < 2 or 2 * num_seats + 5 > 52:
+            raise ValueError("席数は2〜23である必要があります")
+        self.num_tables = num_tables
+        self.num_seats = num_seats
+        self.starting_chips = chips
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.rng = np.random.default_rng(seed)
+
+        shape = (num_tables, num_seats)
+        self.chips = np.full(shape, chips, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        self.contributed = np.zeros(shape, dtype=np.int64)
+        self.folded = np.zeros(shape, dtype=bool)
+        self.all_in = np.zeros(shape, dtype=bool)
+        self.hole_cards = np.zeros(shape + (2,), dtype=np.int64)
+        self.board = np.zeros((num_tables, 5), dtype=np.int64)
+
+        self.pot = np.zeros(num_tables, dtype=np.int64)
+        self.current_bet = np.zeros(num_tables, dtype=np.int64)
+        self.raises = np.zeros(num_tables, dtype=np.int64)
+        self.dealer = np.zeros(num_tables, dtype=np.int64)
+        self.playing = np.zeros(num_tables, dtype=bool)  # このハンドを行っているテーブル
+        self.street = 0  # 0=プリフロップ 〜 3=リバー
+
+        # 集計
+        self.hands_played = 0
+        self.rebuys = np.zeros(shape, dtype=np.int64)
+        self.hands_won = np.zeros(shape, dtype=np.int64)
+        self.showdowns = np.zeros(num_tables, dtype=np.int64)
+
+        self._rows = np.arange(num_tables)
+        self._offsets = np.arange(num_seats)
+
+    # ------------------------------------------------------------------
+    # ポリシーから参照する値
+    # ------------------------------------------------------------------
+
+    @property
+    def visible_board(self) -> np.ndarray:
+        """現在のストリートで公開されているボード（形状 (T, 0/3/4/5)）"""
+        return self.board[:, :BOARD_SIZES[self.street]]
+
+    def to_call(self, tables: np.ndarray, seats: np.ndarray) -> np.ndarray:
+        """コールに必要な額"""
+        return self.current_bet[tables] - self.bets[tables, seats]
+
+    def can_act(self) -> np.ndarray:
+        """アクションできる席（フォールドもオールインもしていない）"""
+        return ~self.folded & ~self.all_in
+
+    def live_players(self) -> np.ndarray:
+        """テーブルごとのフォールドしていないプレイヤー数"""
+        return (~self.folded).sum(axis=1)
+
+    # ------------------------------------------------------------------
+    # ハンドの進行
+    # ------------------------------------------------------------------
+
+    def play_hands(self, n_hands: int, policy: Union[Policy, Sequence[Policy]],
+                   rebuy: bool = True):
+        """
+        全テーブルで n_hands ハンドをプレイ
+
+        Args:
+            policy: 全席共通のポリシー、または席ごとのポリシーのリスト
+            rebuy: True ならチップが無くなった席を初期チップで復帰させる
+                   （False なら席を空け、2人未満になったテーブルはハンドを行わない）
+        """
+        for _ in range(n_hands):
+            if rebuy:
+                broke = self.chips <= 0
+                self.rebuys += np.where(broke, self.starting_chips, 0)
+                self.chips[broke] = self.starting_chips
+            self.play_hand(policy)
+
+    def play_hand(self, policy: Union[Policy, Sequence[Policy]]):
+        """全テーブルで1ハンドをプレイ"""
+        self._start_hand()
+        for street in range(4):
+            self.street = street
+            self._betting_round(policy)
+            if not ((self.live_players() > 1) & self.playing).any():
+                break
+        self._showdown()
+
+        # ディーラーボタンを次のチップのある席へ
+        self.dealer = np.where(self.playing,
+                               self._next_seat(self.dealer + 1, self.chips > 0), self.dealer)
+        self.hands_played += 1
+
+    def _next_seat(self, start: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """start から時計回りに見て最初に mask が True の席（テーブルごと）"""
+        seats = (start[:, None] + self._offsets) % self.num_seats
+        rows = self._rows[:len(start)]
+        first = np.argmax(mask[rows[:, None], seats], axis=1)
+        return seats[rows, first]
+
+    def _start_hand(self):
+        self.bets[:] = 0
+        self.contributed[:] = 0
+        self.pot[:] = 0
+        self.current_bet[:] = 0
+        self.raises[:] = 0
+        self.all_in[:] = False
+        # チップの無い席は最初からフォールド扱い
+        self.folded = self.chips <= 0
+        self.playing = self.live_players() >= 2
+        self.folded[~self.playing] = True
+
+        # 各テーブルで独立にシャッフルして、必要な枚数だけ配る
+        need = 2 * self.num_seats + 5
+        decks = np.argsort(self.rng.random((self.num_tables, 52)), axis=1)[:, :need]
+        self.hole_cards = decks[:, :2 * self.num_seats].reshape(self.num_tables, self.num_seats, 2)
+        self.board = decks[:, 2 * self.num_seats:]
+
+        seated = ~self.folded
+        self.dealer = self._next_seat(self.dealer, seated)
+        sb_seat = self._next_seat(self.dealer + 1, seated)
+        bb_seat = self._next_seat(sb_seat + 1, seated)
+        self._post(sb_seat, self.small_blind)
+        self._post(bb_seat, self.big_blind)
+        self.current_bet = np.where(self.playing, self.bets.max(axis=1), 0)
+        self._bb_seat = bb_seat
+
+    def _post(self, seats: np.ndarray, amount: int):
+        rows = self._rows[self.playing]
+        seats = seats[self.playing]
+        paid = np.minimum(amount, self.chips[rows, seats])
+        self._pay(rows, seats, paid)
+
+    def _pay(self, tables: np.ndarray, seats: np.ndarray, amounts: np.ndarray):
+        self.chips[tables, seats] -= amounts
+        self.bets[tables, seats] += amounts
+        self.contributed[tables, seats] += amounts
+        self.pot[tables] += amounts
+        self.all_in[tables, seats] |= (self.chips[tables, seats] == 0) & (amounts > 0)
+
+    def _betting_round(self, policy: Union[Policy, Sequence[Policy]]):
+        """
+        1ストリートのベッティングを全テーブルで同時に進める
+
+        テーブルごとに「まだ行動が必要な人数」を数え、1手番ごとに
+        全テーブルの次の席の判断をまとめて求める。
+        """
+        can_act = self.can_act()
+        active = can_act.sum(axis=1)
+        facing = (can_act & (self.bets < self.current_bet[:, None])).sum(axis=1)
+        # 行動できるのが1人だけなら、コールが必要なときだけ行動する
+        to_act = np.where(active > 1, active, facing)
+        to_act[~self.playing | (self.live_players() <= 1)] = 0
+
+        if self.street == 0:
+            position = self._bb_seat + 1
+        else:
+            position = self.dealer + 1
+
+        while True:
+            tables = np.nonzero(to_act > 0)[0]
+            if not tables.size:
+                break
+            seats = self._next_seat(position[tables], self.can_act()[tables])
+            actions, amounts = self._decide(policy, tables, seats)
+            self._apply(tables, seats, actions, amounts, to_act)
+            position[tables] = seats + 1
+
+        # 次のストリートのためにベット額をリセット
+        self.bets[:] = 0
+        self.current_bet[:] = 0
+        self.raises[:] = 0
+
+    def _decide(self, policy, tables: np.ndarray, seats: np.ndarray):
+        if callable(policy):
+            actions, amounts = policy(self, tables, seats)
+            return np.asarray(actions, dtype=np.int64), np.asarray(amounts, dtype=np.int64)
+
+        # 席ごとのポリシー: 同じ席のテーブルをまとめて1回呼ぶ
+        actions = np.empty(len(tables), dtype=np.int64)
+        amounts = np.empty(len(tables), dtype=np.int64)
+        for seat in np.unique(seats):
+            index = np.nonzero(seats == seat)[0]
+            seat_actions, seat_amounts = policy[seat](self, tables[index], seats[index])
+            actions[index] = seat_actions
+            amounts[index] = seat_amounts
+        return actions, amounts
+
+    def _apply(self, tables: np.ndarray, seats: np.ndarray, actions: np.ndarray,
+               amounts: np.ndarray, to_act: np.ndarray):
+        """判断をまとめて反映（各テーブルから1席ずつ）"""
+        to_call = self.to_call(tables, seats)
+        # レイズ回数の上限に達したテーブルのレイズはコールにする
+        actions = np.where((actions == RAISE) & (self.raises[tables] >= MAX_RAISES), CALL, actions)
+
+        fold = actions == FOLD
+        self.folded[tables[fold], seats[fold]] = True
+
+        raise_by = np.where(actions == RAISE, np.maximum(amounts, self.big_blind), 0)
+        wanted = np.where(fold, 0, to_call + raise_by)
+        paid = np.minimum(wanted, self.chips[tables, seats])
+        self._pay(tables, seats, paid)
+
+        new_bets = self.bets[tables, seats]
+        raised = new_bets > self.current_bet[tables]
+        self.current_bet[tables] = np.maximum(self.current_bet[tables], new_bets)
+        self.raises[tables] += raised
+
+        # レイズされたら、レイズした人以外の行動できる全員がもう一度行動する
+        can_act = self.can_act()[tables]
+        others = can_act.sum(axis=1) - can_act[np.arange(len(tables)), seats]
+        to_act[tables] = np.where(raised, others, to_act[tables] - 1)
+        to_act[tables[self.live_players()[tables] <= 1]] = 0
+
+    def _showdown(self):
+        """サイドポットごとに、資格のあるプレイヤーの中で最も強い役に分配"""
+        rows = self._rows
+        live = ~self.folded & self.playing[:, None]
+        cards = np.concatenate([
+            self.hole_cards,
+            np.broadcast_to(self.board[:, None, :], (self.num_tables, self.num_seats, 5)),
+        ], axis=2).reshape(-1, 7)
+        # テーブルごとに1組のデッキから配っているので、重複の確認は省く
+        strengths = HandEvaluator.evaluate_batch(cards, validate=False).reshape(
+            self.num_tables, self.num_seats)
+        strengths = np.where(live, strengths, -1)
+        self.showdowns += self.playing & (live.sum(axis=1) > 1)
+
+        contributed = self.contributed
+        levels = np.sort(contributed, axis=1)
+        previous = np.zeros(self.num_tables, dtype=np.int64)
+        winnings = np.zeros_like(self.chips)
+        for k in range(self.num_seats):
+            level = levels[:, k]
+            amount = (np.minimum(contributed, level[:, None])
+                      - np.minimum(contributed, previous[:, None])).sum(axis=1)
+            eligible = live & (contributed >= level[:, None])
+            # 資格のある人がいない層（フォールドした人だけが出した分）は残った全員で争う
+            eligible = np.where(eligible.any(axis=1)[:, None], eligible, live)
+            scores = np.where(eligible, strengths, -1)
+            winners = eligible & (scores == scores.max(axis=1)[:, None])
+            num_winners = np.maximum(winners.sum(axis=1), 1)
+            share = amount // num_winners
+            winnings += np.where(winners, share[:, None], 0)
+            # 割り切れない端数はディーラーの次から数えて最初の勝者へ
+            odd = amount - share * num_winners
+            first = self._next_seat(self.dealer + 1, winners)
+            winnings[rows, first] += np.where(winners.any(axis=1), odd, 0)
+            previous = level
+
+        self.chips += winnings
+        self.hands_won += winnings > 0
+        self.pot[:] = 0
+
+
+class SimplePolicy:
+    """
+    AIPlayer と同じ考え方の乱数ベースのポリシー（全テーブル分をまとめて判断）
+
+    カードは見ずに、コール額の大きさと aggression だけで判断する。
+    """
+
+    def __init__(self, aggression: float = 0.5, seed: Optional[int] = None):
+        self.aggression = aggression
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, engine: VectorEngine, tables: np.ndarray,
+                 seats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        to_call = engine.to_call(tables, seats)
+        chips = engine.chips[tables, seats]
+        decision = self.rng.random(len(tables))
+        min_raise = engine.big_blind
+
+        big_bet = to_call > chips * 0.3
+        fold_below = np.where(big_bet, 0.4 * (1 - self.aggression), 0.2)
+        call_below = np.where(big_bet, 0.7, 0.6 + self.aggression * 0.2)
+        fold_below = np.where(to_call == 0, 0.0, fold_below)
+        call_below = np.where(to_call == 0, 0.7, call_below)
+
+        actions = np.where(decision < fold_below, FOLD,
+                           np.where(decision < call_below, CALL, RAISE))
+        can_raise = chips - to_call >= min_raise
+        actions = np.where((actions == RAISE) & ~can_raise, CALL, actions)
+
+        high = np.maximum(np.minimum(min_raise * 3, chips - to_call), min_raise)
+        amounts = self.rng.integers(min_raise, high + 1)
+        return actions, np.where(actions == RAISE, amounts, 0)
+
+
+def per_table_policy(decide: Callable[["VectorEngine", int, int], Tuple[int, int]]) -> Policy:
+    """
+    テーブル1つずつ判断する Python の関数をポリシーにする
+
+    decide(engine, table, seat) は (action, amount) を返す。配列でまとめて書けない
+    戦略を試すとき用で、呼び出しはテーブルごとになる。
+    """
+
+    def policy(engine: VectorEngine, tables: np.ndarray,
+               seats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        decisions = [decide(engine, int(t), int(s)) for t, s in zip(tables, seats)]
+        actions = np.array([action for action, _ in decisions], dtype=np.int64)
+        amounts = np.array([amount for _, amount in decisions], dtype=np.int64)
+        return actions, amounts
+
+    return policy